@@ -0,0 +1,384 @@
+"""
+.. module:: acquisition
+    :synopsis: This module reads the LDC1101EVMs in a separate process and passes their samples to the GUI through shared memory
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+The GUI, the live graph and the fits all run in the process of the GUI and compete for the global interpreter lock of Python with the thread reading the serial ports, which delays the bytes and therefore the timestamps of the samples. In a separate process the LDC1101EVMs are read by a :class:`reader.serial_reader` and decoded by :class:`ldc1101evm.ldc1101evm` objects as before, but the decoded samples and their timestamps are written to a :class:`ring_buffer` in shared memory, from which the GUI takes them without them being sent through a pipe.
+
+The GUI uses :class:`process_ldc1101evm` in the same way as :class:`ldc1101evm.ldc1101evm`. Commands like initialising the conversion are sent to the process through a pipe and executed there.
+"""
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+from ldc1101evm import ldc1101evm
+
+class ring_buffer:
+    """Class for passing timestamped samples from one writing process to a reading process through shared memory. The memory starts with a header with the number of samples written so far, the error flag of the LDC1101EVM and the capacity, followed by the timestamps and the samples. The number of samples written is only increased after the samples themselves have been written, such that the reader never sees samples that are incomplete.
+    """
+
+    header_size = 3
+    """The number of 64 bit integers in the header"""
+
+    capacity = 2**18
+    """The number of samples the buffer can hold, about six minutes of the fastest conversion profile"""
+
+    def __init__(self,name=None):
+        """Code run when the ring_buffer object is initialised.
+
+        :param name: The name of the shared memory of an existing ring buffer to attach to, or None to create a new one
+        :return: None
+        :rtype: None
+        """
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True,size=8*(self.header_size+2*self.capacity))
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.header = np.ndarray(self.header_size,dtype=np.int64,buffer=self.memory.buf)
+        if self.owner:
+            self.header[:] = [0,0,self.capacity]
+        capacity = int(self.header[2])
+        self.times = np.ndarray(capacity,dtype=np.float64,buffer=self.memory.buf,offset=8*self.header_size)
+        self.values = np.ndarray(capacity,dtype=np.float64,buffer=self.memory.buf,offset=8*(self.header_size+capacity))
+
+    @property
+    def name(self):
+        """The name of the shared memory, with which another process can attach to the ring buffer"""
+        return self.memory.name
+
+    @property
+    def written(self):
+        """The number of samples written since the ring buffer was created"""
+        return int(self.header[0])
+
+    @property
+    def error(self):
+        """True if the writer reported that the communication with the LDC1101EVM failed"""
+        return bool(self.header[1])
+
+    @error.setter
+    def error(self,value):
+        self.header[1] = int(bool(value))
+
+    def write(self,times,values):
+        """Function for adding samples. If the reader does not keep up the oldest samples are overwritten.
+
+        :param times: Array with the timestamps of the samples
+        :param values: Array with the samples
+        :return: None
+        :rtype: None
+        """
+        capacity = len(self.values)
+        written = self.written
+        if len(values) > capacity:
+            written = written + len(values) - capacity
+            times = times[-capacity:]
+            values = values[-capacity:]
+        index = (written + np.arange(len(values))) % capacity
+        self.times[index] = times
+        self.values[index] = values
+        self.header[0] = written + len(values)
+
+    def read(self,start):
+        """Function for taking the samples written since a previous read. Samples that were overwritten before they were read are skipped.
+
+        :param start: The number of samples written at the previous read, see :attr:`ring_buffer.written`
+        :return: Array with the timestamps, array with the samples, the number of samples written up to the last sample returned and the number of samples skipped
+        :rtype: tuple
+        """
+        capacity = len(self.values)
+        written = self.written
+        skipped = max(written - capacity - start,0)
+        start = start + skipped
+        first = start % capacity
+        last = first + written - start
+        #the samples are copied out of the shared memory once, in at most two slices
+        if last <= capacity:
+            times = self.times[first:last].copy()
+            values = self.values[first:last].copy()
+        else:
+            times = np.concatenate([self.times[first:],self.times[:last-capacity]])
+            values = np.concatenate([self.values[first:],self.values[:last-capacity]])
+        #samples overwritten while they were copied are dropped as well
+        overwritten = max(self.written - capacity - start,0)
+        if overwritten > 0:
+            times = times[overwritten:]
+            values = values[overwritten:]
+            skipped = skipped + overwritten
+        return times, values, written, skipped
+
+    def close(self):
+        """Function for detaching from the shared memory. The process that created the ring buffer also frees the memory.
+
+        :return: None
+        :rtype: None
+        """
+        self.header = None
+        self.times = None
+        self.values = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+def acquisition_main(connection,poll_interval=0.001):
+    """The main function of the acquisition process. It opens the LDC1101EVMs requested by the GUI, writes their decoded samples to their ring buffers and executes the commands received from the GUI, until it is told to stop or the GUI closes the pipe.
+
+    The commands are tuples: ('open', key, port, ring buffer name), ('call', key, method name, arguments), ('close', key) and ('stop',). Each command is answered with a tuple of True and the result, or False and a description of the error.
+
+    :param connection: The end of the pipe of the acquisition process
+    :param poll_interval: The maximum time in seconds to wait for a command before the LDC1101EVMs are read again
+    :return: None
+    :rtype: None
+    """
+    from reader import serial_reader
+    reader = serial_reader()
+    sensors = {}
+    try:
+        while True:
+            for sensor, ring in sensors.values():
+                sensor.decode_frames()
+                if len(sensor.samples) > 0:
+                    ring.write(sensor.sample_times,sensor.samples)
+                    sensor.samples = np.zeros(0)
+                    sensor.sample_times = np.zeros(0)
+                if sensor.error:
+                    ring.error = True
+            try:
+                if not connection.poll(poll_interval):
+                    continue
+                command = connection.recv()
+            except (EOFError,OSError):
+                break
+            if command[0] == 'stop':
+                connection.send((True,None))
+                break
+            try:
+                if command[0] == 'open':
+                    _, key, port, name = command
+                    sensors[key] = (ldc1101evm(port,reader),ring_buffer(name))
+                    result = None
+                elif command[0] == 'call':
+                    _, key, method, arguments = command
+                    result = getattr(sensors[key][0],method)(*arguments)
+                elif command[0] == 'close':
+                    sensor, ring = sensors.pop(command[1])
+                    sensor.close()
+                    ring.close()
+                    result = None
+                else:
+                    raise ValueError('unknown command ' + str(command[0]))
+            except Exception as error:
+                connection.send((False,type(error).__name__ + ': ' + str(error)))
+            else:
+                connection.send((True,result))
+    finally:
+        for sensor, ring in sensors.values():
+            sensor.close()
+            ring.close()
+        reader.close()
+
+class acquisition_process:
+    """Class for starting the acquisition process and sending commands to it. Like a :class:`reader.serial_reader` it can be shared by several LDC1101EVMs, which are then read by the same thread.
+    """
+
+    timeout = 30
+    """The maximum time in seconds to wait for the reply to a command, long enough for auto tuning"""
+
+    def __init__(self):
+        """Code run when the acquisition_process object is initialised. This starts the process. Processes are always spawned instead of forked, since forking a process with the threads of the GUI is not safe.
+
+        :return: None
+        :rtype: None
+        """
+        context = multiprocessing.get_context('spawn')
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=acquisition_main, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.lock = threading.Lock()
+        self.keys = 0
+
+    @property
+    def alive(self):
+        """True if the acquisition process is running"""
+        return self.process.is_alive()
+
+    def command(self,*command,timeout=None):
+        """Function for executing a command in the acquisition process, see :func:`acquisition_main`
+
+        :param command: The command and its arguments
+        :param timeout: The maximum time to wait for the reply in seconds, :attr:`acquisition_process.timeout` by default
+        :return: The result of the command
+        :rtype: object
+        """
+        if timeout is None:
+            timeout = self.timeout
+        with self.lock:
+            if not self.alive:
+                raise RuntimeError('the acquisition process stopped')
+            self.connection.send(command)
+            if not self.connection.poll(timeout):
+                raise RuntimeError('the acquisition process did not reply to ' + str(command[0]))
+            succeeded, result = self.connection.recv()
+        if not succeeded:
+            raise RuntimeError(result)
+        return result
+
+    def new_key(self):
+        """Function for getting a key by which a new LDC1101EVM is known in the acquisition process
+
+        :return: The key
+        :rtype: int
+        """
+        self.keys = self.keys + 1
+        return self.keys
+
+    def close(self):
+        """Function for stopping the acquisition process, which closes the LDC1101EVMs that are still open
+
+        :return: None
+        :rtype: None
+        """
+        try:
+            self.command('stop',timeout=2)
+        except (RuntimeError,OSError):
+            pass
+        self.process.join(2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+
+class process_ldc1101evm(ldc1101evm):
+    """Class for using a LDC1101EVM that is read by the acquisition process. It has the same functions as :class:`ldc1101evm.ldc1101evm`, but the samples are taken from a :class:`ring_buffer`. The filter is applied in the process of the GUI, such that it can be changed and its statistics can be read as before.
+    """
+
+    def __init__(self,port,acquisition=None):
+        """Code run when the process_ldc1101evm object is initialised. This opens the port in the acquisition process.
+
+        :param port: The full name of the port at which the LDC1101EVM can be found. Example: 'COM1'
+        :param acquisition: The :class:`acquisition_process` to share with other LDC1101EVMs. If None the LDC1101EVM gets a process of its own.
+        :return: None
+        :rtype: None
+        """
+        self.own_acquisition = acquisition is None
+        if acquisition is None:
+            acquisition = acquisition_process()
+        self.acquisition = acquisition
+        self.ring = ring_buffer()
+        self.read_count = 0
+        self.skipped = 0
+        self.error = False
+        self.samples = np.zeros(0)
+        self.sample_times = np.zeros(0)
+        self.key = acquisition.new_key()
+        try:
+            acquisition.command('open',self.key,port,self.ring.name)
+        except RuntimeError:
+            self.ring.close()
+            if self.own_acquisition:
+                acquisition.close()
+            raise
+
+    def call(self,method,*arguments):
+        """Function for calling a function of the :class:`ldc1101evm.ldc1101evm` object in the acquisition process
+
+        :param method: The name of the function
+        :param arguments: The arguments of the function
+        :return: The result of the function
+        :rtype: object
+        """
+        return self.acquisition.command('call',self.key,method,arguments)
+
+    def LHR_init(self, profile='balanced'):
+        """Function for initialising a high resolution measurement in the acquisition process, see :meth:`ldc1101evm.ldc1101evm.LHR_init`
+
+        :param profile: The name of the conversion profile to use, see :attr:`ldc1101evm.ldc1101evm.conversion_profiles`
+        :return: None
+        :rtype: None
+        """
+        self.call('LHR_init',profile)
+        self.profile = profile
+        self.flush()
+        if self.filter is not None:
+            self.filter.reset()
+
+    def auto_tune(self, target_noise, samples=50):
+        """Function for selecting the fastest conversion profile of which the noise is below a target in the acquisition process, see :meth:`ldc1101evm.ldc1101evm.auto_tune`
+
+        :param target_noise: The maximum allowed standard deviation of a single conversion in Henry
+        :param samples: The number of conversions used to measure the noise of each profile
+        :return: The name of the selected profile
+        :rtype: string
+        """
+        self.profile = self.call('auto_tune',target_noise,samples)
+        self.flush()
+        return self.profile
+
+    def decode_frames(self):
+        """Take the samples written to the ring buffer since the last time, pass them through :attr:`ldc1101evm.ldc1101evm.filter` and add them to the decoded samples. The error flag is set if the acquisition process reported an error or stopped.
+
+        :return: None
+        :rtype: None
+        """
+        times, values, self.read_count, skipped = self.ring.read(self.read_count)
+        if skipped > 0:
+            self.skipped = self.skipped + skipped
+            print('acquisition buffer overrun, ' + str(skipped) + ' samples lost')
+        if self.ring.error or not self.acquisition.alive:
+            self.error = True
+        if len(values) == 0:
+            return
+        if self.filter is not None:
+            values = self.filter.process(values)
+        self.samples = np.concatenate([self.samples,values])
+        self.sample_times = np.concatenate([self.sample_times,times])
+
+    def start_capture(self,filename,size=64e6):
+        """Start capturing the received bytes in the acquisition process, see :meth:`ldc1101evm.ldc1101evm.start_capture`
+
+        :param filename: The name of the capture file
+        :param size: The size of the capture file in bytes
+        :return: None
+        :rtype: None
+        """
+        self.call('start_capture',filename,size)
+
+    def stop_capture(self):
+        """Stop capturing the received bytes in the acquisition process
+
+        :return: None
+        :rtype: None
+        """
+        if self.acquisition.alive:
+            self.call('stop_capture')
+
+    def flush(self):
+        """Delete all currently stored measurements, both those waiting in the acquisition process and those in the ring buffer. The samples in the ring buffer are still passed through :attr:`ldc1101evm.ldc1101evm.filter` before they are deleted, such that the state of the filter continues where it was, like in :meth:`ldc1101evm.ldc1101evm.flush`, instead of holding the samples of the previous measurement.
+
+        :return: None
+        :rtype: None
+        """
+        try:
+            self.call('flush')
+        except RuntimeError:
+            self.error = True
+        _, values, self.read_count, _ = self.ring.read(self.read_count)
+        if self.filter is not None and len(values) > 0:
+            self.filter.process(values)
+        self.samples = np.zeros(0)
+        self.sample_times = np.zeros(0)
+
+    def close(self):
+        """Close the LDC1101EVM in the acquisition process and free the ring buffer. A process of its own is stopped as well.
+
+        :return: None
+        :rtype: None
+        """
+        try:
+            self.acquisition.command('close',self.key,timeout=2)
+        except RuntimeError:
+            pass
+        self.ring.close()
+        if self.own_acquisition:
+            self.acquisition.close()
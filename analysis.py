@@ -0,0 +1,488 @@
+"""
+.. module:: analysis
+    :synopsis: This module contains the functions for finding the location of a nozzle in the inductance measured during a pass over the coil
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+These are used by the GUI during a calibration and by reanalyse.py for processing stored calibrations again. The inductance curve of a pass is symmetric around the location of the nozzle, so all methods estimate the axis of symmetry of the curve.
+"""
+import math
+import numpy as np
+
+def func(x, o, a, b, c, d, e):
+    """Polynomial function fitted to the measured inductance curve to determine the point of symmetry
+
+    :param x: List of x coordinates at which the function should be evaluated
+    :param o: The point of symmetry
+    :param a: Constant offset
+    :param b: Constant before the square
+    :param c: Constant before the to the power 4
+    :param d: Constant before the to the power 6
+    :param e: Constant before the to the power 8
+    :return: The output of the polynomial function
+    :rtype: numpy array
+    """
+    return a + b * (x-o) ** 2 + c * (x-o) ** 4 + d * (x-o) ** 6 + e * (x-o) ** 8
+
+def dip_half_width(x,y,o,fraction=0.5):
+    """Function for measuring the half width of the dip of a pass. On each side of the point of symmetry, going outwards from it, the first sample at which the dip has recovered to less than the fraction of its depth gives the half width on that side. The baseline of each side is the median of the 10% of the samples at that end of the pass, such that a drift of the baseline during the pass does not make one of the sides look like it never recovers.
+
+    :param x: List of x coordinates
+    :param y: List of y coordinates
+    :param o: The point of symmetry
+    :param fraction: The fraction of the depth of the dip at which the width is measured
+    :return: The largest half width of both sides, or infinity if the dip has not recovered on one of the sides
+    :rtype: float
+    """
+    order = np.argsort(x)
+    x = np.asarray(x)[order]
+    y = np.asarray(y)[order]
+    n_edge = max(len(y)//10,1)
+    bottom = np.interp(o,x,y)
+    half_widths = []
+    for side, level in [(-1,np.median(y[:n_edge])),(1,np.median(y[-n_edge:]))]:
+        depth = level - bottom
+        if not depth > 0:
+            raise RuntimeError('the curve has no dip')
+        distance = (x - o)*side
+        outside = distance > 0
+        order = np.argsort(distance[outside])
+        recovered = level - y[outside][order] < fraction*depth
+        if not recovered.any():
+            return np.inf
+        half_widths.append(distance[outside][order][int(np.argmax(recovered))])
+    return max(half_widths)
+
+drift_margin = 2
+"""The distance from the point of symmetry beyond which :func:`remove_drift` takes the samples of a pass to be outside the dip, relative to the half width of the dip at half its depth. The dips in data.mat have recovered to less than a tenth of their depth there."""
+
+min_drift_samples = 3
+"""The smallest number of samples outside the dip on each side of the point of symmetry needed by :func:`remove_drift`"""
+
+def remove_drift(t,y,x):
+    """Function for removing the thermal drift of the coil from the samples of a single pass. The hot nozzle warms up the coil, which slowly shifts its baseline inductance. A linear trend in time is fitted through the samples outside the dip, where the nozzle is not above the coil, and subtracted from all samples. These are the samples further than :data:`drift_margin` times the half width of the dip, see :func:`dip_half_width`, from the point of symmetry found by :func:`fit_polynomial`. Only distances that were sampled on both sides are used, such that what is left of the dip is the same on both sides and does not look like a trend when the dip is not in the middle of the pass. Since the trend changes the fit, this is repeated a few times.
+
+    :param t: List with the timestamps of the samples
+    :param y: List with the measured inductances
+    :param x: List with the positions of the samples
+    :return: The measured inductances with the drift removed, a RuntimeError is raised if the pass has too few samples outside the dip on one of the sides, for example because the scanning range is too short
+    :rtype: numpy array
+    """
+    t = np.asarray(t,dtype=float)
+    y = np.asarray(y,dtype=float)
+    x = np.asarray(x,dtype=float)
+    corrected = y
+    for iteration in range(3):
+        o = fit_polynomial(x,corrected)
+        distance = np.abs(x-o)
+        outside = (distance > drift_margin*dip_half_width(x,corrected,o)) & (distance <= min(o-np.min(x),np.max(x)-o))
+        if min(np.count_nonzero(outside & (x < o)),np.count_nonzero(outside & (x > o))) < min_drift_samples:
+            raise RuntimeError('not enough samples outside the dip to estimate the drift')
+        slope, _ = np.polyfit(t[outside],y[outside],1)
+        corrected = y - slope*(t-t[0])
+    return corrected
+
+def baseline(y):
+    """Function for estimating the inductance measured when the nozzle is not above the coil, as the median of the first and last 10% of the samples of a pass.
+
+    :param y: List with the measured inductances
+    :return: The baseline inductance
+    :rtype: float
+    """
+    n_edge = max(len(y)//10,1)
+    return np.median(np.r_[y[:n_edge],y[-n_edge:]])
+
+def fit_polynomial(x,y):
+    """Function for finding the point of symmetry by fitting the symmetric polynomial :func:`func` to the curve. This is the method used by the GUI.
+
+    :param x: List of x coordinates
+    :param y: List of y coordinates
+    :return: The point of symmetry
+    :rtype: float
+    """
+    from scipy.optimize import curve_fit
+    y_min = np.min(y)
+    y_max = np.max(y)
+    x_avg = np.mean(x)
+    x_min = np.min(x)
+    b0 = (y_max-y_min)/(x_min-x_avg)**2
+    p0 = [x_avg,y_min,b0,0,0,0]
+    popt, _ = curve_fit(func, x, y,p0, maxfev=1000)
+    return popt[0]
+
+def fit_parabola(x,y):
+    """Function for finding the point of symmetry by fitting a parabola to the samples around the extremum of the curve, being the samples that differ more than half of the peak height from the baseline.
+
+    :param x: List of x coordinates
+    :param y: List of y coordinates
+    :return: The point of symmetry
+    :rtype: float
+    """
+    height = np.abs(y-baseline(y))
+    peak = height > height.max()/2
+    if peak.sum() < 3:
+        raise RuntimeError('not enough samples around the peak to fit a parabola')
+    a, b, _ = np.polyfit(x[peak],y[peak],2)
+    return -b/(2*a)
+
+def fit_centroid(x,y):
+    """Function for finding the point of symmetry as the centroid of the curve, after subtracting the baseline measured at the edges of the pass.
+
+    :param x: List of x coordinates
+    :param y: List of y coordinates
+    :return: The point of symmetry
+    :rtype: float
+    """
+    weight = np.abs(y-baseline(y))
+    if weight.sum() == 0:
+        raise RuntimeError('no peak found in the curve')
+    return np.sum(weight*x)/np.sum(weight)
+
+def symmetry_error(x,y,o,points=200):
+    """Function for calculating how symmetric the curve is around a point. The curve is mirrored around the point and compared to itself over the largest range available on both sides. This is used as the fit quality, such that it can be compared between methods.
+
+    :param x: List of x coordinates, in ascending or descending order
+    :param y: List of y coordinates
+    :param o: The point around which the symmetry is evaluated, can also be an array of points
+    :param points: The number of points at which the mirrored curves are compared
+    :return: The RMS difference between the curve and its mirror image, relative to the peak to peak value of the curve
+    :rtype: float or numpy array
+    """
+    order = np.argsort(x)
+    x = np.asarray(x)[order]
+    y = np.asarray(y)[order]
+    o = np.asarray(o,dtype=float)
+    half_width = np.minimum(o-x[0],x[-1]-o)
+    u = np.linspace(0,1,points)*half_width[...,np.newaxis]
+    difference = np.interp(o[...,np.newaxis]+u,x,y)-np.interp(o[...,np.newaxis]-u,x,y)
+    error = np.sqrt(np.mean(difference**2,axis=-1))/np.ptp(y)
+    return np.where(half_width > 0,error,np.inf)
+
+def fit_mirror(x,y):
+    """Function for finding the point of symmetry as the point around which the mirrored curve matches the curve best, see :func:`symmetry_error`. The point is first searched on a grid over the middle half of the pass and then refined by a parabola through the best grid point and its neighbours.
+
+    :param x: List of x coordinates
+    :param y: List of y coordinates
+    :return: The point of symmetry
+    :rtype: float
+    """
+    x_min = np.min(x)
+    x_max = np.max(x)
+    candidates = np.linspace(x_min+(x_max-x_min)/4,x_max-(x_max-x_min)/4,101)
+    error = symmetry_error(x,y,candidates)
+    i = int(np.clip(np.argmin(error),1,len(candidates)-2))
+    e0, e1, e2 = error[i-1:i+2]
+    curvature = e0-2*e1+e2
+    if curvature <= 0:
+        return candidates[i]
+    step = candidates[1]-candidates[0]
+    return candidates[i] + step*(e0-e2)/(2*curvature)
+
+fit_methods = {'polynomial':fit_polynomial, 'parabola':fit_parabola, 'centroid':fit_centroid, 'mirror':fit_mirror}
+"""The available methods for finding the point of symmetry, by name"""
+
+def find_symmetry_axis(x,y,method='polynomial'):
+    """Function for calculating the point of symmetry of a a symmetric curve
+
+    :param x: List of x coordinates
+    :param y: List of y coordinates
+    :param method: The name of the method in :data:`fit_methods` to use
+    :return: The point of symmetry
+    :rtype: float
+    """
+    return fit_methods[method](np.asarray(x),np.asarray(y))
+
+max_symmetry_error = 0.2
+"""The largest :func:`symmetry_error` accepted by :func:`check_fit`. Good passes are below 0.1."""
+
+min_depth = 5
+"""The smallest depth of the dip at the point of symmetry accepted by :func:`check_fit`, relative to the noise of the samples. Good passes are deeper than 9, while noise alone does not get deeper than 3."""
+
+def check_fit(x,y,o,max_error=max_symmetry_error,depth=min_depth):
+    """Function for checking whether a point of symmetry found by one of the :data:`fit_methods` is plausible. The curve needs to be symmetric around the point and needs to be a dip clearly deeper than the noise, like the inductance of a coil with a nozzle above it. The point needs to lie inside the samples instead of near the edges, where a fit is mostly extrapolated.
+
+    :param x: List of x coordinates used for the fit
+    :param y: List of y coordinates used for the fit
+    :param o: The point of symmetry found
+    :param max_error: The largest symmetry error accepted
+    :param depth: The smallest depth of the dip accepted, relative to the noise estimated from the differences between consecutive samples
+    :return: None, a RuntimeError describing the problem is raised if the fit is not plausible
+    :rtype: None
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if not np.isfinite(o):
+        raise RuntimeError('no point of symmetry found')
+    x_min = np.min(x)
+    x_max = np.max(x)
+    margin = (x_max-x_min)/10
+    if o < x_min + margin or o > x_max - margin:
+        raise RuntimeError(f"point of symmetry {o:.3f} is outside the samples from {x_min:.3f} to {x_max:.3f}")
+    curvature = np.polyfit(x-o,y,2)[0]
+    if not curvature > 0:
+        raise RuntimeError('the curve has no dip')
+    order = np.argsort(x)
+    noise = np.std(np.diff(y))/np.sqrt(2)
+    dip = (baseline(y) - np.interp(o,x[order],y[order]))/noise if noise > 0 else np.inf
+    if dip < depth:
+        raise RuntimeError(f"the dip is only {dip:.1f} times deeper than the noise")
+    error = float(symmetry_error(x,y,o))
+    if error > max_error:
+        raise RuntimeError(f"the curve is not symmetric, symmetry error {error:.3f}")
+
+def is_outlier(value,others,threshold=5,tolerance=0.02):
+    """Function for checking whether a location or offset differs too much from the ones measured in other rounds. The spread of the other rounds is estimated robustly from their median absolute deviation, such that a single bad round does not hide another one.
+
+    :param value: The value to check
+    :param others: List with the values of the other rounds
+    :param threshold: The number of standard deviations the value may differ from the median of the others
+    :param tolerance: The difference in mm that is always accepted, since a few rounds can happen to agree much better than the repeatability of the printer
+    :return: True if the value is an outlier, False if it is not or if less than three other rounds are available
+    :rtype: Boolean
+    """
+    others = np.asarray(others,dtype=float)
+    others = others[np.isfinite(others)]
+    if len(others) < 3:
+        return False
+    median = np.median(others)
+    spread = 1.4826*np.median(np.abs(others-median))
+    return abs(value-median) > max(threshold*spread,tolerance)
+
+terms = 5
+"""The number of terms of the symmetric polynomial fitted by :class:`online_symmetry_fit`, the same as :func:`func`"""
+
+binomial = np.array([[math.comb(n,k) for k in range(4*terms-3)] for n in range(4*terms-3)],dtype=float)
+"""Table with the binomial coefficients n over k, used by :class:`online_symmetry_fit`"""
+
+exponents = np.subtract.outer(np.arange(4*terms-3),np.arange(4*terms-3))
+"""Table with n-k, used by :class:`online_symmetry_fit`"""
+
+class online_symmetry_fit:
+    """Class for estimating the point of symmetry while the samples of a pass arrive. The same symmetric polynomial as :func:`func` is fitted in the least squares sense. Only the sums of the powers of the positions and of their products with the samples are stored, such that adding a sample takes constant time and the fit for any point of symmetry can be calculated from the sums using the binomial theorem. The point of symmetry is the one with the smallest residual and its standard error follows from the curvature of the residual around it.
+    """
+
+    search_points = 41
+    """The number of points at which the residual is evaluated in each step of the search for its minimum"""
+
+    flank_level = 0.5
+    """The fraction of the depth of the dip at which its width is measured by :meth:`online_symmetry_fit.dip_width`"""
+
+    flank_factor = 1.5
+    """The distance from the point of symmetry that needs to be covered on both sides before a pass can be ended, relative to the half width of the dip at :attr:`online_symmetry_fit.flank_level`"""
+
+    def __init__(self,center,half_width):
+        """Code run when the online_symmetry_fit object is initialised.
+
+        :param center: The position around which the pass is made
+        :param half_width: Only samples within this distance of the center are used, like the middle 80% of the samples used by :func:`find_symmetry_axis` after a pass
+        :return: None
+        :rtype: None
+        """
+        self.center = center
+        self.half_width = half_width
+        self.position_sums = np.zeros(4*terms-3)
+        self.product_sums = np.zeros(2*terms-1)
+        self.square_sum = 0
+        self.count = 0
+        self.reference = None
+        self.v_min = np.inf
+        self.v_max = -np.inf
+        self.result = (np.nan,np.inf)
+        self.changed = False
+        self.positions = []
+        self.values = []
+
+    def add(self,x,y):
+        """Function for adding a sample
+
+        :param x: The position of the sample
+        :param y: The measured value
+        :return: None
+        :rtype: None
+        """
+        #positions are scaled to the window and values taken relative to the first sample, to keep the sums accurate
+        v = (x - self.center)/self.half_width
+        if abs(v) > 1:
+            return
+        if self.reference is None:
+            self.reference = y
+            self.scale = abs(y) if y != 0 else 1
+        y = (y - self.reference)/self.scale
+        powers = v**np.arange(4*terms-3)
+        self.position_sums += powers
+        self.product_sums += y*powers[:2*terms-1]
+        self.square_sum += y*y
+        self.count = self.count + 1
+        self.v_min = min(self.v_min,v)
+        self.v_max = max(self.v_max,v)
+        self.positions.append(x)
+        self.values.append(y)
+        self.changed = True
+
+    def residual(self,d):
+        """Function for calculating the residual sum of squares of the best fit for a number of points of symmetry at once
+
+        :param d: Array with the distances of the points of symmetry from the center, relative to the half width
+        :return: Array with the residual sums of squares
+        :rtype: numpy array
+        """
+        d = np.asarray(d,dtype=float)[:,np.newaxis,np.newaxis]
+        #the sums of (v-d)**n follow from the sums of v**k as sum over k of (n over k)*(-d)**(n-k)*sum(v**k)
+        shift = np.where(exponents >= 0,binomial*(-d)**np.maximum(exponents,0),0)
+        shifted = shift @ self.position_sums
+        even = 2*np.arange(terms)
+        shifted_products = shift[:,even,:2*terms-1] @ self.product_sums
+        gram = shifted[:,np.add.outer(even,even)]
+        coefficients = np.linalg.solve(gram,shifted_products[...,np.newaxis])[...,0]
+        return self.square_sum - np.sum(coefficients*shifted_products,axis=1)
+
+    def estimate(self):
+        """Function for getting the current estimate of the point of symmetry. The residual is minimised on a grid, which is refined twice around the minimum.
+
+        :return: The point of symmetry and its standard error, or nan and infinity if there are not enough samples yet
+        :rtype: tuple
+        """
+        if not self.changed:
+            return self.result
+        self.changed = False
+        if self.count < 2*terms or self.v_max - self.v_min <= 0:
+            return self.result
+
+        #like fit_mirror only the middle half of the positions seen so far is searched, since near the ends a curve that is only seen on one side fits any point of symmetry
+        low = self.v_min + (self.v_max-self.v_min)/4
+        high = self.v_max - (self.v_max-self.v_min)/4
+        try:
+            for refinement in range(3):
+                grid = np.linspace(low,high,self.search_points)
+                i = int(np.argmin(self.residual(grid)))
+                low = grid[max(i-1,0)]
+                high = grid[min(i+1,len(grid)-1)]
+            d = grid[i]
+
+            #the standard error of the point of symmetry follows from the curvature of the residual, with the noise estimated from the residual itself
+            step = (self.v_max-self.v_min)/100
+            residuals = self.residual([d-step,d,d+step])
+        except np.linalg.LinAlgError:
+            return self.result
+        curvature = (residuals[0]-2*residuals[1]+residuals[2])/step**2
+        variance = residuals[1]/max(self.count-terms-1,1)
+        #measured samples always leave a residual, so a residual that is not positive means the sums lost their accuracy
+        if curvature > 0 and variance > 0:
+            error = np.sqrt(2*variance/curvature)*self.half_width
+        else:
+            error = np.inf
+        self.result = (self.center+d*self.half_width,error)
+        return self.result
+
+    def dip_width(self,o):
+        """Function for measuring the half width of the dip. The baseline is the median of the first samples of the pass. On each side of the point of symmetry, going outwards from it, the first sample at which the dip has recovered to less than :attr:`online_symmetry_fit.flank_level` of its depth gives the half width on that side, such that noise far away from the dip does not affect it. A point of symmetry estimated before the bottom of the dip has been passed is thereby not mistaken for a narrow dip.
+
+        :param o: The point of symmetry
+        :return: The largest half width of both sides, or nan if the dip has not recovered on both sides yet
+        :rtype: float
+        """
+        x = np.asarray(self.positions)
+        y = np.asarray(self.values)
+        level = np.median(y[:max(len(y)//10,1)])
+        nearest = int(np.argmin(np.abs(x - o)))
+        depth = level - y[nearest]
+        if not depth > 0:
+            return np.nan
+        half_widths = []
+        for side in [-1,1]:
+            distance = (x - o)*side
+            outside = distance > 0
+            order = np.argsort(distance[outside])
+            recovered = level - y[outside][order] < self.flank_level*depth
+            if not recovered.any():
+                return np.nan
+            half_widths.append(distance[outside][order][int(np.argmax(recovered))])
+        return max(half_widths)
+
+    def converged(self,target_error):
+        """Function for checking if the pass can be ended. This is the case when the standard error of the estimate is below the target and samples have been taken on both sides of the estimated point of symmetry up to :attr:`online_symmetry_fit.flank_factor` times the half width of the dip, see :meth:`online_symmetry_fit.dip_width`.
+
+        :param target_error: The standard error below which the estimate is considered to have converged
+        :return: True if the pass can be ended
+        :rtype: Boolean
+        """
+        o, error = self.estimate()
+        if not np.isfinite(o) or not error < target_error:
+            return False
+        half_width = self.dip_width(o)
+        if not np.isfinite(half_width):
+            return False
+        d = (o - self.center)/self.half_width
+        flank = self.flank_factor*half_width/self.half_width
+        return self.v_min <= d - flank and self.v_max >= d + flank
+
+def response_profile(x,y,o,u):
+    """Function for calculating the normalised response of a pass around the location of the nozzle, which is learned as a template by :class:`template.template_cache`. The baseline is subtracted and the result divided by the depth of the dip, such that the profile is 0 away from the nozzle and -1 at the location of the nozzle.
+
+    :param x: List of x coordinates
+    :param y: List of y coordinates
+    :param o: The location of the nozzle
+    :param u: Array with the distances from the location of the nozzle at which the profile is calculated
+    :return: Array with the profile at u, nan where u is outside the samples
+    :rtype: numpy array
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    order = np.argsort(x)
+    level = baseline(y)
+    depth = level - np.interp(o,x[order],y[order])
+    if not depth > 0:
+        raise RuntimeError('the curve has no dip')
+    return (np.interp(o+np.asarray(u),x[order],y[order],left=np.nan,right=np.nan)-level)/depth
+
+max_template_residual = 0.15
+"""The largest root mean square residual of :func:`register_template` accepted, relative to the depth of the dip"""
+
+def register_template(x,y,u,profile,center,half_width,max_residual=max_template_residual,search_points=41):
+    """Function for finding the location of the nozzle in a few samples by registering them to a template of the response, see :func:`response_profile`. The template shifted by the location, scaled by the depth of the dip and added to a baseline is fitted in the least squares sense. For a given location the baseline and the depth follow from linear least squares, so only the location is searched on a grid, which is refined twice around the minimum like :meth:`online_symmetry_fit.estimate`.
+
+    :param x: List with the positions of the samples
+    :param y: List with the measured values
+    :param u: Array with the distances from the location of the nozzle at which the template is known
+    :param profile: Array with the template at u, nan where it is unknown
+    :param center: The expected location of the nozzle
+    :param half_width: The distance from the expected location that is searched
+    :param max_residual: The largest root mean square residual accepted, relative to the depth of the dip
+    :param search_points: The number of locations at which the residual is evaluated in each step of the search
+    :return: The location of the nozzle, a RuntimeError describing the problem is raised if the samples do not match the template
+    :rtype: float
+    """
+    x = np.asarray(x,dtype=float)
+    y = np.asarray(y,dtype=float)
+    known = np.isfinite(profile)
+    u = np.asarray(u)[known]
+    profile = np.asarray(profile)[known]
+    if len(x) < 4 or len(u) < 2:
+        raise RuntimeError('not enough samples to register the template')
+
+    def fit(locations):
+        #the template at the samples for every location, outside the known part it is continued with its last value
+        t = np.interp(x[np.newaxis,:]-locations[:,np.newaxis],u,profile)
+        t_mean = t.mean(axis=1,keepdims=True)
+        y_mean = y.mean()
+        variance = np.sum((t-t_mean)**2,axis=1)
+        depth = np.where(variance > 0,np.sum((t-t_mean)*(y-y_mean),axis=1)/np.where(variance > 0,variance,1),0)
+        residual = np.sum((y-y_mean-depth[:,np.newaxis]*(t-t_mean))**2,axis=1)
+        return residual, depth
+
+    low = center - half_width
+    high = center + half_width
+    for refinement in range(3):
+        grid = np.linspace(low,high,search_points)
+        residual, depth = fit(grid)
+        i = int(np.argmin(residual))
+        low = grid[max(i-1,0)]
+        high = grid[min(i+1,len(grid)-1)]
+    o = grid[i]
+    if not depth[i] > 0:
+        raise RuntimeError('the samples have no dip')
+    if abs(o-center) >= half_width*(1-2/search_points):
+        raise RuntimeError(f"location {o:.3f} is at the edge of the searched range around {center:.3f}")
+    error = np.sqrt(residual[i]/len(x))/depth[i]
+    if error > max_residual:
+        raise RuntimeError(f"the samples do not match the template, residual {error:.3f}")
+    return o
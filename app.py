@@ -4,22 +4,30 @@
 .. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
 """
 
-from PyQt5 import QtWidgets, uic, QtTest
+import time
+start_time = time.time()
+"""The time at which the application started, used for measuring the startup time"""
+
+from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtCore import Qt
-from pyqtgraph import GraphicsLayout
 import pyqtgraph as pg
 import sys  # We need sys so that we can pass argv to QApplication
 import yaml
 import io
-import serial.tools.list_ports
+import threading
+import multiprocessing
+import os
+from interface_ui import Ui_MainWindow
 from ldc1101evm import ldc1101evm
+from reader import serial_reader
 from diabase import diabase
-from scipy.optimize import curve_fit
-import scipy.io as sio
+import analysis
+import dsp
 import numpy as np
-import time
 
-class MainWindow(QtWidgets.QMainWindow):
+#SciPy, the serial port tools and the modules that are only needed once connected, calibrating, sweeping or publishing telemetry are imported where they are first used, since importing them slows down the startup of the application.
+
+class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
     connected = False
     """If a connection to the LDC1101EVM and diabase has already been made"""
 
@@ -30,10 +38,7 @@ class MainWindow(QtWidgets.QMainWindow):
     """A list of the tool numbers belonging to the tool offsets in :attr:`MainWindow.offset_list`"""
 
     offset_list = []
-    """A list with the last found tool offsets belonging to the tools in :attr:`MainWindow.offset_tool_list`"""
-
-    offset_direction = True
-    """If True the last run calibration was in the x direction, if False it was in the y direction"""
+    """A list with the last found tool offsets belonging to the tools in :attr:`MainWindow.offset_tool_list`. Each tool offset is a dict with a key 'x' and/or 'y', depending on the direction(s) calibrated."""
 
     stop_button_clicked = False
     """Becomes True if the stop button has been clicked, until the measurement is stopped, then it becomes False again"""
@@ -43,6 +48,39 @@ class MainWindow(QtWidgets.QMainWindow):
 
     calibration_running = False
 
+    capture_size = 256e6
+    """The size of the file to which the raw data of the LDC1101EVM is captured in bytes. Each read of the serial port takes at least one record of 64 bytes (see :data:`capture.capture_dtype`), so the 4 million records last about 1.5 hours with the fast conversion profile."""
+
+    reference_sensor = None
+    """The :class:`ldc1101evm.ldc1101evm` with the reference coil, or None if no reference LDC1101EVM is connected"""
+
+    telemetry_port = 5025
+    """The TCP port on which the telemetry is published when enabled, see :mod:`telemetry`"""
+
+    telemetry = None
+    """The :class:`telemetry.telemetry_server` publishing the progress of calibrations, or None if the telemetry has not been enabled yet"""
+
+    history = None
+    """The :class:`history.offset_history` in which the results of all calibrations are stored, or None until the first calibration"""
+
+    templates = None
+    """The :class:`template.template_cache` in which the templates of the response of the nozzles are stored, or None until they are first used"""
+
+    cooldown_height = 1
+    """The distance in mm the nozzle is moved up between passes"""
+
+    default_speed = 60
+    """The speed in mm/s of the moves between passes"""
+
+    settle_time = 0.27
+    """The time in seconds the LDC1101EVM is given to settle at the start of a pass"""
+
+    estimate_line = None
+    """The vertical line in the graph showing the location of the nozzle estimated during the current pass"""
+
+    ports_found = QtCore.pyqtSignal(list)
+    """Signal emitted by the thread enumerating the COM ports, with a list of (device, description, device type) tuples of the ports found. The device type is 'duet', 'ldc1101evm' or '' if the device has not been identified."""
+
     def __init__(self, *args, **kwargs):
         """Code run when the GUI is startup. Used to connect signals from the GUI to functions in this class.
 
@@ -51,14 +89,19 @@ class MainWindow(QtWidgets.QMainWindow):
         """
         super(MainWindow, self).__init__(*args, **kwargs)
 
-        #Load the UI Page
-        uic.loadUi('interface.ui', self)
-        QtWidgets.QApplication.processEvents()
+        #Load the UI Page, which is compiled from interface.ui using pyuic5
+        self.setupUi(self)
+        self.port_device = list()
+        self.port_descr = list()
 
         #connect signals from the GUI to functions in this class.
         self.sig_graph = self.sig_graph.getPlotItem()
         self.cal_x_button.clicked.connect(self.calibrate_x)
         self.cal_y_button.clicked.connect(self.calibrate_y)
+        self.cal_xy_button.clicked.connect(self.calibrate_xy)
+        self.sweep_button.clicked.connect(self.sweep)
+        self.resume_button.clicked.connect(self.resume_calibration)
+        self.dry_run_button.clicked.connect(self.dry_run)
         self.connect_button.clicked.connect(self.connect)
         self.reload_button.clicked.connect(self.reload)
         self.apply_offsets_button.clicked.connect(self.apply_offsets)
@@ -67,6 +110,25 @@ class MainWindow(QtWidgets.QMainWindow):
         self.test_sensor_button.clicked.connect(self.test_sensor)
         self.ascend_box.stateChanged.connect(self.ascend_changed)
         self.descend_box.stateChanged.connect(self.descend_changed)
+        self.ports_found.connect(self.update_ports)
+
+        #fill in the available conversion profiles of the LDC1101EVM
+        self.profile_combo.addItems(list(ldc1101evm.conversion_profiles))
+        self.profile_combo.setCurrentText(ldc1101evm.profile)
+        self.profile_combo.currentTextChanged.connect(self.profile_changed)
+
+        #fill in the available filters for the samples of the LDC1101EVM
+        self.filter_combo.addItems(dsp.filter_names)
+        self.filter_combo.currentTextChanged.connect(self.init_filter)
+        self.capture_box.stateChanged.connect(self.capture_changed)
+
+        #publish the progress of calibrations to other programs when enabled
+        self.telemetry_box.stateChanged.connect(self.telemetry_changed)
+
+        #periodically show the temperatures of the printer when connected
+        self.temperature_timer = QtCore.QTimer(self)
+        self.temperature_timer.timeout.connect(self.update_temperatures)
+        self.temperature_timer.start(2000)
         
         self.reload()
         
@@ -74,27 +136,91 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
     def reload(self):
-        """Scans all COM ports and checks the name of all COM ports. If a name with "USB Serial Device" or "Duet" is found this it is selected as the printer port. If a name with 'EVM' is found this port is selected to be the port with the LDC1101EVM.
+        """Starts scanning all COM ports in the background. The ports are put in the port selection boxes by :meth:`MainWindow.update_ports` as soon as they are listed, and again when the connected devices have been identified.
 
         :return: None
         :rtype: None
         """
-        ports = list(serial.tools.list_ports.comports())
+        self.output_to_terminal('scanning COM ports')
+        thread = threading.Thread(target=self.enumerate_ports, args=(), daemon=True)
+        thread.start()
+
+    def enumerate_ports(self):
+        """Function run in a seperate thread that lists all COM ports and emits :attr:`MainWindow.ports_found` with the result. Afterwards all ports are probed at the same time to find out which device is connected to them, after which :attr:`MainWindow.ports_found` is emitted again. Ports are not probed when already connected, since the ports in use can't be opened.
+
+        :return: None
+        :rtype: None
+        """
+        import serial.tools.list_ports
+        from concurrent.futures import ThreadPoolExecutor
+        ports = [(p.device, p.description, '') for p in serial.tools.list_ports.comports()]
+        self.ports_found.emit(ports)
+        if self.connected or len(ports) == 0:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(ports)) as executor:
+            identities = list(executor.map(self.probe_port, [device for device, _, _ in ports]))
+        identified_ports = list()
+        for (device, description, _), (device_type, identity) in zip(ports, identities):
+            if identity:
+                description = description + ' - ' + identity
+            identified_ports.append((device, description, device_type))
+        self.ports_found.emit(identified_ports)
+
+    def probe_port(self, device):
+        """Function for finding out which device is connected to a port. First a register of the LDC1101 is read, if that fails a M115 is sent to see if a Duet replies.
+
+        :param device: The full name of the port. Example: 'COM1'
+        :return: The device type ('ldc1101evm', 'duet' or '') and a description of the device
+        :rtype: tuple
+        """
+        identity = ldc1101evm.identify(device)
+        if identity:
+            return 'ldc1101evm', identity
+        identity = diabase.identify(device)
+        if identity:
+            return 'duet', identity
+        return '', ''
+
+    def update_ports(self, ports):
+        """Puts the found COM ports in the port selection boxes. Ports at which a Duet or LDC1101EVM has been identified are selected. If no device has been identified, the name of the COM ports is used instead: if a name with "USB Serial Device" or "Duet" is found this it is selected as the printer port, if a name with 'EVM' is found this port is selected to be the port with the LDC1101EVM.
+
+        :param ports: List with a (device, description, device type) tuple for each COM port
+        :return: None
+        :rtype: None
+        """
         self.port_device = list()
         self.port_descr = list()
-        for p in ports:
-            self.port_device.append(p.device)
-            self.port_descr.append(p.description)
+        port_type = list()
+        for device, description, device_type in ports:
+            self.port_device.append(device)
+            self.port_descr.append(description)
+            port_type.append(device_type)
         self.duet_combo.clear()
         self.ldc_combo.clear()
+        self.reference_combo.clear()
         self.duet_combo.addItems(self.port_descr)
         self.ldc_combo.addItems(self.port_descr)
+        self.reference_combo.addItems(['none'] + self.port_descr)
         for i1 in range(len(self.port_descr)):
             if self.port_descr[i1].startswith('USB Serial Device') or self.port_descr[i1].startswith('Duet'):
                 self.duet_combo.setCurrentIndex(i1)
             if self.port_descr[i1].startswith('EVM'):
                 self.ldc_combo.setCurrentIndex(i1)
 
+        #identified devices take precedence over the names of the ports
+        if 'duet' in port_type:
+            self.duet_combo.setCurrentIndex(port_type.index('duet'))
+        if 'ldc1101evm' in port_type:
+            self.ldc_combo.setCurrentIndex(port_type.index('ldc1101evm'))
+
+        if any(port_type):
+            for device, device_type in zip(self.port_device, port_type):
+                if device_type:
+                    self.output_to_terminal('identified ' + device_type + ' at ' + device)
+        else:
+            self.output_to_terminal('found ' + str(len(self.port_device)) + ' COM ports')
+
     
     def stop(self):
         """Function for handling the stop button being pressed. This will set a variable that will stop the running processes when possible.
@@ -103,6 +229,7 @@ class MainWindow(QtWidgets.QMainWindow):
         :rtype: None
         """
         self.stop_button_clicked = True
+        self.publish('PHASE','stopped')
 
     def clear_figure(self):
         """Function for handling the clear figure button being pressed. This will clear the graph in the GUI and reinitialise it.
@@ -123,14 +250,41 @@ class MainWindow(QtWidgets.QMainWindow):
         :return: True if succesfull, False if unsuccesfull
         :rtype: Boolean
         """
+        if self.ldc_combo.currentIndex() < 0 or self.duet_combo.currentIndex() < 0:
+            self.output_to_terminal("no COM ports selected. Please wait for the scan to finish or press reload\r\n")
+            return False
+
+        #all LDC1101EVMs are read by a single thread, which timestamps their samples with the same clock. This thread runs in a separate process if selected, see acquisition.py.
         port_evm = self.port_device[self.ldc_combo.currentIndex()]
+        if self.acquisition_box.isChecked():
+            from acquisition import acquisition_process, process_ldc1101evm
+            self.reader = acquisition_process()
+            sensor_class = process_ldc1101evm
+        else:
+            self.reader = serial_reader()
+            sensor_class = ldc1101evm
         try:
-            self.Ldc1101evm = ldc1101evm(port_evm)
+            self.Ldc1101evm = sensor_class(port_evm,self.reader)
         except:
             self.output_to_terminal("could not open port of the ldc1101evm. Please make sure there are no open connections\r\n")
             print('could not open port of the ldc1101evm.')
+            self.reader.close()
             return False
         self.output_to_terminal("connection to ldc1101evm successfull")
+
+        #the first item of the reference port selection box means no reference is used
+        self.reference_sensor = None
+        if self.reference_combo.currentIndex() > 0:
+            port_reference = self.port_device[self.reference_combo.currentIndex()-1]
+            try:
+                if port_reference == port_evm:
+                    raise ValueError('the reference can not be the same LDC1101EVM')
+                self.reference_sensor = sensor_class(port_reference,self.reader)
+            except:
+                self.output_to_terminal("could not open port of the reference ldc1101evm. Please select another port or none\r\n")
+                self.close_sensors()
+                return False
+            self.output_to_terminal("connection to reference ldc1101evm successfull")
             
         port_duet = self.port_device[self.duet_combo.currentIndex()]
         try:
@@ -138,14 +292,221 @@ class MainWindow(QtWidgets.QMainWindow):
         except:
             self.output_to_terminal("could not open port of the duet. Please make sure there are no open connections\r\n")
             print('could not open port of the duet.')
+            self.close_sensors()
             return False
         self.output_to_terminal("connection to duet successfull")
+        from heating import heat_up_manager
+        self.heating = heat_up_manager(self.Diabase)
         
-        self.Ldc1101evm.LHR_init()
+        try:
+            self.init_sensor()
+        except RuntimeError as e:
+            self.output_to_terminal('error: could not initialise the ldc1101evm: ' + str(e))
+            print('could not initialise the ldc1101evm.')
+            self.close_sensors()
+            self.Diabase.close()
+            return False
         self.connected = True
+        self.capture_changed()
 
         return True
+
+    def init_sensor(self):
+        """Function for initialising the conversion of the LDC1101EVM. If auto tune is checked the fastest conversion profile that reaches the target noise is selected, otherwise the profile selected in the GUI is used.
+        
+        :return: None
+        :rtype: None
+        """
+        if self.auto_tune_box.isChecked():
+            self.output_to_terminal('auto tuning the conversion profile, make sure no nozzle is above the coil')
+            profile = self.Ldc1101evm.auto_tune(self.noise_box.value()*1e-9)
+            self.profile_combo.blockSignals(True)
+            self.profile_combo.setCurrentText(profile)
+            self.profile_combo.blockSignals(False)
+        else:
+            self.Ldc1101evm.LHR_init(self.profile_combo.currentText())
+        self.output_to_terminal('conversion profile ' + self.Ldc1101evm.profile + ': ' + f"{self.Ldc1101evm.get_frame_rate():.1f}" + ' Hz')
+
+        #the reference uses the same profile, such that both are measured with the same averaging
+        if self.reference_sensor is not None:
+            self.reference_sensor.LHR_init(self.Ldc1101evm.profile)
+
+        #the filter is only set after auto tuning, such that the noise of the unfiltered samples is used for selecting the profile
+        self.Ldc1101evm.filter = dsp.create_filter(self.filter_combo.currentText(),self.Ldc1101evm.get_frame_rate())
+        if self.reference_sensor is not None:
+            self.reference_sensor.filter = dsp.create_filter(self.filter_combo.currentText(),self.reference_sensor.get_frame_rate())
+
+    def close_sensors(self):
+        """Function for closing the connections with the LDC1101EVM and the reference LDC1101EVM and stopping the thread reading them
+
+        :return: None
+        :rtype: None
+        """
+        self.Ldc1101evm.close()
+        if self.reference_sensor is not None:
+            self.reference_sensor.close()
+            self.reference_sensor = None
+        self.reader.close()
+
+    def sensor_error(self):
+        """Function for checking if the communication with the LDC1101EVM or the reference LDC1101EVM failed
+
+        :return: True if one of them reported an error
+        :rtype: Boolean
+        """
+        return self.Ldc1101evm.error or (self.reference_sensor is not None and self.reference_sensor.error)
+
+    def read_sensors(self,duration):
+        """Function for measuring the inductance averaged over a time, starting now. If a reference LDC1101EVM is connected it is averaged over the same time window. If an LDC1101EVM stops sending samples its error flag is set and nan is returned for it.
+
+        :param duration: The time to average over in seconds
+        :return: The inductance measured by the LDC1101EVM and the inductance measured by the reference, which is nan without a reference
+        :rtype: tuple
+        """
+        if self.reference_sensor is None:
+            self.Ldc1101evm.flush()
+            return self.Ldc1101evm.get_LHR_data(self.Ldc1101evm.get_down_sample_ratio(duration)), np.nan
+        start = time.time()
+        values = []
+        for sensor in [self.Ldc1101evm,self.reference_sensor]:
+            sensor.flush()
+        for sensor in [self.Ldc1101evm,self.reference_sensor]:
+            try:
+                values.append(sensor.get_window(start,start+duration))
+            except RuntimeError:
+                sensor.error = True
+                values.append(np.nan)
+        return tuple(values)
+
+    def init_filter(self):
+        """Function for setting the filter selected in the GUI as the filter through which the samples of the LDC1101EVM are passed. The filter depends on the frame rate, so this is also done when the conversion profile changes.
+        
+        :return: None
+        :rtype: None
+        """
+        if not self.connected:
+            return
+        self.Ldc1101evm.filter = dsp.create_filter(self.filter_combo.currentText(),self.Ldc1101evm.get_frame_rate())
+        if self.reference_sensor is not None:
+            self.reference_sensor.filter = dsp.create_filter(self.filter_combo.currentText(),self.reference_sensor.get_frame_rate())
+
+    def profile_changed(self):
+        """Function for handling a different conversion profile being selected. If connected, the LDC1101EVM is reinitialised with the new profile.
+        
+        :return: None
+        :rtype: None
+        """
+        if not self.connected:
+            return
+        if self.calibration_running:
+            self.output_to_terminal('Wait for the calibration to finish before changing the conversion profile')
+            return
+        try:
+            self.Ldc1101evm.LHR_init(self.profile_combo.currentText())
+            if self.reference_sensor is not None:
+                self.reference_sensor.LHR_init(self.profile_combo.currentText())
+        except RuntimeError as e:
+            self.output_to_terminal('error: could not initialise the ldc1101evm: ' + str(e))
+            return
+        self.output_to_terminal('conversion profile ' + self.Ldc1101evm.profile + ': ' + f"{self.Ldc1101evm.get_frame_rate():.1f}" + ' Hz')
+        self.init_filter()
     
+    def capture_changed(self):
+        """Function for handling the capture raw data box being (un)checked. If connected, all bytes received from the LDC1101EVM are captured to a new file in the folder of the data file, named after the current time, until the box is unchecked or the connection is closed. See :mod:`capture` for replaying the capture.
+        
+        :return: None
+        :rtype: None
+        """
+        if not self.connected:
+            return
+        if self.capture_box.isChecked():
+            filename = os.path.join(os.path.dirname(self.filename_line.text()),time.strftime('capture_%Y%m%d_%H%M%S.cap'))
+            self.Ldc1101evm.start_capture(filename,self.capture_size)
+            self.output_to_terminal('capturing raw data to ' + filename)
+        else:
+            self.Ldc1101evm.stop_capture()
+
+    def telemetry_changed(self):
+        """Function for handling the telemetry box being (un)checked. This starts or stops publishing the samples, progress, offsets and health counters of calibrations on :attr:`MainWindow.telemetry_port`.
+
+        :return: None
+        :rtype: None
+        """
+        if self.telemetry_box.isChecked():
+            if self.telemetry is None:
+                import telemetry
+                self.telemetry = telemetry.telemetry_server(self.telemetry_port)
+            try:
+                self.telemetry.start()
+            except OSError as e:
+                self.output_to_terminal('error: could not start the telemetry on port ' + str(self.telemetry_port) + ': ' + str(e))
+                self.telemetry_box.setChecked(False)
+                return
+            self.output_to_terminal('publishing telemetry on port ' + str(self.telemetry_port))
+        elif self.telemetry is not None:
+            self.telemetry.stop()
+
+    def publish(self,kind,*values):
+        """Function for publishing a message over the telemetry, see :meth:`telemetry.telemetry_server.publish`. If the telemetry has never been enabled this returns immediately.
+
+        :param kind: The name of the message type, for example 'PHASE' for :data:`telemetry.PHASE`
+        :param values: The values of the payload
+        :return: None
+        :rtype: None
+        """
+        if self.telemetry is None:
+            return
+        import telemetry
+        self.telemetry.publish(getattr(telemetry,kind),*values)
+
+    def publish_health(self,samples,failed_passes):
+        """Function for publishing the health counters over the telemetry, see :data:`telemetry.HEALTH`
+
+        :param samples: The number of samples taken so far
+        :param failed_passes: The number of passes that could not be fitted so far
+        :return: None
+        :rtype: None
+        """
+        if self.telemetry is None:
+            return
+        sample_filter = self.Ldc1101evm.filter if self.connected else None
+        rejected = sample_filter.rejected if sample_filter is not None else 0
+        error = self.Ldc1101evm.error if self.connected else False
+        self.publish('HEALTH',samples,failed_passes,rejected,self.telemetry.dropped,error)
+
+    def update_temperatures(self):
+        """Function for showing the temperatures of the printer, called periodically by a timer. During a calibration the temperatures are polled by the calibration itself, so then nothing is done.
+        
+        :return: None
+        :rtype: None
+        """
+        if not self.connected or self.calibration_running:
+            return
+        self.heating.poll()
+        self.temperature_label.setText(self.heating.summary())
+
+    def wait_for_heating(self,tool=None):
+        """Function for waiting until a tool or the bed has reached its temperature while keeping the GUI responsive and showing the temperatures.
+        
+        :param tool: The tool number, or None to wait for the bed
+        :return: True if at temperature, False if the stop button was clicked or the heater did not reach its temperature in time
+        :rtype: Boolean
+        """
+        def idle():
+            self.temperature_label.setText(self.heating.summary())
+            QtWidgets.QApplication.processEvents()
+            return not self.stop_button_clicked
+        try:
+            if tool is None:
+                heated = self.heating.wait_for_bed(idle)
+            else:
+                heated = self.heating.wait_for_tool(tool,idle)
+        except RuntimeError as e:
+            self.output_to_terminal('error: ' + str(e))
+            return False
+        self.temperature_label.setText(self.heating.summary())
+        return heated
+
     def output_to_terminal(self,new_text):
         """Function for writing output to the terminal text box.
         
@@ -189,6 +550,14 @@ class MainWindow(QtWidgets.QMainWindow):
         :rtype: None
         """
         self.save_settings()
+        if self.history is not None:
+            self.history.close()
+        if self.templates is not None:
+            self.templates.close()
+        if self.telemetry is not None:
+            self.telemetry.stop()
+        if self.connected:
+            self.Ldc1101evm.stop_capture()
 
     def calibrate_y(self):
         """Function for handling the calibrate y button being pressed. This will run the calibration procedure and find the y offsets.
@@ -196,8 +565,7 @@ class MainWindow(QtWidgets.QMainWindow):
         :return: None
         :rtype: None
         """
-        cal_x = False
-        self.calibrate(cal_x)
+        self.calibrate('y')
 
     def calibrate_x(self):
         """Function for handling the calibrate x button being pressed. This will run the calibration procedure and find the x offsets.
@@ -205,8 +573,79 @@ class MainWindow(QtWidgets.QMainWindow):
         :return: None
         :rtype: None
         """
-        cal_x = True
-        self.calibrate(cal_x)
+        self.calibrate('x')
+
+    def calibrate_xy(self):
+        """Function for handling the calibrate xy button being pressed. This will run the calibration procedure and find the x and y offsets in a single run.
+        
+        :return: None
+        :rtype: None
+        """
+        self.calibrate('xy')
+
+    def sweep(self):
+        """Function for handling the sweep settings button being pressed. This will calibrate the reference tool in x and y with every combination of the speeds, scanning ranges and heights given, and apply the settings with which the standard error of the offsets reaches the target error in the shortest time. Each run is analysed in a separate process while the next one is measured, see :mod:`sweep`. The tool offsets found by the last calibration are kept, so they can still be applied after the sweep.
+
+        :return: False if unsucceful, True if succefull
+        :rtype: Boolean
+        """
+        if self.calibration_running == True:
+            self.output_to_terminal('Wait for the calibration to finish before starting a sweep')
+            return False
+
+        import sweep
+        #empty fields mean the current setting is used
+        try:
+            speeds = sweep.parse_values(self.sweep_speeds_line.text()) if self.sweep_speeds_line.text().strip() else [self.speed_box.value()]
+            ranges = sweep.parse_values(self.sweep_ranges_line.text()) if self.sweep_ranges_line.text().strip() else [self.range_box.value()]
+            heights = sweep.parse_values(self.sweep_heights_line.text()) if self.sweep_heights_line.text().strip() else [self.z_box.value()]
+        except ValueError:
+            self.output_to_terminal('error: enter the speeds, ranges and heights to sweep as numbers separated by commas')
+            return False
+        grid = sweep.sweep_grid(speeds,ranges,heights)
+        ref_tool = int(self.ref_combo.currentText())
+        target_error = self.target_error_box.value()
+        self.output_to_terminal('sweeping ' + str(len(grid)) + ' combinations of settings with tool ' + str(ref_tool))
+
+        #every calibration replaces the offsets found last, so keep the ones that have not been applied yet
+        offset_tool_list = self.offset_tool_list
+        offset_list = self.offset_list
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            with ProcessPoolExecutor() as executor:
+                futures = []
+                for setting in grid:
+                    filename = sweep.sweep_filename(self.filename_line.text(),setting)
+                    self.output_to_terminal('sweep: speed ' + str(setting['speed']) + ' mm/s, range ' + str(setting['scan_range']) + ' mm, z ' + str(setting['z_pos']) + ' mm')
+                    run_settings = dict(setting,rounds=self.sweep_rounds_box.value(),filename=filename,converge=False,early_stop=False,templates=False)
+                    if not self.calibrate('xy',settings=run_settings,tools=[ref_tool]):
+                        self.output_to_terminal('sweep stopped')
+                        for future in futures:
+                            future.cancel()
+                        return False
+                    futures.append(executor.submit(sweep.analyse_setting,filename))
+                results = [future.result() for future in futures]
+        finally:
+            self.offset_tool_list = offset_tool_list
+            self.offset_list = offset_list
+
+        for result in results:
+            self.output_to_terminal(sweep.describe(result,target_error))
+        best = sweep.recommend(results,target_error,self.rounds_x_spinner.maximum())
+        if best is None:
+            self.output_to_terminal('error: none of the settings reach a standard error of ' + str(target_error) + ' mm')
+            return False
+
+        #apply the recommended settings and store them in settings.yaml
+        result, rounds, duration = best
+        self.speed_box.setValue(result['speed'])
+        self.range_box.setValue(result['scan_range'])
+        self.z_box.setValue(result['z_pos'])
+        self.rounds_x_spinner.setValue(rounds)
+        self.rounds_y_spinner.setValue(rounds)
+        self.save_settings()
+        self.output_to_terminal('applied the fastest settings: speed ' + str(result['speed']) + ' mm/s, range ' + str(result['scan_range']) + ' mm, z ' + str(result['z_pos']) + ' mm and ' + str(rounds) + ' rounds, ' + f"{duration:.0f}" + ' s per tool')
+        return True
 
     def ascend_changed(self):
         """Function for handling the ascend checkbox being pressed. This will update the ascend setting and deselect the descend checkbox.
@@ -252,6 +691,7 @@ class MainWindow(QtWidgets.QMainWindow):
         tic = time.time()
         self.sig_graph.clear()
         self.curve = self.sig_graph.plot()
+        self.publish('PHASE','testing sensor')
         
         while(1):
             if self.Ldc1101evm.error:
@@ -262,26 +702,76 @@ class MainWindow(QtWidgets.QMainWindow):
                 time_buf = time_buf[1:i1]
                 L = L[1:i1]
                 filename = self.filename_line.text()
+                import scipy.io as sio
                 sio.savemat(filename,{'time_buf':time_buf, 'L':L})
                 return 0
 
-            L[i1] = self.Ldc1101evm.get_LHR_data(100)
+            L[i1] = self.Ldc1101evm.get_LHR_data(self.Ldc1101evm.get_down_sample_ratio(0.55))
             time_buf[i1] = time.time()-tic
-            if i1 > 1001:
-                self.curve.setData(time_buf[i1-1000:i1],L[i1-1000:i1])
-            elif i1 > 0:
-                self.curve.setData(time_buf[1:i1],L[1:i1])
+            self.publish('SAMPLE',0,255,0,L[i1])
+            if i1%10 == 0:
+                self.publish_health(i1,0)
+            if self.graph_box.isChecked():
+                if i1 > 1001:
+                    self.curve.setData(time_buf[i1-1000:i1],L[i1-1000:i1])
+                elif i1 > 0:
+                    self.curve.setData(time_buf[1:i1],L[1:i1])
 
             QtWidgets.QApplication.processEvents()
             i1 = i1 + 1
 
-    def calibrate(self,cal_x):
-        """Function for performing a calibration in x or y. This will just record the LDC1101EVM sensor values until the stop button is clicked and store the result in the file specified in the filename textbox.
+    def compile_calibration(self,axes,run_settings,tool_list):
+        """Function for compiling a calibration into a plan of G-code and sync points, see :mod:`plan`. Whether the printer is homed every round and the layer fan is switched on are taken from the GUI.
+
+        :param axes: The axes to calibrate: 'x', 'y' or 'xy'.
+        :param run_settings: Dict with the settings of the calibration, see :meth:`MainWindow.calibrate`
+        :param tool_list: List with the tool numbers, the first one being the reference tool
+        :return: List with the steps of the plan
+        :rtype: list
+        """
+        import plan
+        scan_range = run_settings['scan_range']
+        passes = [(axis,dir) for axis in axes for dir in range(2)]
+        center = {'x':run_settings['x_pos'], 'y':run_settings['y_pos']}
+        start = {axis:center[axis] - scan_range for axis in center}
+        stop = {axis:center[axis] + scan_range for axis in center}
+        return plan.compile_plan(tool_list,run_settings['rounds'],passes,center,start,stop,run_settings['z_pos'],self.cooldown_height,self.default_speed,self.homing_box.isChecked(),self.fan_box.isChecked())
+
+    def dry_run(self):
+        """Function for handling the dry run button being pressed. This compiles a calibration in x and y with the current settings without connecting to the printer, stores the plan next to the data file and estimates the duration with a simulated printer.
+
+        :return: False if unsucceful, True if succefull
+        :rtype: Boolean
+        """
+        import plan
+        if not self.update_tool_list():
+            return False
+        run_settings = {'x_pos':self.x_box.value(), 'y_pos':self.y_box.value(), 'z_pos':self.z_box.value(), 'scan_range':self.range_box.value(), 'rounds':max(self.rounds_x_spinner.value(),self.rounds_y_spinner.value())}
+        calibration_plan = self.compile_calibration('xy',run_settings,self.tool_list)
+
+        filename = self.filename_line.text()
+        if filename.endswith('.mat'):
+            filename = filename[:-4]
+        filename = filename + '_plan.gcode'
+        with open(filename,'w') as stream:
+            stream.write(plan.describe_plan(calibration_plan))
+
+        estimate = plan.simulate(calibration_plan,run_settings['scan_range'],self.speed_box.value(),self.settle_time,self.cooldown_box.value())
+        self.output_to_terminal('dry run: ' + str(estimate['lines']) + ' lines of G-code in ' + str(estimate['writes']) + ' writes stored in ' + filename + ', estimated duration without heating: ' + f"{estimate['total']/60:.1f}" + ' min, of which ' + f"{estimate['scan']/60:.1f}" + ' min scanning and ' + f"{estimate['cooldown']/60:.1f}" + ' min cooling down')
+        return True
+
+    def calibrate(self,axes,resume=None,settings=None,tools=None):
+        """Function for performing a calibration in x, y or both. This will just record the LDC1101EVM sensor values until the stop button is clicked and store the result in the file specified in the filename textbox. After each pass the progress is stored in a checkpoint file, such that an interrupted calibration can be resumed. When calibrating both x and y, each tool is scanned in both directions while it is selected, such that heating, homing and tool changes only need to be done once.
         
-        :param cal_x: If True, calibrate in the x direction. If False, calibate in the y direction.
+        :param axes: The axes to calibrate: 'x', 'y' or 'xy'.
+        :param resume: Checkpoint loaded with :meth:`MainWindow.load_checkpoint`. If given, the calibration is continued with the settings of the checkpoint and only the passes that are missing are measured.
+        :param settings: Dict with run settings that replace the ones from the GUI, used by :meth:`MainWindow.sweep`
+        :param tools: List with the tool numbers to calibrate instead of the selected tools, the first one being the reference tool
         :return: False if unsucceful, True if succefull
         :rtype: Boolean
         """
+        import plan
+        import template
         self.calibration_running = True
 
         if self.connected == False:
@@ -289,291 +779,654 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.output_to_terminal('started calibration')
 
-        #get settings for the calibration process from the textboxes.
-        x_pos = self.x_box.value()
-        y_pos = self.y_box.value()
-        z_pos = self.z_box.value()
-        scan_range = self.range_box.value()
-        speed = self.speed_box.value()
-        filename = self.filename_line.text()
-
-        if cal_x:
-            rounds = self.rounds_x_spinner.value()
+        if resume is None:
+            #get settings for the calibration process from the textboxes.
+            run_settings = {}
+            run_settings['x_pos'] = self.x_box.value()
+            run_settings['y_pos'] = self.y_box.value()
+            run_settings['z_pos'] = self.z_box.value()
+            run_settings['scan_range'] = self.range_box.value()
+            run_settings['speed'] = self.speed_box.value()
+            run_settings['filename'] = self.filename_line.text()
+            if axes == 'x':
+                run_settings['rounds'] = self.rounds_x_spinner.value()
+            elif axes == 'y':
+                run_settings['rounds'] = self.rounds_y_spinner.value()
+            else:
+                run_settings['rounds'] = max(self.rounds_x_spinner.value(),self.rounds_y_spinner.value())
+
+            #time to let the coil cool down after each pass and whether the remaining thermal drift should be compensated
+            run_settings['cooldown_time'] = self.cooldown_box.value()
+            run_settings['drift_compensation'] = self.drift_box.isChecked()
+
+            #whether a pass is ended as soon as the location of the nozzle, estimated while the samples arrive, is accurate enough
+            run_settings['early_stop'] = self.early_stop_box.isChecked()
+            run_settings['early_stop_error'] = self.early_stop_error_box.value()
+
+            #whether the nozzle is located by registering a few samples to the learned response of the nozzle once it has been measured in an earlier round. The templates are only used with the same settings of the LDC1101EVM.
+            run_settings['templates'] = self.template_box.isChecked()
+            run_settings['conversion_profile'] = self.profile_combo.currentText()
+            run_settings['sample_filter'] = self.filter_combo.currentText()
+
+            #with a reference LDC1101EVM the drift the coils have in common is divided out
+            run_settings['differential'] = self.reference_sensor is not None
+
+            #in convergence mode the number of rounds is the maximum number of rounds and tools stop being measured once the standard error of their offset is below the target
+            run_settings['converge'] = self.converge_box.isChecked()
+            run_settings['target_error'] = self.target_error_box.value()
+
+            #the calibration results are stored in the history under the name of the printer and the nozzle temperature
+            run_settings['printer'] = self.printer_line.text()
+            run_settings['temperature'] = self.temp_box.value()
+            run_settings['bed_temperature'] = self.bed_temp_box.value()
+            if settings is not None:
+                run_settings.update(settings)
         else:
-            rounds=  self.rounds_y_spinner.value()
+            #continue with the settings of the interrupted calibration
+            run_settings = resume['run_settings']
+
+        x_pos = run_settings['x_pos']
+        y_pos = run_settings['y_pos']
+        z_pos = run_settings['z_pos']
+        scan_range = run_settings['scan_range']
+        speed = run_settings['speed']
+        filename = run_settings['filename']
+        rounds = run_settings['rounds']
+        cooldown_time = run_settings['cooldown_time']
+        drift_compensation = run_settings['drift_compensation']
+        early_stop = run_settings.get('early_stop',False)
+        early_stop_error = run_settings.get('early_stop_error',self.early_stop_error_box.value())
+        use_templates = run_settings.get('templates',False)
+        differential = run_settings.get('differential',False)
+        if differential and self.reference_sensor is None:
+            self.output_to_terminal('error: this calibration was made with a reference LDC1101EVM, select its port and reconnect to continue')
+            self.calibration_running = False
+            return False
+        converge = run_settings['converge']
+        target_error = run_settings['target_error']
+        printer = run_settings['printer']
+        temperature = run_settings['temperature']
+        bed_temperature = run_settings['bed_temperature']
+
+        #open the database in which the results of all calibrations are stored and, if used, the one with the templates of the response of the nozzles
+        if self.history is None:
+            from history import offset_history
+            self.history = offset_history()
+        if use_templates and self.templates is None:
+            self.templates = template.template_cache()
+
+        #the passes made with each tool in each round: forwards (0) and backwards (1) along every axis that is calibrated
+        passes = [(axis,dir) for axis in axes for dir in range(2)]
 
         #calculate the start and stop position of the calibration movement.
-        if cal_x:
-            x_start = x_pos - scan_range
-            x_stop = x_pos + scan_range
-        else:
-            y_start = y_pos - scan_range
-            y_stop = y_pos + scan_range
+        center = {'x':x_pos, 'y':y_pos}
+        start = {'x':x_pos - scan_range, 'y':y_pos - scan_range}
+        stop = {'x':x_pos + scan_range, 'y':y_pos + scan_range}
 
         #fixed parameters of the calibration process.
-        cooldown_time = 3.0
-        cooldown_height = 1
         plotting_interval = 5
         buffer_size = 1e4
-        default_speed = 60
         speed_factor = 1.5
+        min_rounds = 3
+        sample_time = 0.055
+        settle_time = self.settle_time
+        stable_count = 3
+        max_attempts = 3
+        retry_fraction = 0.1
+        template_samples = 15
+        template_passes = 3
 
         buffer_size = int(buffer_size)
 
-        #Try to update the tool list.
-        if not self.update_tool_list():
-            self.calibration_running = False
-            return False
-
-        #attempt to set the layer fan speed
-        try:
-            if self.fan_box.isChecked():
-                self.Diabase.write_line('M106 P3 S255',100)
-            else:
-                self.Diabase.write_line('M106 P3 S0',100)
-        except:
-            self.output_to_terminal('error: could not find a Duet')
+        #Try to update the tool list. When resuming, use the tools of the interrupted calibration.
+        if resume is not None:
+            self.tool_list = resume['tool_list']
+        elif tools is not None:
+            self.tool_list = list(tools)
+        elif not self.update_tool_list():
             self.calibration_running = False
             return False
 
-
-        #heat up the tools
-        if self.temp_box.value() > 20:
-            for i1 in range(len(self.tool_list)):
-                self.Diabase.write_line('G10 P%.0f R%.0f  S%.0f' % (self.tool_list[i1],self.temp_box.value(),self.temp_box.value()),10000)
-        
-        #heat up the bed
-        self.Diabase.write_line('M140 S%.0f' % (self.bed_temp_box.value()),100)
-
-        time.sleep(1)
-        
-        #wait the bed to heat up.
-        print("doing the M116")
-        self.Diabase.write_line('M116',50000)
-
-        print("received the M116")
-        #select coordinate system 1 (because the coordinate system might have been changed during the z calibration)
-        self.Diabase.write_line('G54',100)
+        #tools of which the offset needed no correction in the last calibrations are only measured for a reduced number of rounds. The reference tool is always measured since the other offsets are relative to it.
+        if resume is None:
+            run_settings['tool_rounds'] = [rounds]*len(self.tool_list)
+            if self.stable_box.isChecked():
+                for tool in range(1,len(self.tool_list)):
+                    if all(self.history.is_stable(printer,self.tool_list[tool],axis,temperature,stable_count,self.stable_tolerance_box.value()) for axis in axes):
+                        run_settings['tool_rounds'][tool] = min(self.stable_rounds_box.value(),rounds)
+                        self.output_to_terminal('offset of tool ' + str(self.tool_list[tool]) + ' needed no correction in the last ' + str(stable_count) + ' calibrations, measuring ' + str(run_settings['tool_rounds'][tool]) + ' rounds')
+        tool_rounds = run_settings['tool_rounds']
+
+        #compile the whole calibration into a plan of G-code and sync points, see plan.py
+        calibration_plan = self.compile_calibration(axes,run_settings,self.tool_list)
+        estimate = plan.simulate(calibration_plan,scan_range,speed,settle_time,cooldown_time)
+        self.output_to_terminal('estimated duration without heating: ' + f"{estimate['total']/60:.1f}" + ' min')
 
         #reinitialise the graph
         self.curve = list()
-        for i1 in range(len(self.tool_list)*2):
+        for i1 in range(len(self.tool_list)*len(passes)):
             self.curve.append(self.sig_graph.plot())
-        
-        #initialise data storage buffers to store data from the calibration process into
-        loc = np.zeros([len(self.tool_list),rounds,2])
-        data = np.zeros([buffer_size,len(self.tool_list),rounds,2])
-        pos = np.zeros([buffer_size,len(self.tool_list),rounds,2])
-        timestamps = np.zeros([buffer_size,len(self.tool_list),rounds,2])
-
-        tic = time.time()
-        for cycle in range(rounds):
-            #home the printer and measure the z height. If the homing box is checked the printer is homed every round, otherwise it is calibration only during the first round.
-            if self.homing_box.isChecked() or cycle ==0:     
-                self.Diabase.write_line('G28',5000)
-                self.Diabase.write_line('G90',5000)
-                self.Diabase.write_line('G1 X0 Y0 Z8 F8000',5000)
-                self.Diabase.write_line('G30',1000)
-
-            #wait for homing to finish
-            self.Diabase.write_line('M400;after homing',1000)
-
-            #attempt to make the GUI more responsive
-            QtWidgets.QApplication.processEvents()
-
-            #stop the calibration if the stop button was clicked.
-            if self.stop_button_clicked:
-                self.stop_button_clicked = False
-                self.calibration_running = False
-                return 0
-            
-            #select the first tool
-            self.Diabase.write_line('T'+str(self.tool_list[0]),500)
-            print("selected tool "+ str(self.tool_list[0]))
-            self.Diabase.write_line('M400;after initial tool select',3000)
-
-            #attempt to make the GUI more responsive
-            QtWidgets.QApplication.processEvents()
+        self.sig_graph.removeItem(self.estimate_line)
+        self.estimate_line = self.sig_graph.addLine(x=center[axes[0]],pen=pg.mkPen('r',style=Qt.DashLine))
+
+        #initialise data storage buffers to store data from the calibration process into, or continue with the data of the interrupted calibration
+        if resume is None:
+            loc = np.zeros([len(self.tool_list),rounds,len(passes)])
+            loc_raw = np.zeros([len(self.tool_list),rounds,len(passes)])
+            data = np.zeros([buffer_size,len(self.tool_list),rounds,len(passes)])
+            pos = np.zeros([buffer_size,len(self.tool_list),rounds,len(passes)])
+            timestamps = np.zeros([buffer_size,len(self.tool_list),rounds,len(passes)])
+            reference = np.full([buffer_size,len(self.tool_list),rounds,len(passes)],np.nan)
+            measured = np.zeros([len(self.tool_list),rounds,len(passes)],dtype=bool)
+            templated = np.zeros([len(self.tool_list),rounds,len(passes)],dtype=bool)
+            samples = np.zeros([len(self.tool_list),rounds,len(passes)],dtype=int)
+            tic = time.time()
+        else:
+            #the checkpoint only contains the samples that were filled, so the buffers are extended to their full size again
+            loc = resume['loc']
+            loc_raw = resume['loc_raw']
+            data = np.zeros([buffer_size,len(self.tool_list),rounds,len(passes)])
+            pos = np.zeros([buffer_size,len(self.tool_list),rounds,len(passes)])
+            timestamps = np.zeros([buffer_size,len(self.tool_list),rounds,len(passes)])
+            reference = np.full([buffer_size,len(self.tool_list),rounds,len(passes)],np.nan)
+            for buffer, key in [(data,'data'),(pos,'pos'),(timestamps,'time'),(reference,'reference')]:
+                buffer[:len(resume[key])] = resume[key]
+            samples = resume['samples']
+            measured = resume['measured']
+            templated = resume['templated']
+            tic = time.time() - resume['elapsed']
+            self.output_to_terminal('resuming calibration, ' + str(measured.sum()) + ' of ' + str(measured.size) + ' passes were already measured')
+        converged = np.zeros(len(self.tool_list),dtype=bool)
+        failed_passes = 0
+        total_samples = 0
+
+        #passes that fail or are outliers are measured again right after cooling down, up to a number of attempts per pass and a budget of retries for the whole calibration
+        attempts = np.zeros([len(self.tool_list),rounds,len(passes)],dtype=int)
+        retry_budget = max(int(retry_fraction*(~measured).sum()),2*len(passes))
+        retries = 0
+        retry_pending = False
+
+        #everything needed to resume the calibration, the arrays are updated in place during the calibration
+        checkpoint = {'axes':axes, 'run_settings':run_settings, 'tool_list':self.tool_list, 'loc':loc, 'loc_raw':loc_raw, 'measured':measured, 'templated':templated, 'samples':samples, 'pos':pos, 'time':timestamps, 'data':data, 'reference':reference}
+
+        #the offsets of the tools are measured relative to the reference tool, so only if there are no other tools the reference tool itself needs to converge
+        if len(self.tool_list) > 1:
+            converge_tools = range(1,len(self.tool_list))
+        else:
+            converge_tools = range(1)
+
+        #the functions below are called at the sync points of the plan. They return None to continue, the level of the plan to skip to or False to stop the calibration.
+        def heat(item):
+            #start heating up the tools and the bed. Instead of waiting for all heaters at once, the bed is waited for before probing and each tool before it is used.
+            self.publish('PHASE','heating')
+            try:
+                self.heating.start(self.tool_list,temperature,bed_temperature)
+            except RuntimeError as e:
+                self.output_to_terminal('error: could not set the temperatures: ' + str(e))
+                return False
+
+        def start_round(item):
+            cycle = item.cycle
+            #stable tools are treated as converged once they have been measured for their reduced number of rounds
+            for tool in range(1,len(self.tool_list)):
+                if cycle >= tool_rounds[tool]:
+                    converged[tool] = True
+
+            #in convergence mode, check which tools have converged in the previous rounds. When calibrating multiple axes all of them need to have converged.
+            if converge and cycle >= min_rounds:
+                for tool in converge_tools:
+                    if not converged[tool]:
+                        error = max(self.offset_standard_error(loc,measured,tool,[passes.index((axis,0)),passes.index((axis,1))]) for axis in axes)
+                        if error < target_error:
+                            converged[tool] = True
+                            self.output_to_terminal('tool ' + str(self.tool_list[tool]) + ' converged after ' + str(cycle) + ' rounds, standard error: ' + f"{error:.5f}")
+
+            #stop when all tools have converged
+            if converged[converge_tools].all():
+                return 'finish'
+
+            #skip rounds that were already measured completely before the calibration was resumed
+            if all(measured[tool,cycle].all() or (converged[tool] and tool != 0) for tool in range(len(self.tool_list))):
+                return 'round'
+            self.publish('PHASE','homing round ' + str(cycle))
+
+        def wait_bed(item):
+            if not self.wait_for_heating():
+                return False
+
+        def wait_tool(item):
+            if not self.wait_for_heating(self.tool_list[item.tool]):
+                return False
+
+        def start_tool(item):
+            #skip tools that have already converged. The reference tool is always measured since the other offsets are relative to it. Also skip tools that were already measured before the calibration was resumed.
+            if (converged[item.tool] and item.tool != 0) or measured[item.tool,item.cycle].all():
+                return 'tool'
+            print("selected tool "+ str(self.tool_list[item.tool]))
+
+        def start_pass(item):
+            if measured[item.tool,item.cycle,item.scan]:
+                return 'pass'
+            axis, dir = passes[item.scan]
+            self.publish('PHASE','tool ' + str(self.tool_list[item.tool]) + ' ' + axis + ' ' + ['up','down'][dir] + ' round ' + str(item.cycle))
+
+        def reject(item,reason):
+            #discard the location of a pass and measure it again after cooling down if attempts and retries are left, otherwise it failed
+            nonlocal failed_passes, retries, retry_pending
+            description = 'tool ' + str(self.tool_list[item.tool]) + ' ' + passes[item.scan][0] + ' ' + ['up','down'][passes[item.scan][1]] + ' round ' + str(item.cycle)
+            loc[item.tool,item.cycle,item.scan] = np.nan
+            loc_raw[item.tool,item.cycle,item.scan] = np.nan
+            if attempts[item.tool,item.cycle,item.scan] < max_attempts and retries < retry_budget:
+                retries = retries + 1
+                retry_pending = True
+                self.output_to_terminal('retrying ' + description + ': ' + reason)
+            else:
+                failed_passes = failed_passes + 1
+                self.output_to_terminal('error: ' + description + ' failed: ' + reason)
+
+        def scan(item):
+            tool = item.tool
+            cycle = item.cycle
+            scan = item.scan
+            axis, dir = passes[scan]
+            attempts[tool,cycle,scan] = attempts[tool,cycle,scan] + 1
+
+            #forget the samples of an earlier attempt, such that only those of this attempt are stored
+            data[:,tool,cycle,scan] = 0
+            pos[:,tool,cycle,scan] = 0
+            timestamps[:,tool,cycle,scan] = 0
+            reference[:,tool,cycle,scan] = np.nan
+            samples[tool,cycle,scan] = 0
+
+            #delete any old sample in the LDC1101EVM and make sure it is ready. The inductance of the reference coil at the start of the pass is the baseline for the drift.
+            _, reference_baseline = self.read_sensors(settle_time)
+            if self.sensor_error():
+                self.output_to_terminal('Error in communication with LDC1101EVM. Please restart')
+                return False
 
-            #stop the calibration if the stop button was clicked.
-            if self.stop_button_clicked:
-                self.stop_button_clicked = False
-                self.calibration_running = False
-                return 0
-            
-            #move the printer to the starting position for the calibration.
-            if cal_x:
-                self.Diabase.write_line('G1 Z'+str(z_pos+cooldown_height)+' Y'+str(y_pos)+' X'+str(x_start) + ' F' + str(default_speed*60),1000)
+            #once the response of the nozzle has been learned from enough complete passes and the nozzle was located in an earlier round, it is located by registering a few samples to the template of the response instead of scanning the whole pass. A pass that is measured again is always scanned completely.
+            if use_templates:
+                response_key = template.key(printer,self.tool_list[tool],axis,dir,z_pos,x_pos,y_pos,temperature,run_settings.get('conversion_profile',''),run_settings.get('sample_filter',''))
+                learned = self.templates.get(response_key)
             else:
-                self.Diabase.write_line('G1 Z'+str(z_pos+cooldown_height)+' Y'+str(y_start)+' X'+str(x_pos) + ' F' + str(default_speed*60),1000)
-            print("commanded to go to initial position")
-            self.Diabase.write_line('M400;After move',1000)
-            
-            
+                learned = None
+            previous = loc[tool,measured[tool,:,scan],scan]
+            sparse = learned is not None and learned.count >= template_passes and len(previous) > 0 and attempts[tool,cycle,scan] == 1
+            templated[tool,cycle,scan] = sparse
+
+            i1 = 0#total samples number
+            tic2 = time.time()#time since the calibration started
+            stopped_early = False
+
+            def take_sample(new_pos):
+                nonlocal i1, total_samples
+                #Flush the LDC1101EVM to be sure to get the latest value and get a sample. Drift of both coils, like that caused by the temperature of the room, is removed by dividing by the relative change of the reference coil.
+                sample, reference[i1,tool,cycle,scan] = self.read_sensors(sample_time)
+                if differential:
+                    sample = sample*reference_baseline/reference[i1,tool,cycle,scan]
+                data[i1,tool,cycle,scan] = sample
+
+                #Also store a timestamp of the current time since the beginning of the entire calibration process
+                timestamps[i1,tool,cycle,scan] = time.time()-tic
+
+                #And store the current position.
+                pos[i1,tool,cycle,scan] = new_pos
+                self.publish('SAMPLE',self.tool_list[tool],scan,new_pos,data[i1,tool,cycle,scan])
+                i1 = i1 + 1
+                samples[tool,cycle,scan] = i1
+                total_samples = total_samples + 1
+
+            if sparse:
+                #sample the flanks of the dip around the location found in the earlier rounds, in the direction of the pass
+                expected = np.median(previous)
+                positions = template.sample_positions(learned,expected,template_samples,start[axis],stop[axis])
+                if dir == 1:
+                    positions = positions[::-1]
+                for new_pos in positions:
+                    if self.stop_button_clicked:
+                        return False
+                    self.Diabase.write_lines([plan.move(self.default_speed*60,**{axis:new_pos}),'M400'],plan.move_timeout)
+                    take_sample(new_pos)
+                    if self.graph_box.isChecked():
+                        self.curve[tool*len(passes)+scan].setData(pos[0:i1,tool,cycle,scan],data[0:i1,tool,cycle,scan])
+                    QtWidgets.QApplication.processEvents()
+            else:
+                #estimate the location of the nozzle while the samples arrive, using the same middle 80% of the pass as the fit afterwards
+                online_fit = analysis.online_symmetry_fit(center[axis],0.8*scan_range)
+                while(True):
+                    #stop the calibration if the stop button was clicked.
+                    if self.stop_button_clicked:
+                        return False
 
-            self.offset_tool_list = []
-            self.offset_list = []
-            
-            #perform calibration for all tools
-            for tool in range(len(self.tool_list)):
-                print("selected tool "+ str(self.tool_list[tool]))
-                self.Diabase.write_line('T'+str(self.tool_list[tool]),1000)
-                self.Diabase.write_line('M400; after tool select',3000)
-                
-                #go forwards and backwards.
-                for dir in range(2):
-                    #move the printer to the starting position for the calibration.
-                    if cal_x:
-                        if dir == 0:
-                            self.Diabase.write_line('G1 Z'+str(z_pos)+' Y'+str(y_pos)+' X'+str(x_start) + ' F' + str(default_speed*60),5000)
-                        else:
-                            self.Diabase.write_line('G1 Z'+str(z_pos)+' Y'+str(y_pos)+' X'+str(x_stop) + ' F' + str(default_speed*60),5000)
+                    #calculate the position the printer should be at based on the desired speed and the elapsed time, and move the printer to there.
+                    #Also limit the maximum movement speed to a bit above the desired speed, to minize accelerations, but allow the printer to catch up if necessary.
+                    toc2 = time.time() -tic2
+                    if dir == 0:
+                        new_pos = start[axis]+toc2*speed
                     else:
-                        if dir == 0:
-                            self.Diabase.write_line('G1 Z'+str(z_pos)+' Y'+str(y_start)+' X'+str(x_pos) + ' F' + str(default_speed*60),5000)
-                        else:
-                            self.Diabase.write_line('G1 Z'+str(z_pos)+' Y'+str(y_stop)+' X'+str(x_pos) + ' F' + str(default_speed*60),5000)
-                    self.Diabase.write_line('M400',5000)
-                    
-                    #delete any old sample in the LDC1101EVM and make sure it is ready.
-                    self.Ldc1101evm.flush()
-                    self.Ldc1101evm.get_LHR_data(50)
-                    if self.Ldc1101evm.error:
-                        self.output_to_terminal('Error in communication with LDC1101EVM. Please restart')
-                        self.calibration_running = False
-                        return False
+                        new_pos = stop[axis]-toc2*speed
+                    self.Diabase.write_lines([plan.move(speed*60*speed_factor,**{axis:new_pos}),'M400'],plan.move_timeout)
+                    take_sample(new_pos)
+                    online_fit.add(new_pos,data[i1-1,tool,cycle,scan])
+
+                    #put the data points and the estimated location in the graph every once in a while
+                    if i1%plotting_interval == 0 and self.graph_box.isChecked():
+                        self.curve[tool*len(passes)+scan].setData(pos[0:i1,tool,cycle,scan],data[0:i1,tool,cycle,scan])
+                        estimate, _ = online_fit.estimate()
+                        if np.isfinite(estimate):
+                            self.estimate_line.setValue(estimate)
+
+                    #end the pass once both flanks of the dip have been measured and the estimate is accurate enough
+                    if early_stop and online_fit.converged(early_stop_error):
+                        stopped_early = True
+                        break
 
-                    i1 = 0#total samples number
-                    tic2 = time.time()#time since the calibration started
-                    while(True):
-                        #stop the calibration if the stop button was clicked.
-                        if self.stop_button_clicked:
-                            self.stop_button_clicked = False
-                            self.calibration_running = False
-                            return 0
-
-                        #calculate the position the printer should be at based on the desired speed and the elapsed time, and move the printer to there.
-                        #Also limit the maximum movement speed to a bit above the desired speed, to minize accelerations, but allow the printer to catch up if necessary.
-                        toc2 = time.time() -tic2
-                        if cal_x:
-                            if dir == 0:
-                                new_x = x_start+toc2*speed
-                            else:
-                                new_x = x_stop-toc2*speed
-                            self.Diabase.write_line('G1 X' + str(new_x) + " F" + str(speed*60*speed_factor),100)
-                        else:
-                            if dir == 0:
-                                new_y = y_start+toc2*speed
-                            else:
-                                new_y = y_stop-toc2*speed
-                            self.Diabase.write_line('G1 Y' + str(new_y) + " F" + str(speed*60*speed_factor),100)
-                        self.Diabase.write_line('M400',100)
-
-                        #Flush the LDC1101EVM to be sure to get the latest value and get a sample
-                        self.Ldc1101evm.flush()
-                        data[i1,tool,cycle,dir] = self.Ldc1101evm.get_LHR_data(10)
-
-                        #Also store a timestamp of the current time since the beginning of the entire calibration process
-                        timestamps[i1,tool,cycle,dir] = time.time()-tic
-
-                        #And store the current position.
-                        if cal_x:
-                            pos[i1,tool,cycle,dir] = new_x
-                        else:
-                            pos[i1,tool,cycle,dir] = new_y
-                        i1 = i1 + 1
-
-                        #put the data points in the graph every once in a while
-                        if i1%plotting_interval == 0:
-                            self.curve[tool*2+dir].setData(pos[0:i1,tool,cycle,dir],data[0:i1,tool,cycle,dir])
-
-                        #if the printer has moved by the required amount , stop the calibration.
-                        if cal_x:
-                            if (dir ==0 and new_x >= x_stop) or (dir == 1 and new_x <= x_start):    
-                                break  
-                        else:
-                            if (dir ==0 and new_y >= y_stop) or (dir == 1 and new_y <= y_start): 
-                                break
-                        
-                        #attempt to make the GUI more responsive
-                        QtWidgets.QApplication.processEvents()
-                    
-                    #find the axis of symmetry in the measured data to find the location of the nozzle
-                    try:
-                        loc[tool,cycle,dir] = self.find_symmetry_axis(pos[int(i1/10):int(9/10*i1),tool,cycle,dir],data[int(i1/10):int(9/10*i1),tool,cycle,dir])
-                    except RuntimeError:
-                        self.output_to_terminal('error: calibration curve to ugly to fit')
+                    #if the printer has moved by the required amount , stop the calibration.
+                    if (dir ==0 and new_pos >= stop[axis]) or (dir == 1 and new_pos <= start[axis]):
                         break
 
-                    #print the result of the calibration to the terminal
-                    if tool == 0:
-                        if cal_x:
-                            if dir == 0:
-                                self.output_to_terminal('x position reference tool ' + str(self.tool_list[tool]) + ' when going up: ' + f"{loc[0,cycle,dir]:.3f}")
-                            else:
-                                self.output_to_terminal('x position reference tool ' + str(self.tool_list[tool]) + ' when going down: ' + f"{loc[0,cycle,dir]:.3f}")
-                        else:
-                            if dir == 0:
-                                self.output_to_terminal('y position reference tool ' + str(self.tool_list[tool]) + ' when going up: ' + f"{loc[0,cycle,dir]:.3f}")
-                            else:
-                                self.output_to_terminal('y position reference tool ' + str(self.tool_list[tool]) + ' when going down: ' + f"{loc[0,cycle,dir]:.3f}")
+                    #attempt to make the GUI more responsive
+                    QtWidgets.QApplication.processEvents()
+
+            #find the axis of symmetry in the measured data to find the location of the nozzle. If drift compensation is enabled, the uncompensated location is stored as well for comparison.
+            #A pass that was ended early did not reach the baseline on the far side, so the drift can not be removed and the online estimate is used. The same holds for the few samples of a pass located with a template, where the baseline fitted with the template takes up the drift.
+            pass_data = data[0:i1,tool,cycle,scan]
+            if drift_compensation and not stopped_early and not sparse:
+                try:
+                    pass_data = self.remove_drift(timestamps[0:i1,tool,cycle,scan],pass_data,pos[0:i1,tool,cycle,scan])
+                except RuntimeError as e:
+                    self.output_to_terminal('drift not compensated: ' + str(e))
+            try:
+                if sparse:
+                    #instead of the check of the fit, the registration rejects samples without a dip, a location at the edge of the searched range or a residual above the template
+                    loc[tool,cycle,scan] = analysis.register_template(pos[0:i1,tool,cycle,scan],pass_data,learned.u,learned.profile,expected,template.width(learned)/2)
+                    loc_raw[tool,cycle,scan] = loc[tool,cycle,scan]
+                    self.output_to_terminal('pass located with a template from ' + str(i1) + ' samples')
+                elif stopped_early:
+                    #the estimate is checked like the fit of a complete pass, using the samples inside the window of the online fit
+                    loc[tool,cycle,scan] = online_fit.estimate()[0]
+                    analysis.check_fit(online_fit.positions,online_fit.values,loc[tool,cycle,scan])
+                    loc_raw[tool,cycle,scan] = loc[tool,cycle,scan]
+                    self.output_to_terminal('pass ended early after ' + str(i1) + ' samples')
+                else:
+                    #the fit is only accepted if the curve is a clear, symmetric dip with the location well inside the pass
+                    loc[tool,cycle,scan] = self.find_symmetry_axis(pos[int(i1/10):int(9/10*i1),tool,cycle,scan],pass_data[int(i1/10):int(9/10*i1)])
+                    analysis.check_fit(pos[int(i1/10):int(9/10*i1),tool,cycle,scan],pass_data[int(i1/10):int(9/10*i1)],loc[tool,cycle,scan])
+                    if drift_compensation:
+                        loc_raw[tool,cycle,scan] = self.find_symmetry_axis(pos[int(i1/10):int(9/10*i1),tool,cycle,scan],data[int(i1/10):int(9/10*i1),tool,cycle,scan])
                     else:
-                        offset = loc[0,cycle,dir]-loc[tool,cycle,dir]
-                        
-                        if cal_x:
-                            if dir == 0:
-                                self.output_to_terminal('x offset tool ' + str(self.tool_list[tool]) + ' when going up: ' + f"{offset:.3f}")
-                            else:
-                                self.output_to_terminal('x offset tool ' + str(self.tool_list[tool]) + ' when going down: ' + f"{offset:.3f}")
-                        else:
-                            if dir == 0:
-                                self.output_to_terminal('y offset tool ' + str(self.tool_list[tool]) + ' when going up: ' + f"{offset:.3f}")
-                            else:
-                                self.output_to_terminal('y offset tool ' + str(self.tool_list[tool]) + ' when going down: ' + f"{offset:.3f}")
-                   
-                    #move the nozzle up and let the coil cool down
-                    self.Diabase.write_line('G1 Z'+str(z_pos+cooldown_height)  + ' F' + str(default_speed*60),10)
-                    self.Diabase.write_line('M400',10)
-                    time.sleep(cooldown_time)
-        #when finished with the calibration process, calculate the offsets between the tools and print them in the terminal
-        for tool in range(len(self.tool_list)):
+                        loc_raw[tool,cycle,scan] = loc[tool,cycle,scan]
+            except RuntimeError as e:
+                #samples that do not match the template mean that the response of the nozzle has changed, so the template is learned again from the next complete passes
+                if sparse:
+                    self.templates.invalidate(response_key)
+                reject(item,str(e))
+                self.publish_health(total_samples,failed_passes)
+                return
+
+            #compare the location with the other rounds, or the offset if the reference tool was measured in this round since the offsets stay the same when the printer is homed again
+            rounds_measured = measured[tool,:,scan].copy()
             if tool == 0:
-                if cal_x:
-                    self.output_to_terminal('average x position reference tool ' + str(self.tool_list[tool]) + ' when going up : ' + f"{loc[0,:,0].mean():.3f}" +' ± ' + f"{loc[0,:,0].std():.5f}")
-                    self.output_to_terminal('average x position reference tool ' + str(self.tool_list[tool]) + ' when going down : ' + f"{loc[0,:,1].mean():.3f}" +' ± ' + f"{loc[0,:,1].std():.5f}")
-                    self.output_to_terminal('average x position reference tool ' + str(self.tool_list[tool]) + ' as average : ' + f"{(loc[0,:,0]/2+loc[0,:,1]/2).mean():.3f}" +' ± ' + f"{(loc[0,:,0]/2+loc[0,:,1]/2).std():.5f}")
-                else:
-                    self.output_to_terminal('average y position reference tool ' + str(self.tool_list[tool]) + ' when going up :' + f"{loc[0,:,0].mean():.3f}" +' ± ' + f"{loc[0,:,0].std():.5f}")
-                    self.output_to_terminal('average y position reference tool ' + str(self.tool_list[tool]) + ' when going down :' + f"{loc[0,:,1].mean():.3f}" +' ± ' + f"{loc[0,:,1].std():.5f}")
-                    self.output_to_terminal('average y position reference tool ' + str(self.tool_list[tool]) + ' as average : ' + f"{(loc[0,:,0]/2+loc[0,:,1]/2).mean():.3f}" +' ± ' + f"{(loc[0,:,0]/2+loc[0,:,1]/2).std():.5f}")
+                others = loc[0,rounds_measured,scan]
+                value = loc[0,cycle,scan]
+            elif measured[0,cycle,scan]:
+                rounds_measured = rounds_measured & measured[0,:,scan]
+                others = loc[0,rounds_measured,scan]-loc[tool,rounds_measured,scan]
+                value = loc[0,cycle,scan]-loc[tool,cycle,scan]
+            else:
+                others = []
+                value = np.nan
+            if analysis.is_outlier(value,others):
+                if attempts[tool,cycle,scan] < max_attempts and retries < retry_budget:
+                    reject(item,f"{value:.3f} is an outlier compared to the other rounds, median {np.median(others):.3f}")
+                    self.publish_health(total_samples,failed_passes)
+                    return
+                self.output_to_terminal('warning: ' + f"{value:.3f}" + ' is an outlier compared to the other rounds, but no retries are left')
+
+            #complete passes that were accepted teach the template of the response of the nozzle
+            if use_templates and not sparse and not stopped_early:
+                try:
+                    self.templates.learn(response_key,pos[0:i1,tool,cycle,scan],pass_data,loc[tool,cycle,scan])
+                except RuntimeError as e:
+                    self.output_to_terminal('warning: could not learn the template: ' + str(e))
+            measured[tool,cycle,scan] = True
+            self.publish('RESULT',self.tool_list[tool],axis,dir,loc[tool,cycle,scan])
+            self.publish_health(total_samples,failed_passes)
+
+            #print the result of the calibration to the terminal
+            if dir == 0:
+                direction = 'up'
             else:
-                offsetup = loc[0,:,0]-loc[tool,:,0]
-                offsetdown = loc[0,:,1]-loc[tool,:,1]
-                offsetaverage = offsetup/2+offsetdown/2
-                if cal_x:
-                    self.output_to_terminal('average x offset tool ' + str(self.tool_list[tool]) + ' when going up : ' + f"{offsetup.mean():.3f}" +' ± ' + f"{offsetup.std():.5f}")
-                    self.output_to_terminal('average x offset tool ' + str(self.tool_list[tool]) + ' when going down : ' + f"{offsetdown.mean():.3f}" +' ± ' + f"{offsetdown.std():.5f}")
-                    self.output_to_terminal('average x offset tool ' + str(self.tool_list[tool]) + ' on average : ' + f"{offsetaverage.mean():.3f}" +' ± ' + f"{offsetdown.std():.5f}")
+                direction = 'down'
+            if tool == 0:
+                self.output_to_terminal(axis + ' position reference tool ' + str(self.tool_list[tool]) + ' when going ' + direction + ': ' + f"{loc[0,cycle,scan]:.3f}")
+            else:
+                offset = loc[0,cycle,scan]-loc[tool,cycle,scan]
+                self.output_to_terminal(axis + ' offset tool ' + str(self.tool_list[tool]) + ' when going ' + direction + ': ' + f"{offset:.3f}")
+            self.publish('PHASE','cooling down')
+
+        def cooldown(item):
+            #let the coil cool down after the nozzle moved up. In the mean time store the progress, such that the calibration can be resumed.
+            nonlocal retry_pending
+            tic3 = time.time()
+            checkpoint['elapsed'] = time.time()-tic
+            self.save_checkpoint(filename,checkpoint)
+            time.sleep(max(cooldown_time-(time.time()-tic3),0))
+            if retry_pending:
+                retry_pending = False
+                return 'repeat'
+
+        def idle():
+            #attempt to make the GUI more responsive and stop the calibration if the stop button was clicked.
+            QtWidgets.QApplication.processEvents()
+            return not self.stop_button_clicked
+
+        handlers = {'heat':heat, 'round':start_round, 'wait_bed':wait_bed, 'wait_tool':wait_tool, 'tool':start_tool, 'pass':start_pass, 'scan':scan, 'cooldown':cooldown}
+        executor = plan.plan_executor(self.Diabase,handlers,idle)
+        try:
+            finished = executor.run(calibration_plan)
+        except RuntimeError as e:
+            self.output_to_terminal('error: ' + str(e))
+            self.calibration_running = False
+            return False
+        if not finished:
+            self.stop_button_clicked = False
+            self.calibration_running = False
+            return 0
+
+        #when finished with the calibration process, calculate the offsets between the tools and print them in the terminal
+        self.offset_tool_list = []
+        self.offset_list = []
+        for tool in range(len(self.tool_list)):
+            if tool_rounds[tool] == 0:
+                self.output_to_terminal('tool ' + str(self.tool_list[tool]) + ' was skipped since its offset was stable')
+                continue
+            tool_offset = {}
+            for axis in axes:
+                up = passes.index((axis,0))
+                down = passes.index((axis,1))
+
+                #only use the rounds in which both this tool and the reference tool were measured succesfully
+                complete = measured[tool][:,[up,down]].all(axis=1) & measured[0][:,[up,down]].all(axis=1)
+                if not complete.any():
+                    self.output_to_terminal('error: no succesful rounds for tool ' + str(self.tool_list[tool]) + ' in ' + axis)
+                    continue
+
+                if tool == 0:
+                    self.output_to_terminal('average ' + axis + ' position reference tool ' + str(self.tool_list[tool]) + ' when going up : ' + f"{loc[0,complete,up].mean():.3f}" +' ± ' + f"{loc[0,complete,up].std():.5f}")
+                    self.output_to_terminal('average ' + axis + ' position reference tool ' + str(self.tool_list[tool]) + ' when going down : ' + f"{loc[0,complete,down].mean():.3f}" +' ± ' + f"{loc[0,complete,down].std():.5f}")
+                    self.output_to_terminal('average ' + axis + ' position reference tool ' + str(self.tool_list[tool]) + ' as average : ' + f"{(loc[0,complete,up]/2+loc[0,complete,down]/2).mean():.3f}" +' ± ' + f"{(loc[0,complete,up]/2+loc[0,complete,down]/2).std():.5f}")
                 else:
-                    self.output_to_terminal('average y offset tool ' + str(self.tool_list[tool]) + ' when going up : ' + f"{offsetup.mean():.3f}" +' ± ' + f"{offsetup.std():.5f}")
-                    self.output_to_terminal('average y offset tool ' + str(self.tool_list[tool]) + ' when going down : ' + f"{offsetdown.mean():.3f}" +' ± ' + f"{offsetdown.std():.5f}")
-                    self.output_to_terminal('average y offset tool ' + str(self.tool_list[tool]) + ' on average : ' + f"{offsetaverage.mean():.3f}" +' ± ' + f"{offsetdown.std():.5f}")
+                    offsetup = loc[0,complete,up]-loc[tool,complete,up]
+                    offsetdown = loc[0,complete,down]-loc[tool,complete,down]
+                    offsetaverage = offsetup/2+offsetdown/2
+                    self.output_to_terminal('average ' + axis + ' offset tool ' + str(self.tool_list[tool]) + ' when going up : ' + f"{offsetup.mean():.3f}" +' ± ' + f"{offsetup.std():.5f}")
+                    self.output_to_terminal('average ' + axis + ' offset tool ' + str(self.tool_list[tool]) + ' when going down : ' + f"{offsetdown.mean():.3f}" +' ± ' + f"{offsetdown.std():.5f}")
+                    self.output_to_terminal('average ' + axis + ' offset tool ' + str(self.tool_list[tool]) + ' on average : ' + f"{offsetaverage.mean():.3f}" +' ± ' + f"{offsetdown.std():.5f}")
+                    tool_offset[axis] = offsetaverage.mean()
+                    self.publish('OFFSET',self.tool_list[tool],axis,offsetaverage.mean(),offsetaverage.std())
+                    self.history.add(printer,self.tool_list[tool],self.tool_list[0],axis,temperature,offsetaverage.mean(),offsetaverage.std(),complete.sum(),filename)
+            if tool_offset:
                 self.offset_tool_list.append(self.tool_list[tool])
-                self.offset_list.append(offsetaverage.mean())
-                self.offset_direction = cal_x
+                self.offset_list.append(tool_offset)
         #update settings dict
         self.save_settings()
         self.load_settings()
 
-        #store the data of the calibraiton in a file with the name from filename textbox
-        sio.savemat(filename,{'pos':pos, 'time':timestamps, 'data':data, 'loc':loc, 'tool_list':self.tool_list,'settings':self.settings_dict,'calibrated_x':cal_x})
+        #store the data of the calibraiton in a file with the name from filename textbox. Saving the settings reads the selected tools again, so the tool list of the calibration is taken from the checkpoint.
+        import scipy.io as sio
+        sio.savemat(filename,{'pos':pos, 'time':timestamps, 'data':data, 'loc':loc, 'loc_raw':loc_raw, 'measured':measured, 'templated':templated, 'tool_list':checkpoint['tool_list'],'settings':self.settings_dict,'calibrated_x':'x' in axes, 'axes':axes, 'drift_compensation':drift_compensation, 'run_settings':run_settings, 'reference':reference, 'differential':differential})
+
+        #the checkpoint is only needed anymore if some passes failed
+        if failed_passes == 0:
+            self.remove_checkpoint(filename)
+        else:
+            self.output_to_terminal(str(failed_passes) + ' passes failed, press resume to measure them again')
+        if retries > 0:
+            self.output_to_terminal(str(retries) + ' passes were measured again because they failed or were outliers')
+        if templated.any():
+            self.output_to_terminal(str(templated.sum()) + ' passes were located with a template')
 
-        #home the printer        
-        self.Diabase.write_line('G28',10000)
         self.output_to_terminal('finished calibration')
+        self.publish('PHASE','finished')
         self.calibration_running = False
         return True    
 
+    def resume_calibration(self):
+        """Function for handling the resume button being pressed. This will load the checkpoint of the last interrupted calibration, reconnect if the connection was lost and continue the calibration with only the passes that are missing.
+        
+        :return: False if unsucceful, True if succefull
+        :rtype: Boolean
+        """
+        if self.calibration_running == True:
+            self.output_to_terminal('Wait for the calibration to finish before resuming')
+            return False
+
+        try:
+            checkpoint = self.load_checkpoint(self.filename_line.text())
+        except OSError:
+            self.output_to_terminal('error: no interrupted calibration found for ' + self.filename_line.text())
+            return False
+
+        #reconnect if the communication with the LDC1101EVM failed
+        if self.connected and self.sensor_error():
+            self.close_sensors()
+            self.Diabase.close()
+            self.connected = False
+        if self.connected == False:
+            if not self.connect():
+                return False
+
+        return self.calibrate(checkpoint['axes'],checkpoint)
+
+    def checkpoint_filename(self,filename):
+        """Function for getting the name of the checkpoint file belonging to a data file.
+        
+        :param filename: The name of the data file
+        :return: The name of the checkpoint file
+        :rtype: string
+        """
+        if filename.endswith('.mat'):
+            filename = filename[:-4]
+        return filename + '_checkpoint.mat'
+
+    def save_checkpoint(self,filename,checkpoint):
+        """Function for storing the progress of a calibration, such that it can be resumed with :meth:`MainWindow.resume_calibration`. The sample buffers are only stored up to the largest number of samples taken in a pass, since most of them are empty and writing them would take longer than the cooldown between the passes.
+        
+        :param filename: The name of the data file of the calibration
+        :param checkpoint: Dict with the settings of the calibration, the data measured so far, the number of samples of each pass and which passes have been measured
+        :return: None
+        :rtype: None
+        """
+        import scipy.io as sio
+        length = max(int(checkpoint['samples'].max()),1)
+        stored = dict(checkpoint)
+        for key in ['pos','time','data','reference']:
+            stored[key] = checkpoint[key][:length]
+        sio.savemat(self.checkpoint_filename(filename),stored)
+
+    def load_checkpoint(self,filename):
+        """Function for loading the progress of an interrupted calibration stored by :meth:`MainWindow.save_checkpoint`.
+        
+        :param filename: The name of the data file of the calibration
+        :return: Dict with the settings of the calibration, the data measured so far and which passes have been measured
+        :rtype: Dict
+        """
+        import scipy.io as sio
+        checkpoint = sio.loadmat(self.checkpoint_filename(filename),squeeze_me=True,simplify_cells=True)
+
+        #restore the types and the dimensions that were lost when storing the checkpoint
+        run_settings = checkpoint['run_settings']
+        for key in ['rounds']:
+            run_settings[key] = int(run_settings[key])
+        for key in ['drift_compensation','converge']:
+            run_settings[key] = bool(run_settings[key])
+        #an empty string is stored as an empty array, checkpoints of older versions do not contain the conversion profile and the sample filter
+        for key in ['filename','printer','conversion_profile','sample_filter']:
+            if key in run_settings:
+                value = np.atleast_1d(run_settings[key])
+                run_settings[key] = str(value[0]) if value.size else ''
+        run_settings['temperature'] = float(run_settings['temperature'])
+        #checkpoints of older versions do not contain the bed temperature, so the one in the GUI is used
+        run_settings['bed_temperature'] = float(run_settings.get('bed_temperature',self.bed_temp_box.value()))
+        run_settings['tool_rounds'] = [int(tool_rounds) for tool_rounds in np.atleast_1d(run_settings['tool_rounds'])]
+        tool_list = [int(tool) for tool in np.atleast_1d(checkpoint['tool_list'])]
+        rounds = run_settings['rounds']
+        checkpoint['run_settings'] = run_settings
+        checkpoint['tool_list'] = tool_list
+        axes = np.atleast_1d(checkpoint['axes'])
+        checkpoint['axes'] = str(axes[0]) if axes.size else ''
+        scans = 2*len(checkpoint['axes'])
+        checkpoint['elapsed'] = float(checkpoint['elapsed'])
+        for key in ['loc','loc_raw']:
+            checkpoint[key] = np.reshape(checkpoint[key],[len(tool_list),rounds,scans]).astype(float)
+        checkpoint['measured'] = np.reshape(checkpoint['measured'],[len(tool_list),rounds,scans]).astype(bool)
+        #checkpoints of older versions do not record which passes were located with a template
+        if 'templated' not in checkpoint:
+            checkpoint['templated'] = np.zeros(np.shape(checkpoint['measured']))
+        checkpoint['templated'] = np.reshape(checkpoint['templated'],[len(tool_list),rounds,scans]).astype(bool)
+        #checkpoints of older versions do not contain the reference
+        if 'reference' not in checkpoint:
+            checkpoint['reference'] = np.full(np.shape(checkpoint['data']),np.nan)
+        for key in ['pos','time','data','reference']:
+            checkpoint[key] = np.reshape(checkpoint[key],[-1,len(tool_list),rounds,scans]).astype(float)
+        #checkpoints of older versions do not contain the number of samples of each pass, every sample taken has a timestamp after the start of the calibration
+        if 'samples' not in checkpoint:
+            checkpoint['samples'] = (checkpoint['time'] > 0).sum(axis=0)
+        checkpoint['samples'] = np.reshape(checkpoint['samples'],[len(tool_list),rounds,scans]).astype(int)
+        return checkpoint
+
+    def remove_checkpoint(self,filename):
+        """Function for removing the checkpoint file of a calibration once it is no longer needed.
+        
+        :param filename: The name of the data file of the calibration
+        :return: None
+        :rtype: None
+        """
+        try:
+            os.remove(self.checkpoint_filename(filename))
+        except OSError:
+            pass
+
+    def offset_standard_error(self,loc,measured,tool,scans):
+        """Function for calculating the standard error of the offset of a tool from the rounds measured so far. For the reference tool the standard error of its position is calculated instead.
+        
+        :param loc: Array with the found nozzle locations, indexed by tool, round and pass
+        :param measured: Boolean array of the same shape as loc, which is True for the passes that have been measured succesfully
+        :param tool: The index of the tool in :attr:`MainWindow.tool_list`
+        :param scans: The indices of the passes along the axis of which the offset is calculated
+        :return: The standard error of the offset, or infinity if less than two rounds are available
+        :rtype: float
+        """
+        complete = measured[tool][:,scans].all(axis=1) & measured[0][:,scans].all(axis=1)
+        if complete.sum() < 2:
+            return np.inf
+        if tool == 0:
+            results = loc[0][complete][:,scans].mean(axis=1)
+        else:
+            results = (loc[0][complete][:,scans]-loc[tool][complete][:,scans]).mean(axis=1)
+        return results.std(ddof=1)/np.sqrt(len(results))
+
     def apply_offsets(self):
         """Function for handling the apply offset button being pressed. This will send the measured offsets to the printer.
         
@@ -584,53 +1437,39 @@ class MainWindow(QtWidgets.QMainWindow):
             self.output_to_terminal('Wait for the calibration to finish before applying offsets')
             return False
 
-        for i1 in range(len(self.offset_tool_list)):
-            if self.offset_direction:
-                extra_offset = {}
-                extra_offset['x'] = self.offset_list[i1]
-                self.Diabase.set_tool_offset_differential(self.offset_tool_list[i1],extra_offset)
-            else:
-                extra_offset = {}
-                extra_offset['y'] = self.offset_list[i1]
-                self.Diabase.set_tool_offset_differential(self.offset_tool_list[i1],extra_offset)
-        self.Diabase.write_line("T10",5000)
+        #read the current tool offsets of all tools, write all new ones and read them back at once, without changing tools
+        extra_offsets = dict(zip(self.offset_tool_list,self.offset_list))
+        try:
+            new_offsets = self.Diabase.set_tool_offsets_differential(extra_offsets)
+        except RuntimeError as error:
+            self.output_to_terminal('error: could not apply offsets: ' + str(error))
+            return False
+        for tool in new_offsets:
+            self.output_to_terminal('new offset tool ' + str(tool) + ': ' + ', '.join(axis + ' ' + f"{new_offsets[tool][axis]:.3f}" for axis in new_offsets[tool]))
         self.Diabase.store_offset_parameters()
         print('applied offsets')
         return True
     
-    def func(self,x, o, a, b, c, d, e):
-        """Polynomial function fitted to the measured inductance curve to determine the point of symmetry
-        
-        :param x: List of x coordinates at which the function should be evaluated
-        :param o: The point of symmetry
-        :param a: Constant offset
-        :param b: Constant before the square
-        :param c: Constant before the to the power 4
-        :param d: Constant before the to the power 6
-        :param e: Constant before the to the power 8
-        :return: The output of the polynomial function
-        :rtype: Boolean
+    def remove_drift(self,t,y,x):
+        """Function for removing the thermal drift of the coil from the samples of a single pass, see :func:`analysis.remove_drift`.
+        
+        :param t: List with the timestamps of the samples
+        :param y: List with the measured inductances
+        :param x: List with the positions of the samples
+        :return: The measured inductances with the drift removed
+        :rtype: numpy array
         """
-        return a + b * (x-o) ** 2 + c * (x-o) ** 4 + d * (x-o) ** 6 + e * (x-o) ** 8
+        return analysis.remove_drift(t,y,x)
 
     def find_symmetry_axis(self,x,y):
-        """Function for calculating the point of symmetry of a a symmetric curve
+        """Function for calculating the point of symmetry of a a symmetric curve, by fitting the polynomial :func:`analysis.func`
         
         :param x: List of x coordinates 
         :param y: List of y coordinates
         :return: The oint of symmetry
         :rtype: float
         """
-        y_min = np.min(y)
-        y_max = np.max(y)
-        x_avg = np.mean(x)
-        x_min = np.min(x)
-        b0 = (y_max-y_min)/(x_min-x_avg)**2
-        p0 = [x_avg,y_min,b0,0,0,0]
-        popt, _ = curve_fit(self.func, x, y,p0, maxfev=1000)
-        #plt.plot(x,func(x,popt[0],popt[1],popt[2],popt[3],popt[4],popt[5]))
-        return popt[0]    
-        
+        return analysis.find_symmetry_axis(x,y,'polynomial')
 
     def save_settings(self):
         """Function for saving settings to a settings.yaml file
@@ -652,6 +1491,29 @@ class MainWindow(QtWidgets.QMainWindow):
         settings_dict['fan_on'] = self.fan_box.isChecked()
         settings_dict['homing_on'] = self.homing_box.isChecked()
         settings_dict['ascend'] = self.ascend_box.isChecked()
+        settings_dict['cooldown_time'] = self.cooldown_box.value()
+        settings_dict['drift_compensation'] = self.drift_box.isChecked()
+        settings_dict['early_stop_on'] = self.early_stop_box.isChecked()
+        settings_dict['early_stop_error'] = self.early_stop_error_box.value()
+        settings_dict['template_on'] = self.template_box.isChecked()
+        settings_dict['capture_on'] = self.capture_box.isChecked()
+        settings_dict['live_graph_on'] = self.graph_box.isChecked()
+        settings_dict['telemetry_on'] = self.telemetry_box.isChecked()
+        settings_dict['acquisition_process_on'] = self.acquisition_box.isChecked()
+        settings_dict['conversion_profile'] = self.profile_combo.currentText()
+        settings_dict['auto_tune'] = self.auto_tune_box.isChecked()
+        settings_dict['target_noise'] = self.noise_box.value()
+        settings_dict['sample_filter'] = self.filter_combo.currentText()
+        settings_dict['converge_on'] = self.converge_box.isChecked()
+        settings_dict['target_error'] = self.target_error_box.value()
+        settings_dict['printer_name'] = self.printer_line.text()
+        settings_dict['stable_on'] = self.stable_box.isChecked()
+        settings_dict['stable_rounds'] = int(self.stable_rounds_box.value())
+        settings_dict['stable_tolerance'] = self.stable_tolerance_box.value()
+        settings_dict['sweep_speeds'] = self.sweep_speeds_line.text()
+        settings_dict['sweep_ranges'] = self.sweep_ranges_line.text()
+        settings_dict['sweep_heights'] = self.sweep_heights_line.text()
+        settings_dict['sweep_rounds'] = int(self.sweep_rounds_box.value())
         settings_dict['version'] = '1.0.3'
         if self.update_tool_list():
             settings_dict['tool_list'] = self.tool_list
@@ -696,10 +1558,60 @@ class MainWindow(QtWidgets.QMainWindow):
             self.fan_box.setChecked(self.settings_dict['fan_on'])
         if 'homing_on' in self.settings_dict:
             self.homing_box.setChecked(self.settings_dict['homing_on'])
+        if 'cooldown_time' in self.settings_dict:
+            self.cooldown_box.setValue(float(self.settings_dict['cooldown_time']))
+        if 'drift_compensation' in self.settings_dict:
+            self.drift_box.setChecked(self.settings_dict['drift_compensation'])
+        if 'early_stop_on' in self.settings_dict:
+            self.early_stop_box.setChecked(self.settings_dict['early_stop_on'])
+        if 'early_stop_error' in self.settings_dict:
+            self.early_stop_error_box.setValue(float(self.settings_dict['early_stop_error']))
+        if 'template_on' in self.settings_dict:
+            self.template_box.setChecked(self.settings_dict['template_on'])
+        if 'capture_on' in self.settings_dict:
+            self.capture_box.setChecked(self.settings_dict['capture_on'])
+        if 'live_graph_on' in self.settings_dict:
+            self.graph_box.setChecked(self.settings_dict['live_graph_on'])
+        if 'telemetry_on' in self.settings_dict:
+            self.telemetry_box.setChecked(self.settings_dict['telemetry_on'])
+        if 'acquisition_process_on' in self.settings_dict:
+            self.acquisition_box.setChecked(self.settings_dict['acquisition_process_on'])
+        if 'conversion_profile' in self.settings_dict:
+            index = self.profile_combo.findText(self.settings_dict['conversion_profile'])
+            if index >= 0:
+                self.profile_combo.setCurrentIndex(index)
+        if 'auto_tune' in self.settings_dict:
+            self.auto_tune_box.setChecked(self.settings_dict['auto_tune'])
+        if 'target_noise' in self.settings_dict:
+            self.noise_box.setValue(float(self.settings_dict['target_noise']))
+        if 'sample_filter' in self.settings_dict:
+            index = self.filter_combo.findText(self.settings_dict['sample_filter'])
+            if index >= 0:
+                self.filter_combo.setCurrentIndex(index)
+        if 'converge_on' in self.settings_dict:
+            self.converge_box.setChecked(self.settings_dict['converge_on'])
+        if 'target_error' in self.settings_dict:
+            self.target_error_box.setValue(float(self.settings_dict['target_error']))
+        if 'printer_name' in self.settings_dict:
+            self.printer_line.setText(str(self.settings_dict['printer_name']))
+        if 'stable_on' in self.settings_dict:
+            self.stable_box.setChecked(self.settings_dict['stable_on'])
+        if 'stable_rounds' in self.settings_dict:
+            self.stable_rounds_box.setValue(int(float(self.settings_dict['stable_rounds'])))
+        if 'stable_tolerance' in self.settings_dict:
+            self.stable_tolerance_box.setValue(float(self.settings_dict['stable_tolerance']))
+        if 'sweep_speeds' in self.settings_dict:
+            self.sweep_speeds_line.setText(str(self.settings_dict['sweep_speeds']))
+        if 'sweep_ranges' in self.settings_dict:
+            self.sweep_ranges_line.setText(str(self.settings_dict['sweep_ranges']))
+        if 'sweep_heights' in self.settings_dict:
+            self.sweep_heights_line.setText(str(self.settings_dict['sweep_heights']))
+        if 'sweep_rounds' in self.settings_dict:
+            self.sweep_rounds_box.setValue(int(self.settings_dict['sweep_rounds']))
         if 'nozzle_temperature' in self.settings_dict:
-            self.nozzle_temperature = self.temp_box.setValue(float(self.settings_dict['nozzle_temperature']))
+            self.nozzle_temperature = self.temp_box.setValue(int(float(self.settings_dict['nozzle_temperature'])))
         if 'bed_temperature' in self.settings_dict:
-            self.bed_temperature = self.bed_temp_box.setValue(float(self.settings_dict['bed_temperature']))
+            self.bed_temperature = self.bed_temp_box.setValue(int(float(self.settings_dict['bed_temperature'])))
         
         if 'tool_list' in self.settings_dict:
             tool_list_dict = self.settings_dict['tool_list']
@@ -712,6 +1624,8 @@ class MainWindow(QtWidgets.QMainWindow):
         return True
         
 def main():
+    #the acquisition process is started by running this file again, also when it is frozen into an executable
+    multiprocessing.freeze_support()
     pg.setConfigOption('background', 'w')
     pg.setConfigOption('foreground', 'k')
     pg.setConfigOption('useOpenGL',1)
@@ -721,6 +1635,13 @@ def main():
     
     main = MainWindow()
     main.show()
+
+    #when benchmarking the startup, report the time until the event loop is running and quit
+    if '--startup-benchmark' in sys.argv:
+        def report_startup_time():
+            print('startup time: %.3f s' % (time.time()-start_time))
+            app.quit()
+        QtCore.QTimer.singleShot(0, report_startup_time)
     
     sys.exit(app.exec_())
     
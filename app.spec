@@ -6,7 +6,7 @@ block_cipher = None
 
 a = Analysis(['app.py'],
              pathex=['D:\\phd\\git\\inductive_calibration_GUI'],
-             binaries=[('./interface.ui', './'), ('./settings.yaml', './')],
+             binaries=[('./settings.yaml', './')],
              datas=[],
              hiddenimports=[],
              hookspath=[],
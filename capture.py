@@ -0,0 +1,203 @@
+"""
+.. module:: capture
+    :synopsis: This module captures the raw bytes received from the LDC1101EVM to a file and replays them
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+This way problems with the synchronisation and decoding of the frames can be investigated offline. A capture file is a preallocated memory-mapped array of records, each holding up to :data:`chunk_size` bytes with the time at which they were received. Unused records have a length of 0.
+
+Run this module with a capture file to decode it as fast as possible, for example: python capture.py capture_20240101_120000.cap --profile balanced
+"""
+import numpy as np
+from time import sleep, time
+
+chunk_size = 54
+"""The maximum number of bytes in a record of a capture file"""
+
+capture_dtype = np.dtype([('time','<f8'),('length','<u2'),('data','u1',(chunk_size,))])
+"""The record of a capture file: the time at which the bytes were received in seconds since the epoch, the number of bytes and the bytes"""
+
+class capture_writer:
+    """Class for writing received bytes to a capture file
+    """
+
+    def __init__(self,filename,size=64e6):
+        """Code run when the capture_writer object is initialised. This creates the capture file with its full size.
+
+        :param filename: The name of the capture file
+        :param size: The size of the capture file in bytes. Each byte of the file holds about 0.84 received bytes.
+        :return: None
+        :rtype: None
+        """
+        self.records = np.memmap(filename,dtype=capture_dtype,mode='w+',shape=(max(int(size)//capture_dtype.itemsize,1),))
+        self.index = 0
+
+    def write(self,data,timestamp):
+        """Function for adding received bytes to the capture file
+
+        :param data: The received bytes
+        :param timestamp: The time at which they were received in seconds since the epoch
+        :return: False if the capture file is full, True otherwise
+        :rtype: Boolean
+        """
+        count = -(-len(data)//chunk_size)
+        if self.index + count > len(self.records):
+            return False
+        padded = np.zeros(count*chunk_size,dtype=np.uint8)
+        padded[:len(data)] = np.frombuffer(data,dtype=np.uint8)
+        lengths = np.full(count,chunk_size)
+        lengths[-1] = len(data)-(count-1)*chunk_size
+        self.records['time'][self.index:self.index+count] = timestamp
+        self.records['length'][self.index:self.index+count] = lengths
+        self.records['data'][self.index:self.index+count] = padded.reshape(count,chunk_size)
+        self.index = self.index + count
+        return True
+
+    def close(self):
+        """Function for writing the captured bytes to disk and closing the capture file
+
+        :return: None
+        :rtype: None
+        """
+        self.records.flush()
+        del self.records
+
+def read_capture(filename):
+    """Function for reading a capture file
+
+    :param filename: The name of the capture file
+    :return: The received bytes and an array with the time at which each of them was received, in seconds after the first byte
+    :rtype: tuple
+    """
+    records = np.memmap(filename,dtype=capture_dtype,mode='r')
+    count = int(np.count_nonzero(records['length']))
+    lengths = np.asarray(records['length'][:count])
+    used = np.arange(chunk_size) < lengths[:,np.newaxis]
+    data = np.asarray(records['data'][:count])[used].tobytes()
+    times = np.repeat(np.asarray(records['time'][:count]),lengths)
+    if len(times) > 0:
+        times = times - times[0]
+    return data, times
+
+class replay_port:
+    """Class that behaves like the serial port of the LDC1101EVM, but returns the bytes of a capture file. Pass it to :class:`ldc1101evm.ldc1101evm` instead of a port name to feed the capture to the decoder. Commands written to it are ignored.
+    """
+
+    def __init__(self,filename,speed=1.0,timeout=1):
+        """Code run when the replay_port object is initialised.
+
+        :param filename: The name of the capture file
+        :param speed: How many times faster than recorded the bytes arrive, or None to make all bytes available at once
+        :param timeout: The maximum time a read waits for bytes in seconds, like the timeout of a serial port
+        :return: None
+        :rtype: None
+        """
+        self.data, self.times = read_capture(filename)
+        self.speed = speed
+        self.timeout = timeout
+        self.position = 0
+        self.start = None
+        self.open = True
+
+    def __available(self):
+        """Function for getting the number of bytes of the capture that have arrived so far. The replay starts at the first call.
+
+        :return: The number of bytes
+        :rtype: int
+        """
+        if self.speed is None:
+            return len(self.data)
+        if self.start is None:
+            self.start = time()
+        return int(np.searchsorted(self.times,(time()-self.start)*self.speed,side='right'))
+
+    @property
+    def in_waiting(self):
+        """The number of bytes that have arrived but have not been read"""
+        return self.__available() - self.position
+
+    @property
+    def finished(self):
+        """True if all bytes of the capture have been read"""
+        return self.position >= len(self.data)
+
+    def read(self,size=1):
+        """Function for reading bytes. Like a serial port this blocks until the requested number of bytes has arrived or the timeout has passed.
+
+        :param size: The number of bytes to read
+        :return: The bytes read
+        :rtype: bytes
+        """
+        if self.finished:
+            sleep(self.timeout)
+            return b''
+        deadline = time() + self.timeout
+        while self.__available() - self.position < size and self.__available() < len(self.data) and time() < deadline:
+            sleep(0.001)
+        count = min(size,self.__available()-self.position)
+        result = self.data[self.position:self.position+count]
+        self.position = self.position + count
+        return result
+
+    def write(self,data):
+        """Function for writing to the port, the data is ignored
+
+        :param data: The bytes to write
+        :return: The number of bytes written
+        :rtype: int
+        """
+        return len(data)
+
+    def reset_input_buffer(self):
+        """Function for discarding the bytes that have arrived but have not been read. When all bytes are available at once nothing is discarded, such that the whole capture is replayed.
+
+        :return: None
+        :rtype: None
+        """
+        if self.speed is not None:
+            self.position = max(self.position,self.__available())
+
+    def isOpen(self):
+        """Function for checking if the port is open
+
+        :return: True if the port has not been closed
+        :rtype: Boolean
+        """
+        return self.open
+
+    def close(self):
+        """Function for closing the port
+
+        :return: None
+        :rtype: None
+        """
+        self.open = False
+
+def main():
+    import argparse
+    from ldc1101evm import ldc1101evm
+    parser = argparse.ArgumentParser(description='Decode a capture of the LDC1101EVM as fast as possible')
+    parser.add_argument('filename', help='The capture file')
+    parser.add_argument('--profile', default='balanced', choices=list(ldc1101evm.conversion_profiles), help='The conversion profile used during the capture')
+    args = parser.parse_args()
+
+    port = replay_port(args.filename,speed=None,timeout=0.01)
+    print('%d bytes captured over %.1f s' % (len(port.data),port.times[-1] if len(port.times) else 0))
+    tic = time()
+    evm = ldc1101evm(port)
+    evm.profile = args.profile
+    while not port.finished:
+        evm.decode_frames()
+    toc = time()-tic
+    #give the serial daemon time to hand over the last bytes
+    sleep(0.05)
+    evm.decode_frames()
+    evm.close()
+
+    frames = len(evm.samples)
+    print('decoded %d frames in %.3f s (%.0f frames/s)' % (frames,toc,frames/toc))
+    print('%d bytes skipped to synchronise, %d bytes left over' % (len(port.data)-8*frames-len(evm.received_bytes),len(evm.received_bytes)))
+    if frames > 0:
+        print('inductance %.6g H ± %.3g H' % (evm.samples.mean(),evm.samples.std()))
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,40 @@
 """
 
 import serial
+import time
+import re
+from collections import namedtuple
+
+temperature = namedtuple('temperature',['current','target'])
+"""The current and target temperature of a heater in degrees Celcius, as reported by :meth:`diabase.get_temperatures`"""
 
 class diabase:
     """The number of lines to read before deciding the 'OK'  from the printer will never arrive"""
 
+    tool_offset_pattern = re.compile(r'Tool (\d+) offsets?:(.*)')
+    """Pattern matching the tool offset report of a G10 Pn command, for example 'Tool 6 offsets: X0.100 Y-0.200 Z0.000'"""
+
+    axis_pattern = re.compile(r'([XYZ])\s*(-?\d+(?:\.(\d*))?)')
+    """Pattern matching an axis letter followed by a value in a reply of the printer"""
+
+    offset_resolution = 0.001
+    """The step in which the firmware reports tool offsets, used by :meth:`diabase.parse_tool_offsets` when no offset is printed with decimals"""
+
+    max_offset_resolution = 0.01
+    """The largest step in which tool offsets are assumed to be reported, such that an offset printed with few decimals does not make the verification of :meth:`diabase.set_tool_offsets_differential` accept large differences"""
+
+    position_pattern = re.compile(r'X:\s*(-?\d+(?:\.\d*)?)\s+Y:\s*(-?\d+(?:\.\d*)?)\s+Z:\s*(-?\d+(?:\.\d*)?)')
+    """Pattern matching the user position in the reply to a M114 command, for example 'X:10.000 Y:20.000 Z:5.000 E0:0.0 Count 800 1600 2000 Machine 10.000 20.000 5.000'"""
+
+    tool_heater_pattern = re.compile(r'Tool (\d+)\b.*?heaters[^:]*:\s*(\d+)')
+    """Pattern matching the first heater in the tool report of a M563 Pn command, for example 'Tool 6 - drives: 6; heaters (active/standby temps): 6 (175.0/175.0); status: standby'"""
+
+    ok_pattern = re.compile(r'ok(?:\s+(.*))?$')
+    """Pattern matching the acknowledgement of a command: a line that is 'ok', or 'ok' followed by whitespace and the reply, for example 'ok T:175.2 /175.0'. Lines that only end in 'ok', like a message, are not matched."""
+
+    temperature_pattern = re.compile(r'\b(T\d*|B|C):\s*(-?\d+(?:\.\d*)?)\s*/\s*(-?\d+(?:\.\d*)?)')
+    """Pattern matching the heaters in the reply to a M105 command, for example 'T0:175.2 /175.0 B:60.1 /60.0'"""
+
     def __init__(self, port):
         """Code run when the diabase object is initialised. This initialises the communication with printer.
 
@@ -18,6 +48,36 @@ class diabase:
         """
         self.ser = serial.Serial(port,baudrate=57600,timeout=0.01)
         
+    @staticmethod
+    def identify(port, timeout=0.5):
+        """Function for checking if a Duet is connected to a port. A M115 command is sent and the port is checked for a reply with the firmware description.
+
+        :param port: The full name of the port to check. Example: 'COM1'
+        :param timeout: The maximum time to wait for a reply in seconds
+        :return: The firmware description if a Duet replied, otherwise None
+        :rtype: string
+        """
+        try:
+            ser = serial.Serial(port,baudrate=57600,timeout=0.05)
+        except serial.serialutil.SerialException:
+            return None
+        try:
+            ser.reset_input_buffer()
+            ser.write(b'M115\r\n')
+            deadline = time.time() + timeout
+            answer = b''
+            while time.time() < deadline:
+                answer = answer + ser.read(64)
+                #only look at complete lines
+                for line in answer.split(b'\n')[:-1]:
+                    if b'FIRMWARE_NAME' in line:
+                        return line.decode('utf-8','replace').strip()
+        except serial.serialutil.SerialException:
+            return None
+        finally:
+            ser.close()
+        return None
+
     def write_line(self,string,attempts):
         """Write a line of GCODE to the printer. This function will wait for an 'OK' from the printer, meaning that the command has finished executing (except for G1 commands). If it takes too to many attempts for the printer give an answer it will be assumed something went wrong and the function will return anyways.
 
@@ -38,7 +98,18 @@ class diabase:
                 old_result = new_result
                 if watchdog > attempts:
                     print('watchdog in write_line triggered! String to ok: '+string)
-                    break   
+                    break
+
+    def write_lines(self,lines,timeout):
+        """Write several lines of GCODE to the printer in a single write and wait for the 'ok' of each of them, such that the printer does not have to wait for the computer between the lines.
+
+        :param lines: List with the lines of GCODE to write to the printer
+        :param timeout: The maximum time to wait for all 'ok's in seconds
+        :return: List with the lines received before the last 'ok', without the 'ok' lines
+        :rtype: list
+        """
+        self.ser.write(b''.join(line.encode('utf-8')+b'\r\n' for line in lines))
+        return self.read_replies(len(lines),timeout)
 
     def set_tool_offset(self, tool, pos):
         """Function for setting tool offsets.
@@ -112,6 +183,195 @@ class diabase:
             print(new_offset['z'])
         self.set_tool_offset(tool, new_offset)
         
+    def read_replies(self,count,timeout):
+        """Function for reading the replies to commands that have been sent to the printer, until an 'ok' has been received for each of them.
+
+        :param count: The number of commands of which the 'ok' is awaited
+        :param timeout: The maximum time to wait for all replies in seconds
+        :return: List with the lines received before the last 'ok', without the 'ok' lines
+        :rtype: list
+        """
+        lines = []
+        buffer = b''
+        oks = 0
+        deadline = time.time() + timeout
+        while oks < count:
+            if time.time() > deadline:
+                raise RuntimeError('Printer did not reply to ' + str(count-oks) + ' of ' + str(count) + ' commands')
+            buffer = buffer + self.ser.read(max(self.ser.in_waiting,1))
+            *complete, buffer = buffer.split(b'\n')
+            for line in complete:
+                line = line.decode('utf-8','replace').strip()
+                match = self.ok_pattern.match(line)
+                if match is not None:
+                    oks = oks + 1
+                    line = match.group(1) or ''
+                if line:
+                    lines.append(line)
+        return lines
+
+    def query(self,string,timeout=1):
+        """Function for sending a command to the printer and getting its reply. Any old replies waiting in the input buffer are discarded first.
+
+        :param string: The line of GCODE to write to the printer
+        :param timeout: The maximum time to wait for the reply in seconds
+        :return: List with the lines of the reply, without the 'ok'
+        :rtype: list
+        """
+        self.ser.reset_input_buffer()
+        self.ser.write(string.encode('utf-8')+b'\r\n')
+        return self.read_replies(1,timeout)
+
+    @classmethod
+    def parse_position(cls,lines):
+        """Function for parsing the reply to a M114 command
+
+        :param lines: List with the lines of the reply
+        :return: Dict with the keys 'x', 'y' and 'z' with the current position in the corresponding direction
+        :rtype: Dict
+        """
+        for line in lines:
+            match = cls.position_pattern.search(line)
+            if match is not None:
+                return {'x':float(match.group(1)), 'y':float(match.group(2)), 'z':float(match.group(3))}
+        raise RuntimeError('No position found in reply: ' + ' '.join(lines))
+
+    @classmethod
+    def parse_temperatures(cls,lines):
+        """Function for parsing the reply to a M105 command
+
+        :param lines: List with the lines of the reply
+        :return: Dict with a :data:`temperature` for each heater. The key is 'bed' for the bed heater, 'chamber' for the chamber heater and the heater number for the tool heaters
+        :rtype: Dict
+        """
+        temperatures = {}
+        for line in lines:
+            for heater, current, target in cls.temperature_pattern.findall(line):
+                if heater == 'B':
+                    heater = 'bed'
+                elif heater == 'C':
+                    heater = 'chamber'
+                else:
+                    heater = int(heater[1:] or 0)
+                temperatures[heater] = temperature(float(current),float(target))
+        if not temperatures:
+            raise RuntimeError('No temperatures found in reply: ' + ' '.join(lines))
+        return temperatures
+
+    @classmethod
+    def parse_tool_offsets(cls,lines):
+        """Function for parsing the replies to G10 Pn commands
+
+        :param lines: List with the lines of the replies
+        :return: Dict with for each tool reported a dict with the keys 'x', 'y' and 'z' with its tool offset, and the key 'resolution' with the smallest step in which the printer reports the offset
+        :rtype: Dict
+        """
+        offsets = {}
+        for line in lines:
+            match = cls.tool_offset_pattern.search(line)
+            if match is None:
+                continue
+            offset = {}
+            steps = []
+            for axis, value, decimals in cls.axis_pattern.findall(match.group(2)):
+                offset[axis.lower()] = float(value)
+                #an offset printed without decimals, like X0, does not tell the step of the firmware
+                if decimals:
+                    steps.append(10**-len(decimals))
+            offset['resolution'] = min(max(steps),cls.max_offset_resolution) if steps else cls.offset_resolution
+            offsets[int(match.group(1))] = offset
+        return offsets
+
+    def get_temperatures(self,timeout=1):
+        """Function for getting the temperatures of all heaters using a M105 command
+
+        :param timeout: The maximum time to wait for the reply in seconds
+        :return: Dict with a :data:`temperature` for each heater, see :meth:`diabase.parse_temperatures`
+        :rtype: Dict
+        """
+        return self.parse_temperatures(self.query('M105',timeout))
+
+    def get_tool_heaters(self,tools,timeout=2):
+        """Function for getting the heater of several tools at once. A M563 Pn command for each tool is sent in a single write, and the heaters are parsed from the tool reports. Tools of which no heater is reported are assumed to use the heater with the same number as the tool.
+
+        :param tools: List with the tool numbers
+        :param timeout: The maximum time to wait for all replies in seconds
+        :return: Dict with the heater number for each tool
+        :rtype: Dict
+        """
+        self.ser.reset_input_buffer()
+        self.ser.write(b''.join(b'M563 P' + str(tool).encode('utf-8') + b'\r\n' for tool in tools))
+        heaters = {tool:tool for tool in tools}
+        for line in self.read_replies(len(tools),timeout):
+            match = self.tool_heater_pattern.search(line)
+            if match is not None:
+                heaters[int(match.group(1))] = int(match.group(2))
+        return heaters
+
+    def get_tool_offsets(self,tools,timeout=2):
+        """Function for getting the tool offsets of several tools at once. A G10 Pn command for each tool is sent in a single write, and the tool offset reports are parsed from the replies. No tool changes are needed.
+
+        :param tools: List with the tool numbers
+        :param timeout: The maximum time to wait for all replies in seconds
+        :return: Dict with for each tool a dict with the keys 'x', 'y' and 'z' with its tool offset, and the key 'resolution' with the smallest step in which the printer reports the offset
+        :rtype: Dict
+        """
+        self.ser.reset_input_buffer()
+        self.ser.write(b''.join(b'G10 P' + str(tool).encode('utf-8') + b'\r\n' for tool in tools))
+        offsets = self.parse_tool_offsets(self.read_replies(len(tools),timeout))
+        missing = [tool for tool in tools if tool not in offsets]
+        if missing:
+            raise RuntimeError('No tool offset reported for tool(s) ' + ', '.join(str(tool) for tool in missing))
+        return offsets
+
+    def set_tool_offsets(self,offsets,timeout=2):
+        """Function for setting the tool offsets of several tools at once. The G10 commands of all tools are sent in a single write, after which the 'ok' of each command is awaited.
+
+        :param offsets: Dict with for each tool number a dict with the tool offsets, see :meth:`diabase.set_tool_offset`
+        :param timeout: The maximum time to wait for all replies in seconds
+        :return: None
+        :rtype: None
+        """
+        commands = b''
+        for tool in offsets:
+            string = 'G10 P' + str(tool)
+            for axis in ['x','y','z']:
+                if axis in offsets[tool]:
+                    string = string + ' ' + axis.upper() + '%.4f' % offsets[tool][axis]
+            commands = commands + string.encode('utf-8') + b'\r\n'
+        self.ser.write(commands)
+        self.read_replies(len(offsets),timeout)
+
+    def set_tool_offsets_differential(self,extra_offsets,timeout=2):
+        """Function for setting the tool offsets of several tools relative to their current tool offsets, without selecting the tools. To do so the printer will:
+
+        *  Report the current tool offsets of all tools using :meth:`diabase.get_tool_offsets`
+        *  Set the tool offsets of all tools to the current tool offset plus the additional tool offset using :meth:`diabase.set_tool_offsets`
+        *  Report the tool offsets of all tools again, to verify that they have been set
+
+        :param extra_offsets: Dict with for each tool number a dict with the additional tool offsets. The function expect a key 'x', 'y' or 'z' with the additional tool offset in the corresponding direction.
+        :param timeout: The maximum time to wait for the replies of each step in seconds
+        :return: Dict with the new tool offsets for each tool number
+        :rtype: Dict
+        """
+        tools = list(extra_offsets)
+        current = self.get_tool_offsets(tools,timeout)
+
+        new_offsets = {}
+        for tool in tools:
+            new_offsets[tool] = {}
+            for axis in extra_offsets[tool]:
+                new_offsets[tool][axis] = current[tool][axis] + extra_offsets[tool][axis]
+        self.set_tool_offsets(new_offsets,timeout)
+
+        #the printer reports the offsets rounded, so allow for half a step of difference
+        readback = self.get_tool_offsets(tools,timeout)
+        for tool in tools:
+            for axis in new_offsets[tool]:
+                if abs(readback[tool][axis] - new_offsets[tool][axis]) > readback[tool]['resolution']/2 + 1e-9:
+                    raise RuntimeError('Tool offset ' + axis + ' of tool ' + str(tool) + ' is ' + str(readback[tool][axis]) + ' instead of ' + str(new_offsets[tool][axis]))
+        return new_offsets
+
     def store_offset_parameters(self):
         """Function for storing the current tool offsets in flash such that they will still be there when the printer is restarted.
 
@@ -122,69 +382,14 @@ class diabase:
         string = 'M500 P10'
         self.ser.write(string.encode('utf-8')+b'\r\n')
 
-    def get_current_position(self):
-        """Function for getting the current position of the printer using a M114 command
+    def get_current_position(self,timeout=1):
+        """Function for getting the current position of the printer using a M114 command. The reply is read line by line, so this can also be used to poll the position at a high rate. While waiting for the reply the serial port blocks, so no processor time is used.
 
+        :param timeout: The maximum time to wait for the reply in seconds
         :return: Dict with the current position. The dict contains a key 'x', 'y' or 'z' with the current position in the corresponding direction.
         :rtype: Dict
         """
-        string = 'M114'
-        self.ser.write(string.encode('utf-8')+b'\r\n')
-        answer = list()
-        x_str = b''
-        y_str = b''
-        z_str = b''
-        answer.append(self.ser.read(1))
-        while(1):
-            answer.append(self.ser.read(1))
-            #print(answer)
-            if answer[-2] == b'X' and answer[-1]== b':':
-                while(1):
-                    answer.append(self.ser.read(1))
-                    if answer[-1] == b' ':
-                        break
-                    else:
-                        x_str = x_str + answer[-1]
-                        
-            if answer[-2] == b'Y' and answer[-1]== b':':
-                while(1):
-                    answer.append(self.ser.read(1))
-                    if answer[-1] == b' ':
-                        break
-                    else:
-                        y_str = y_str + answer[-1]
-                        
-            if answer[-2] == b'Z' and answer[-1]== b':':
-                while(1):
-                    answer.append(self.ser.read(1))
-                    if answer[-1] == b' ':
-                        break
-                    else:
-                        z_str = z_str + answer[-1]
-
-            # if answer[-2] == b'o' and answer[-1]== b'k':
-            #     self.ser.write(string.encode('utf-8')+b'\r\n')
-            if len(x_str) > 0 and len(y_str) > 0 and len(z_str) > 0:
-                break
-        
-        pos = {}
-        try:
-            pos['x'] = float(x_str.decode("utf-8"))
-        except:
-            pos['x'] = 0
-            print('Could not decode x value')
-
-        try:
-            pos['y'] = float(y_str.decode("utf-8"))
-        except:
-            pos['y'] = 0
-            print('Could not decode y value')
-        try:
-            pos['z'] = float(z_str.decode("utf-8"))
-        except:
-            pos['z'] = 0
-            print('Could not decode z value')
-        return pos
+        return self.parse_position(self.query('M114',timeout))
 
     def close(self):
         """Function for closing the serial communication with the printer
@@ -0,0 +1,203 @@
+"""
+.. module:: dsp
+    :synopsis: This module contains the streaming filters for the inductance samples of the LDC1101EVM
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+The filters process blocks of samples at once using NumPy and keep their state between blocks, such that filtering a signal in blocks gives the same result as filtering it at once. The ldc1101evm class passes every block of decoded samples through the filter set in :attr:`ldc1101evm.ldc1101evm.filter`.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+class stream_filter:
+    """Base class of the streaming filters. A filter maps a block of samples to a block of filtered samples of the same length.
+    """
+
+    rejected = 0
+    """The number of samples replaced because they were outliers"""
+
+    def process(self,block):
+        """Function for filtering a block of samples
+
+        :param block: Array with the samples, in order of arrival
+        :return: Array with the filtered samples
+        :rtype: numpy array
+        """
+        return np.asarray(block,dtype=float)
+
+    def reset(self):
+        """Function for forgetting the samples seen so far, such that the next block is filtered as the start of a new signal
+
+        :return: None
+        :rtype: None
+        """
+        pass
+
+class moving_average(stream_filter):
+    """Filter averaging each sample with the samples before it. At the start of the signal the average is taken over the samples available.
+    """
+
+    def __init__(self,length):
+        """Code run when the filter is initialised.
+
+        :param length: The number of samples to average over
+        :return: None
+        :rtype: None
+        """
+        self.length = length
+        self.reset()
+
+    def process(self,block):
+        signal = np.concatenate([self.history,np.asarray(block,dtype=float)])
+        cumulative = np.concatenate([[0],np.cumsum(signal)])
+        end = np.arange(len(self.history)+1,len(signal)+1)
+        start = np.maximum(end-self.length,0)
+        self.history = signal[-(self.length-1):] if self.length > 1 else signal[:0]
+        return (cumulative[end]-cumulative[start])/(end-start)
+
+    def reset(self):
+        self.history = np.zeros(0)
+
+class median_filter(stream_filter):
+    """Filter taking the median of each sample and the samples before it. This removes spikes shorter than half the length of the filter without smearing out steps. At the start of the signal the first sample is repeated to fill the window.
+    """
+
+    def __init__(self,length):
+        """Code run when the filter is initialised.
+
+        :param length: The number of samples to take the median of
+        :return: None
+        :rtype: None
+        """
+        self.length = length
+        self.reset()
+
+    def process(self,block):
+        block = np.asarray(block,dtype=float)
+        if len(block) == 0:
+            return block
+        if self.history is None:
+            self.history = np.full(self.length-1,block[0])
+        signal = np.concatenate([self.history,block])
+        self.history = signal[len(signal)-(self.length-1):]
+        return np.median(sliding_window_view(signal,self.length),axis=1)
+
+    def reset(self):
+        self.history = None
+
+class iir_lowpass(stream_filter):
+    """First order infinite impulse response low-pass filter. Note that it delays the signal by about 1/(2*pi*cutoff) seconds.
+    """
+
+    def __init__(self,cutoff,sample_rate):
+        """Code run when the filter is initialised.
+
+        :param cutoff: The -3 dB frequency in Hz
+        :param sample_rate: The rate at which the samples arrive in Hz
+        :return: None
+        :rtype: None
+        """
+        self.alpha = 1-np.exp(-2*np.pi*cutoff/sample_rate)
+        self.reset()
+
+    def process(self,block):
+        from scipy.signal import lfilter
+        block = np.asarray(block,dtype=float)
+        if len(block) == 0:
+            return block
+        if self.state is None:
+            #start at the first sample instead of at zero
+            self.state = np.array([(1-self.alpha)*block[0]])
+        filtered, self.state = lfilter([self.alpha],[1,self.alpha-1],block,zi=self.state)
+        return filtered
+
+    def reset(self):
+        self.state = None
+
+class outlier_rejection(stream_filter):
+    """Filter replacing samples that lie far from the median of the samples before them by that median. The spread of the samples is estimated using the median absolute deviation, such that the outliers themselves hardly affect it.
+    """
+
+    def __init__(self,length,threshold):
+        """Code run when the filter is initialised.
+
+        :param length: The number of preceding samples to compare each sample with
+        :param threshold: The number of standard deviations a sample may differ from the median before it is rejected
+        :return: None
+        :rtype: None
+        """
+        self.length = length
+        self.threshold = threshold
+        self.rejected = 0
+        self.reset()
+
+    def process(self,block):
+        block = np.asarray(block,dtype=float)
+        if len(block) == 0:
+            return block
+        if self.history is None:
+            self.history = np.full(self.length,block[0])
+        signal = np.concatenate([self.history,block])
+        windows = sliding_window_view(signal[:-1],self.length)
+        median = np.median(windows,axis=1)
+        sigma = 1.4826*np.median(np.abs(windows-median[:,np.newaxis]),axis=1)
+        outliers = np.abs(block-median) > self.threshold*sigma
+        #a constant signal has no spread, so only changes are rejected then
+        outliers &= sigma > 0
+        self.rejected = self.rejected + int(outliers.sum())
+        self.history = signal[-self.length:]
+        return np.where(outliers,median,block)
+
+    def reset(self):
+        self.history = None
+
+class filter_chain(stream_filter):
+    """Filter applying several filters after each other
+    """
+
+    def __init__(self,*filters):
+        """Code run when the filter is initialised.
+
+        :param filters: The filters, in the order in which they are applied
+        :return: None
+        :rtype: None
+        """
+        self.filters = filters
+
+    @property
+    def rejected(self):
+        """The number of samples replaced because they were outliers, by all filters together"""
+        return sum(stage.rejected for stage in self.filters)
+
+    def process(self,block):
+        for stage in self.filters:
+            block = stage.process(block)
+        return block
+
+    def reset(self):
+        for stage in self.filters:
+            stage.reset()
+
+filter_names = ['none','outlier rejection','median','moving average','low-pass','outlier rejection + low-pass']
+"""The names of the filters that can be created with :func:`create_filter`"""
+
+def create_filter(name,sample_rate):
+    """Function for creating one of the standard filters by name. The low-pass filters have a cutoff of a twentieth of the sample rate.
+
+    :param name: One of the names in :data:`filter_names`
+    :param sample_rate: The rate at which the samples arrive in Hz
+    :return: The filter, or None for 'none'
+    :rtype: stream_filter
+    """
+    if name == 'none':
+        return None
+    if name == 'outlier rejection':
+        return outlier_rejection(15,4)
+    if name == 'median':
+        return median_filter(5)
+    if name == 'moving average':
+        return moving_average(5)
+    if name == 'low-pass':
+        return iir_lowpass(sample_rate/20,sample_rate)
+    if name == 'outlier rejection + low-pass':
+        return filter_chain(outlier_rejection(15,4),iir_lowpass(sample_rate/20,sample_rate))
+    raise ValueError('unknown filter ' + name)
@@ -0,0 +1,159 @@
+"""
+.. module:: heating
+    :synopsis: This module heats up the printer without blocking on a single M116
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+The temperatures are polled with M105, such that they can be shown while heating and each tool can be used as soon as its own heater has reached its setpoint.
+"""
+from time import sleep, time
+
+class heat_up_manager:
+    """Class for setting the temperatures of the tools and the bed and waiting for them individually
+    """
+
+    tolerance = 2
+    """The maximum difference in degrees Celcius between the temperature of a heater and its setpoint for it to be considered at temperature, like M116"""
+
+    poll_interval = 1.0
+    """The time between two M105 commands while waiting in seconds"""
+
+    timeout = 900
+    """The maximum time to wait for a heater in seconds"""
+
+    minimum_temperature = 20
+    """Setpoints at or below this temperature in degrees Celcius mean the heater is off, so there is nothing to wait for"""
+
+    def __init__(self,printer):
+        """Code run when the heat_up_manager object is initialised.
+
+        :param printer: The :class:`diabase.diabase` object to control the heaters with
+        :return: None
+        :rtype: None
+        """
+        self.printer = printer
+        self.targets = {}
+        self.bed_target = 0
+        self.heaters = {}
+        self.temperatures = {}
+        self.last_poll = 0
+
+    def start(self,tools,temperature,bed_temperature):
+        """Function for setting the setpoints of the tools and the bed. This does not wait for the heaters.
+
+        :param tools: List with the tool numbers to heat
+        :param temperature: The active and standby temperature of the tools in degrees Celcius
+        :param bed_temperature: The temperature of the bed in degrees Celcius
+        :return: None
+        :rtype: None
+        """
+        self.targets = {}
+        if temperature > self.minimum_temperature:
+            self.heaters = self.printer.get_tool_heaters(tools)
+            for tool in tools:
+                self.printer.write_line('G10 P%.0f R%.0f  S%.0f' % (tool,temperature,temperature),10000)
+                self.targets[tool] = temperature
+        self.printer.write_line('M140 S%.0f' % (bed_temperature),100)
+        self.bed_target = bed_temperature
+        self.poll()
+
+    def poll(self):
+        """Function for updating :attr:`heat_up_manager.temperatures` with a M105 command
+
+        :return: False if the printer did not report the temperatures, True otherwise
+        :rtype: Boolean
+        """
+        self.last_poll = time()
+        try:
+            self.temperatures = self.printer.get_temperatures()
+        except RuntimeError:
+            return False
+        return True
+
+    def tool_ready(self,tool):
+        """Function for checking if the heater of a tool is at its setpoint, according to the last poll. Like M116, a heater that the printer reports to be off is not waited for, since the printer only switches on the heater of a tool that has not been selected yet once it is selected.
+
+        :param tool: The tool number
+        :return: True if the tool is at temperature or is not heated
+        :rtype: Boolean
+        """
+        if tool not in self.targets:
+            return True
+        reading = self.temperatures.get(self.heaters.get(tool,tool))
+        if reading is None:
+            return False
+        if reading.target <= self.minimum_temperature:
+            return True
+        return abs(reading.current - self.targets[tool]) <= self.tolerance
+
+    def bed_ready(self):
+        """Function for checking if the bed is at its setpoint, according to the last poll
+
+        :return: True if the bed is at temperature or is not heated
+        :rtype: Boolean
+        """
+        if self.bed_target <= self.minimum_temperature:
+            return True
+        reading = self.temperatures.get('bed')
+        return reading is not None and abs(reading.current - self.bed_target) <= self.tolerance
+
+    def wait(self,ready,description,idle=None):
+        """Function for waiting until a condition is met, polling the temperatures every :attr:`heat_up_manager.poll_interval` seconds
+
+        :param ready: Function returning True when the wait is over
+        :param description: Description of what is waited for, used in the error message
+        :param idle: Function called repeatedly while waiting, for example to keep a GUI responsive. If it returns False the wait is aborted.
+        :return: True if the condition is met, False if the wait was aborted
+        :rtype: Boolean
+        """
+        deadline = time() + self.timeout
+        while not ready():
+            if time() > deadline:
+                raise RuntimeError(description + ' did not reach its temperature within ' + str(self.timeout) + ' s')
+            if idle is not None and idle() is False:
+                return False
+            if time() - self.last_poll >= self.poll_interval:
+                self.poll()
+            else:
+                sleep(0.05)
+        return True
+
+    def wait_for_tool(self,tool,idle=None):
+        """Function for waiting until the heater of a tool is at its setpoint, see :meth:`heat_up_manager.wait`
+
+        :param tool: The tool number
+        :param idle: Function called repeatedly while waiting
+        :return: True if the tool is at temperature, False if the wait was aborted
+        :rtype: Boolean
+        """
+        return self.wait(lambda: self.tool_ready(tool),'tool ' + str(tool),idle)
+
+    def wait_for_bed(self,idle=None):
+        """Function for waiting until the bed is at its setpoint, see :meth:`heat_up_manager.wait`
+
+        :param idle: Function called repeatedly while waiting
+        :return: True if the bed is at temperature, False if the wait was aborted
+        :rtype: Boolean
+        """
+        return self.wait(self.bed_ready,'bed',idle)
+
+    def summary(self):
+        """Function for describing the last polled temperatures. If tools are being heated their temperatures are given, otherwise those of all heaters.
+
+        :return: For example 'T10 174.8/175  T6 120.3/175  bed 24.1/0'
+        :rtype: string
+        """
+        parts = []
+        if self.targets:
+            for tool in self.targets:
+                reading = self.temperatures.get(self.heaters.get(tool,tool))
+                if reading is not None:
+                    parts.append('T%d %.1f/%.0f' % (tool,reading.current,reading.target))
+        else:
+            for heater in self.temperatures:
+                if isinstance(heater,int):
+                    parts.append('H%d %.1f/%.0f' % (heater,self.temperatures[heater].current,self.temperatures[heater].target))
+        for heater in ['bed','chamber']:
+            reading = self.temperatures.get(heater)
+            if reading is not None:
+                parts.append('%s %.1f/%.0f' % (heater,reading.current,reading.target))
+        return '  '.join(parts)
@@ -0,0 +1,134 @@
+"""
+.. module:: history
+    :synopsis: This class stores the results of calibrations in a local SQLite database
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+This way the offsets of the tools of a printer can be followed over time. Only the standard library is used, so the history is available wherever the GUI runs.
+"""
+import sqlite3
+import time
+
+class offset_history:
+    """Class for storing and querying the history of the offsets found by calibrations. Each result is stored with the printer, the tool, the axis, the nozzle temperature and the time of the calibration.
+    """
+    columns = ['printer','tool','reference_tool','axis','temperature','timestamp','offset','std','rounds','filename']
+    """The columns of the offsets table, in the order in which they are returned by :meth:`offset_history.query`"""
+
+    def __init__(self,filename='history.sqlite'):
+        """Function for opening the history database. The database and its table are created if they do not exist yet.
+
+        :param filename: The name of the SQLite database file
+        :return: None
+        :rtype: None
+        """
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS offsets (id INTEGER PRIMARY KEY, printer TEXT, tool INTEGER, reference_tool INTEGER, axis TEXT, temperature REAL, timestamp REAL, offset REAL, std REAL, rounds INTEGER, filename TEXT)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS offsets_key ON offsets (printer, tool, axis, timestamp)')
+        self.connection.commit()
+
+    def add(self,printer,tool,reference_tool,axis,temperature,offset,std,rounds,filename='',timestamp=None):
+        """Function for storing the result of a calibration of a single tool along a single axis.
+
+        :param printer: The name of the printer
+        :param tool: The number of the tool
+        :param reference_tool: The number of the tool relative to which the offset was measured
+        :param axis: The axis of the offset, 'x' or 'y'
+        :param temperature: The nozzle temperature during the calibration in degrees Celcius
+        :param offset: The found offset in mm. This is the correction still to apply on top of the tool offset set in the printer during the calibration, not the tool offset itself.
+        :param std: The standard deviation of the offset over the rounds in mm
+        :param rounds: The number of rounds the offset is based on
+        :param filename: The name of the file in which the data of the calibration was stored
+        :param timestamp: The time of the calibration in seconds since the epoch, the current time if None
+        :return: None
+        :rtype: None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self.connection.execute('INSERT INTO offsets (printer, tool, reference_tool, axis, temperature, timestamp, offset, std, rounds, filename) VALUES (?,?,?,?,?,?,?,?,?,?)',
+            (printer,int(tool),int(reference_tool),axis,float(temperature),float(timestamp),float(offset),float(std),int(rounds),filename))
+        self.connection.commit()
+
+    def query(self,printer=None,tool=None,axis=None,temperature=None,temperature_tolerance=5,since=None,limit=None):
+        """Function for getting stored calibration results, newest first. Only the arguments that are not None are used to select the results.
+
+        :param printer: The name of the printer
+        :param tool: The number of the tool
+        :param axis: The axis of the offset, 'x' or 'y'
+        :param temperature: The nozzle temperature in degrees Celcius
+        :param temperature_tolerance: The maximum difference with temperature in degrees Celcius
+        :param since: Only return results of calibrations after this time in seconds since the epoch
+        :param limit: The maximum number of results to return
+        :return: A list with a dict for each result, with the keys in :attr:`offset_history.columns`
+        :rtype: list
+        """
+        conditions = []
+        values = []
+        if printer is not None:
+            conditions.append('printer = ?')
+            values.append(printer)
+        if tool is not None:
+            conditions.append('tool = ?')
+            values.append(int(tool))
+        if axis is not None:
+            conditions.append('axis = ?')
+            values.append(axis)
+        if temperature is not None:
+            conditions.append('ABS(temperature - ?) <= ?')
+            values += [float(temperature),float(temperature_tolerance)]
+        if since is not None:
+            conditions.append('timestamp >= ?')
+            values.append(float(since))
+
+        statement = 'SELECT ' + ', '.join(self.columns) + ' FROM offsets'
+        if conditions:
+            statement += ' WHERE ' + ' AND '.join(conditions)
+        statement += ' ORDER BY timestamp DESC'
+        if limit is not None:
+            statement += ' LIMIT ?'
+            values.append(int(limit))
+
+        rows = self.connection.execute(statement,values).fetchall()
+        return [dict(zip(self.columns,row)) for row in rows]
+
+    def is_stable(self,printer,tool,axis,temperature,count=3,tolerance=0.01):
+        """Function for checking whether the offset of a tool has been stable over the last calibrations at about the same temperature. Since the stored offsets are the corrections on top of the tool offset set in the printer, the offset is only stable if none of these calibrations found a correction larger than the tolerance. A tool that keeps needing the same correction because it was never applied is therefore not stable.
+
+        :param printer: The name of the printer
+        :param tool: The number of the tool
+        :param axis: The axis of the offset, 'x' or 'y'
+        :param temperature: The nozzle temperature in degrees Celcius
+        :param count: The number of most recent calibrations that are compared
+        :param tolerance: The maximum correction in mm
+        :return: True if at least count calibrations were found and all their corrections lie within the tolerance of zero
+        :rtype: Boolean
+        """
+        results = self.query(printer,tool,axis,temperature,limit=count)
+        if len(results) < count:
+            return False
+        return all(abs(result['offset']) <= tolerance for result in results)
+
+    def close(self):
+        """Function for closing the history database
+
+        :return: None
+        :rtype: None
+        """
+        self.connection.close()
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Show the offsets stored by the inductive calibration GUI')
+    parser.add_argument('--database', default='history.sqlite', help='The history database')
+    parser.add_argument('--printer', help='Only show the results of this printer')
+    parser.add_argument('--tool', type=int, help='Only show the results of this tool')
+    parser.add_argument('--axis', choices=['x','y'], help='Only show the results of this axis')
+    parser.add_argument('--limit', type=int, default=20, help='The maximum number of results to show')
+    args = parser.parse_args()
+
+    history = offset_history(args.database)
+    for result in history.query(args.printer,args.tool,args.axis,limit=args.limit):
+        print('%s  %-12s tool %2d  %s %7.3f ± %.5f mm  (%d rounds, %.0f C)' % (time.strftime('%Y-%m-%d %H:%M',time.localtime(result['timestamp'])),result['printer'],result['tool'],result['axis'],result['offset'],result['std'],result['rounds'],result['temperature']))
+    history.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,681 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'interface.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(757, 798)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(1)
+        sizePolicy.setVerticalStretch(1)
+        sizePolicy.setHeightForWidth(MainWindow.sizePolicy().hasHeightForWidth())
+        MainWindow.setSizePolicy(sizePolicy)
+        MainWindow.setStyleSheet("background-color: rgb(255, 255, 255);")
+        self.centralwidget = QtWidgets.QWidget(MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.verticalLayout_7 = QtWidgets.QVBoxLayout(self.centralwidget)
+        self.verticalLayout_7.setContentsMargins(10, 10, 10, 10)
+        self.verticalLayout_7.setObjectName("verticalLayout_7")
+        self.horizontalLayout_9 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_9.setContentsMargins(0, 0, 0, 0)
+        self.horizontalLayout_9.setObjectName("horizontalLayout_9")
+        self.verticalLayout_5 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_5.setObjectName("verticalLayout_5")
+        self.horizontalLayout_6 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_6.setObjectName("horizontalLayout_6")
+        self.formLayout = QtWidgets.QFormLayout()
+        self.formLayout.setObjectName("formLayout")
+        self.x_label = QtWidgets.QLabel(self.centralwidget)
+        self.x_label.setObjectName("x_label")
+        self.formLayout.setWidget(0, QtWidgets.QFormLayout.LabelRole, self.x_label)
+        self.x_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.x_box.setSuffix("")
+        self.x_box.setMinimum(-999.99)
+        self.x_box.setMaximum(999.99)
+        self.x_box.setSingleStep(0.1)
+        self.x_box.setObjectName("x_box")
+        self.formLayout.setWidget(0, QtWidgets.QFormLayout.FieldRole, self.x_box)
+        self.y_label = QtWidgets.QLabel(self.centralwidget)
+        self.y_label.setObjectName("y_label")
+        self.formLayout.setWidget(1, QtWidgets.QFormLayout.LabelRole, self.y_label)
+        self.y_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.y_box.setMinimum(-999.99)
+        self.y_box.setMaximum(999.99)
+        self.y_box.setSingleStep(0.1)
+        self.y_box.setObjectName("y_box")
+        self.formLayout.setWidget(1, QtWidgets.QFormLayout.FieldRole, self.y_box)
+        self.z_label = QtWidgets.QLabel(self.centralwidget)
+        self.z_label.setObjectName("z_label")
+        self.formLayout.setWidget(2, QtWidgets.QFormLayout.LabelRole, self.z_label)
+        self.z_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.z_box.setMaximum(999.99)
+        self.z_box.setSingleStep(0.1)
+        self.z_box.setObjectName("z_box")
+        self.formLayout.setWidget(2, QtWidgets.QFormLayout.FieldRole, self.z_box)
+        self.z_label_2 = QtWidgets.QLabel(self.centralwidget)
+        self.z_label_2.setObjectName("z_label_2")
+        self.formLayout.setWidget(3, QtWidgets.QFormLayout.LabelRole, self.z_label_2)
+        self.range_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.range_box.setObjectName("range_box")
+        self.formLayout.setWidget(3, QtWidgets.QFormLayout.FieldRole, self.range_box)
+        self.z_label_3 = QtWidgets.QLabel(self.centralwidget)
+        self.z_label_3.setObjectName("z_label_3")
+        self.formLayout.setWidget(4, QtWidgets.QFormLayout.LabelRole, self.z_label_3)
+        self.speed_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.speed_box.setObjectName("speed_box")
+        self.formLayout.setWidget(4, QtWidgets.QFormLayout.FieldRole, self.speed_box)
+        self.temp_label = QtWidgets.QLabel(self.centralwidget)
+        self.temp_label.setObjectName("temp_label")
+        self.formLayout.setWidget(5, QtWidgets.QFormLayout.LabelRole, self.temp_label)
+        self.temp_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.temp_box.setMaximum(9999)
+        self.temp_box.setObjectName("temp_box")
+        self.formLayout.setWidget(5, QtWidgets.QFormLayout.FieldRole, self.temp_box)
+        self.temp_label_2 = QtWidgets.QLabel(self.centralwidget)
+        self.temp_label_2.setObjectName("temp_label_2")
+        self.formLayout.setWidget(6, QtWidgets.QFormLayout.LabelRole, self.temp_label_2)
+        self.bed_temp_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.bed_temp_box.setMaximum(9999)
+        self.bed_temp_box.setObjectName("bed_temp_box")
+        self.formLayout.setWidget(6, QtWidgets.QFormLayout.FieldRole, self.bed_temp_box)
+        self.cooldown_label = QtWidgets.QLabel(self.centralwidget)
+        self.cooldown_label.setObjectName("cooldown_label")
+        self.formLayout.setWidget(7, QtWidgets.QFormLayout.LabelRole, self.cooldown_label)
+        self.cooldown_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.cooldown_box.setSingleStep(0.5)
+        self.cooldown_box.setProperty("value", 3.0)
+        self.cooldown_box.setObjectName("cooldown_box")
+        self.formLayout.setWidget(7, QtWidgets.QFormLayout.FieldRole, self.cooldown_box)
+        self.horizontalLayout_6.addLayout(self.formLayout)
+        self.verticalLayout_3 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_3.setObjectName("verticalLayout_3")
+        self.label_7 = QtWidgets.QLabel(self.centralwidget)
+        self.label_7.setObjectName("label_7")
+        self.verticalLayout_3.addWidget(self.label_7)
+        self.label_6 = QtWidgets.QLabel(self.centralwidget)
+        self.label_6.setObjectName("label_6")
+        self.verticalLayout_3.addWidget(self.label_6)
+        self.label_5 = QtWidgets.QLabel(self.centralwidget)
+        self.label_5.setObjectName("label_5")
+        self.verticalLayout_3.addWidget(self.label_5)
+        self.label_4 = QtWidgets.QLabel(self.centralwidget)
+        self.label_4.setObjectName("label_4")
+        self.verticalLayout_3.addWidget(self.label_4)
+        self.label_3 = QtWidgets.QLabel(self.centralwidget)
+        self.label_3.setObjectName("label_3")
+        self.verticalLayout_3.addWidget(self.label_3)
+        self.label_11 = QtWidgets.QLabel(self.centralwidget)
+        self.label_11.setObjectName("label_11")
+        self.verticalLayout_3.addWidget(self.label_11)
+        self.label_12 = QtWidgets.QLabel(self.centralwidget)
+        self.label_12.setObjectName("label_12")
+        self.verticalLayout_3.addWidget(self.label_12)
+        self.label_15 = QtWidgets.QLabel(self.centralwidget)
+        self.label_15.setObjectName("label_15")
+        self.verticalLayout_3.addWidget(self.label_15)
+        self.horizontalLayout_6.addLayout(self.verticalLayout_3)
+        self.verticalLayout_5.addLayout(self.horizontalLayout_6)
+        self.verticalLayout_4 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_4.setObjectName("verticalLayout_4")
+        self.duet_label = QtWidgets.QLabel(self.centralwidget)
+        self.duet_label.setObjectName("duet_label")
+        self.verticalLayout_4.addWidget(self.duet_label)
+        self.duet_combo = QtWidgets.QComboBox(self.centralwidget)
+        self.duet_combo.setMaximumSize(QtCore.QSize(300, 16777215))
+        self.duet_combo.setObjectName("duet_combo")
+        self.verticalLayout_4.addWidget(self.duet_combo)
+        self.ldc_label = QtWidgets.QLabel(self.centralwidget)
+        self.ldc_label.setObjectName("ldc_label")
+        self.verticalLayout_4.addWidget(self.ldc_label)
+        self.ldc_combo = QtWidgets.QComboBox(self.centralwidget)
+        self.ldc_combo.setMaximumSize(QtCore.QSize(300, 16777215))
+        self.ldc_combo.setObjectName("ldc_combo")
+        self.verticalLayout_4.addWidget(self.ldc_combo)
+        self.reference_label = QtWidgets.QLabel(self.centralwidget)
+        self.reference_label.setObjectName("reference_label")
+        self.verticalLayout_4.addWidget(self.reference_label)
+        self.reference_combo = QtWidgets.QComboBox(self.centralwidget)
+        self.reference_combo.setMaximumSize(QtCore.QSize(300, 16777215))
+        self.reference_combo.setObjectName("reference_combo")
+        self.verticalLayout_4.addWidget(self.reference_combo)
+        self.profile_label = QtWidgets.QLabel(self.centralwidget)
+        self.profile_label.setObjectName("profile_label")
+        self.verticalLayout_4.addWidget(self.profile_label)
+        self.horizontalLayout_11 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_11.setObjectName("horizontalLayout_11")
+        self.profile_combo = QtWidgets.QComboBox(self.centralwidget)
+        self.profile_combo.setObjectName("profile_combo")
+        self.horizontalLayout_11.addWidget(self.profile_combo)
+        self.auto_tune_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.auto_tune_box.setObjectName("auto_tune_box")
+        self.horizontalLayout_11.addWidget(self.auto_tune_box)
+        self.noise_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.noise_box.setDecimals(3)
+        self.noise_box.setSingleStep(0.01)
+        self.noise_box.setProperty("value", 0.05)
+        self.noise_box.setObjectName("noise_box")
+        self.horizontalLayout_11.addWidget(self.noise_box)
+        self.verticalLayout_4.addLayout(self.horizontalLayout_11)
+        self.filter_label = QtWidgets.QLabel(self.centralwidget)
+        self.filter_label.setObjectName("filter_label")
+        self.verticalLayout_4.addWidget(self.filter_label)
+        self.filter_combo = QtWidgets.QComboBox(self.centralwidget)
+        self.filter_combo.setObjectName("filter_combo")
+        self.verticalLayout_4.addWidget(self.filter_combo)
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.connect_button = QtWidgets.QPushButton(self.centralwidget)
+        self.connect_button.setObjectName("connect_button")
+        self.horizontalLayout.addWidget(self.connect_button)
+        self.reload_button = QtWidgets.QPushButton(self.centralwidget)
+        self.reload_button.setObjectName("reload_button")
+        self.horizontalLayout.addWidget(self.reload_button)
+        self.verticalLayout_4.addLayout(self.horizontalLayout)
+        self.verticalLayout_5.addLayout(self.verticalLayout_4)
+        self.horizontalLayout_5 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_5.setObjectName("horizontalLayout_5")
+        self.verticalLayout_2 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_2.setObjectName("verticalLayout_2")
+        self.label = QtWidgets.QLabel(self.centralwidget)
+        self.label.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.label.setObjectName("label")
+        self.verticalLayout_2.addWidget(self.label)
+        self.tool_list_list = QtWidgets.QListWidget(self.centralwidget)
+        self.tool_list_list.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.tool_list_list.setSelectionMode(QtWidgets.QAbstractItemView.MultiSelection)
+        self.tool_list_list.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectItems)
+        self.tool_list_list.setObjectName("tool_list_list")
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        item = QtWidgets.QListWidgetItem()
+        self.tool_list_list.addItem(item)
+        self.verticalLayout_2.addWidget(self.tool_list_list)
+        self.horizontalLayout_5.addLayout(self.verticalLayout_2)
+        self.verticalLayout = QtWidgets.QVBoxLayout()
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.label_2 = QtWidgets.QLabel(self.centralwidget)
+        self.label_2.setAlignment(QtCore.Qt.AlignBottom|QtCore.Qt.AlignLeading|QtCore.Qt.AlignLeft)
+        self.label_2.setObjectName("label_2")
+        self.verticalLayout.addWidget(self.label_2)
+        self.ref_combo = QtWidgets.QComboBox(self.centralwidget)
+        self.ref_combo.setObjectName("ref_combo")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.ref_combo.addItem("")
+        self.verticalLayout.addWidget(self.ref_combo)
+        self.ascend_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.ascend_box.setCheckable(True)
+        self.ascend_box.setChecked(True)
+        self.ascend_box.setTristate(False)
+        self.ascend_box.setObjectName("ascend_box")
+        self.verticalLayout.addWidget(self.ascend_box)
+        self.descend_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.descend_box.setObjectName("descend_box")
+        self.verticalLayout.addWidget(self.descend_box)
+        self.label_13 = QtWidgets.QLabel(self.centralwidget)
+        self.label_13.setText("")
+        self.label_13.setObjectName("label_13")
+        self.verticalLayout.addWidget(self.label_13)
+        self.fan_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.fan_box.setObjectName("fan_box")
+        self.verticalLayout.addWidget(self.fan_box)
+        self.homing_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.homing_box.setObjectName("homing_box")
+        self.verticalLayout.addWidget(self.homing_box)
+        self.drift_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.drift_box.setObjectName("drift_box")
+        self.verticalLayout.addWidget(self.drift_box)
+        self.horizontalLayout_16 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_16.setObjectName("horizontalLayout_16")
+        self.early_stop_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.early_stop_box.setObjectName("early_stop_box")
+        self.horizontalLayout_16.addWidget(self.early_stop_box)
+        self.early_stop_error_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.early_stop_error_box.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.early_stop_error_box.setDecimals(4)
+        self.early_stop_error_box.setSingleStep(0.001)
+        self.early_stop_error_box.setProperty("value", 0.005)
+        self.early_stop_error_box.setObjectName("early_stop_error_box")
+        self.horizontalLayout_16.addWidget(self.early_stop_error_box)
+        self.verticalLayout.addLayout(self.horizontalLayout_16)
+        self.template_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.template_box.setObjectName("template_box")
+        self.verticalLayout.addWidget(self.template_box)
+        self.capture_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.capture_box.setObjectName("capture_box")
+        self.verticalLayout.addWidget(self.capture_box)
+        self.graph_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.graph_box.setChecked(True)
+        self.graph_box.setObjectName("graph_box")
+        self.verticalLayout.addWidget(self.graph_box)
+        self.telemetry_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.telemetry_box.setObjectName("telemetry_box")
+        self.verticalLayout.addWidget(self.telemetry_box)
+        self.acquisition_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.acquisition_box.setObjectName("acquisition_box")
+        self.verticalLayout.addWidget(self.acquisition_box)
+        self.horizontalLayout_5.addLayout(self.verticalLayout)
+        self.verticalLayout_5.addLayout(self.horizontalLayout_5)
+        self.horizontalLayout_9.addLayout(self.verticalLayout_5)
+        self.verticalLayout_6 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_6.setObjectName("verticalLayout_6")
+        self.sig_graph = PlotWidget(self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(1)
+        sizePolicy.setVerticalStretch(1)
+        sizePolicy.setHeightForWidth(self.sig_graph.sizePolicy().hasHeightForWidth())
+        self.sig_graph.setSizePolicy(sizePolicy)
+        self.sig_graph.setObjectName("sig_graph")
+        self.verticalLayout_6.addWidget(self.sig_graph)
+        self.horizontalLayout_4 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_4.setObjectName("horizontalLayout_4")
+        self.clear_figure_button = QtWidgets.QPushButton(self.centralwidget)
+        self.clear_figure_button.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.clear_figure_button.setObjectName("clear_figure_button")
+        self.horizontalLayout_4.addWidget(self.clear_figure_button)
+        self.stop_button = QtWidgets.QPushButton(self.centralwidget)
+        self.stop_button.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.stop_button.setObjectName("stop_button")
+        self.horizontalLayout_4.addWidget(self.stop_button)
+        self.test_sensor_button = QtWidgets.QPushButton(self.centralwidget)
+        self.test_sensor_button.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.test_sensor_button.setObjectName("test_sensor_button")
+        self.horizontalLayout_4.addWidget(self.test_sensor_button)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_4)
+        self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_3.setObjectName("horizontalLayout_3")
+        self.cal_y_button = QtWidgets.QPushButton(self.centralwidget)
+        self.cal_y_button.setMaximumSize(QtCore.QSize(150, 16777215))
+        self.cal_y_button.setObjectName("cal_y_button")
+        self.horizontalLayout_3.addWidget(self.cal_y_button)
+        self.cal_x_button = QtWidgets.QPushButton(self.centralwidget)
+        self.cal_x_button.setMaximumSize(QtCore.QSize(150, 16777215))
+        self.cal_x_button.setObjectName("cal_x_button")
+        self.horizontalLayout_3.addWidget(self.cal_x_button)
+        self.cal_xy_button = QtWidgets.QPushButton(self.centralwidget)
+        self.cal_xy_button.setMaximumSize(QtCore.QSize(150, 16777215))
+        self.cal_xy_button.setObjectName("cal_xy_button")
+        self.horizontalLayout_3.addWidget(self.cal_xy_button)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_3)
+        self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_2.setObjectName("horizontalLayout_2")
+        self.label_8 = QtWidgets.QLabel(self.centralwidget)
+        self.label_8.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.label_8.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_8.setObjectName("label_8")
+        self.horizontalLayout_2.addWidget(self.label_8)
+        self.rounds_y_spinner = QtWidgets.QSpinBox(self.centralwidget)
+        self.rounds_y_spinner.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.rounds_y_spinner.setMinimum(1)
+        self.rounds_y_spinner.setProperty("value", 1)
+        self.rounds_y_spinner.setObjectName("rounds_y_spinner")
+        self.horizontalLayout_2.addWidget(self.rounds_y_spinner)
+        self.label_9 = QtWidgets.QLabel(self.centralwidget)
+        self.label_9.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.label_9.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_9.setObjectName("label_9")
+        self.horizontalLayout_2.addWidget(self.label_9)
+        self.rounds_x_spinner = QtWidgets.QSpinBox(self.centralwidget)
+        self.rounds_x_spinner.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.rounds_x_spinner.setMinimum(1)
+        self.rounds_x_spinner.setProperty("value", 1)
+        self.rounds_x_spinner.setObjectName("rounds_x_spinner")
+        self.horizontalLayout_2.addWidget(self.rounds_x_spinner)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_2)
+        self.horizontalLayout_10 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_10.setObjectName("horizontalLayout_10")
+        self.converge_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.converge_box.setObjectName("converge_box")
+        self.horizontalLayout_10.addWidget(self.converge_box)
+        self.label_14 = QtWidgets.QLabel(self.centralwidget)
+        self.label_14.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_14.setObjectName("label_14")
+        self.horizontalLayout_10.addWidget(self.label_14)
+        self.target_error_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.target_error_box.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.target_error_box.setDecimals(4)
+        self.target_error_box.setSingleStep(0.001)
+        self.target_error_box.setProperty("value", 0.005)
+        self.target_error_box.setObjectName("target_error_box")
+        self.horizontalLayout_10.addWidget(self.target_error_box)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_10)
+        self.horizontalLayout_12 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_12.setObjectName("horizontalLayout_12")
+        self.label_16 = QtWidgets.QLabel(self.centralwidget)
+        self.label_16.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.label_16.setObjectName("label_16")
+        self.horizontalLayout_12.addWidget(self.label_16)
+        self.printer_line = QtWidgets.QLineEdit(self.centralwidget)
+        self.printer_line.setObjectName("printer_line")
+        self.horizontalLayout_12.addWidget(self.printer_line)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_12)
+        self.horizontalLayout_13 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_13.setObjectName("horizontalLayout_13")
+        self.stable_box = QtWidgets.QCheckBox(self.centralwidget)
+        self.stable_box.setObjectName("stable_box")
+        self.horizontalLayout_13.addWidget(self.stable_box)
+        self.label_17 = QtWidgets.QLabel(self.centralwidget)
+        self.label_17.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_17.setObjectName("label_17")
+        self.horizontalLayout_13.addWidget(self.label_17)
+        self.stable_rounds_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.stable_rounds_box.setMaximumSize(QtCore.QSize(60, 16777215))
+        self.stable_rounds_box.setProperty("value", 1)
+        self.stable_rounds_box.setObjectName("stable_rounds_box")
+        self.horizontalLayout_13.addWidget(self.stable_rounds_box)
+        self.label_18 = QtWidgets.QLabel(self.centralwidget)
+        self.label_18.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_18.setObjectName("label_18")
+        self.horizontalLayout_13.addWidget(self.label_18)
+        self.stable_tolerance_box = QtWidgets.QDoubleSpinBox(self.centralwidget)
+        self.stable_tolerance_box.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.stable_tolerance_box.setDecimals(3)
+        self.stable_tolerance_box.setSingleStep(0.005)
+        self.stable_tolerance_box.setProperty("value", 0.01)
+        self.stable_tolerance_box.setObjectName("stable_tolerance_box")
+        self.horizontalLayout_13.addWidget(self.stable_tolerance_box)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_13)
+        self.horizontalLayout_15 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_15.setObjectName("horizontalLayout_15")
+        self.sweep_button = QtWidgets.QPushButton(self.centralwidget)
+        self.sweep_button.setObjectName("sweep_button")
+        self.horizontalLayout_15.addWidget(self.sweep_button)
+        self.label_20 = QtWidgets.QLabel(self.centralwidget)
+        self.label_20.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_20.setObjectName("label_20")
+        self.horizontalLayout_15.addWidget(self.label_20)
+        self.sweep_speeds_line = QtWidgets.QLineEdit(self.centralwidget)
+        self.sweep_speeds_line.setObjectName("sweep_speeds_line")
+        self.horizontalLayout_15.addWidget(self.sweep_speeds_line)
+        self.label_21 = QtWidgets.QLabel(self.centralwidget)
+        self.label_21.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_21.setObjectName("label_21")
+        self.horizontalLayout_15.addWidget(self.label_21)
+        self.sweep_ranges_line = QtWidgets.QLineEdit(self.centralwidget)
+        self.sweep_ranges_line.setObjectName("sweep_ranges_line")
+        self.horizontalLayout_15.addWidget(self.sweep_ranges_line)
+        self.label_22 = QtWidgets.QLabel(self.centralwidget)
+        self.label_22.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_22.setObjectName("label_22")
+        self.horizontalLayout_15.addWidget(self.label_22)
+        self.sweep_heights_line = QtWidgets.QLineEdit(self.centralwidget)
+        self.sweep_heights_line.setObjectName("sweep_heights_line")
+        self.horizontalLayout_15.addWidget(self.sweep_heights_line)
+        self.label_23 = QtWidgets.QLabel(self.centralwidget)
+        self.label_23.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_23.setObjectName("label_23")
+        self.horizontalLayout_15.addWidget(self.label_23)
+        self.sweep_rounds_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.sweep_rounds_box.setMaximumSize(QtCore.QSize(60, 16777215))
+        self.sweep_rounds_box.setMinimum(2)
+        self.sweep_rounds_box.setProperty("value", 5)
+        self.sweep_rounds_box.setObjectName("sweep_rounds_box")
+        self.horizontalLayout_15.addWidget(self.sweep_rounds_box)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_15)
+        self.horizontalLayout_14 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_14.setObjectName("horizontalLayout_14")
+        self.label_19 = QtWidgets.QLabel(self.centralwidget)
+        self.label_19.setMaximumSize(QtCore.QSize(100, 16777215))
+        self.label_19.setObjectName("label_19")
+        self.horizontalLayout_14.addWidget(self.label_19)
+        self.temperature_label = QtWidgets.QLabel(self.centralwidget)
+        self.temperature_label.setObjectName("temperature_label")
+        self.horizontalLayout_14.addWidget(self.temperature_label)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_14)
+        self.horizontalLayout_8 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_8.setObjectName("horizontalLayout_8")
+        self.apply_offsets_button = QtWidgets.QPushButton(self.centralwidget)
+        self.apply_offsets_button.setMaximumSize(QtCore.QSize(150, 16777215))
+        self.apply_offsets_button.setLayoutDirection(QtCore.Qt.LeftToRight)
+        self.apply_offsets_button.setObjectName("apply_offsets_button")
+        self.horizontalLayout_8.addWidget(self.apply_offsets_button)
+        self.resume_button = QtWidgets.QPushButton(self.centralwidget)
+        self.resume_button.setMaximumSize(QtCore.QSize(150, 16777215))
+        self.resume_button.setObjectName("resume_button")
+        self.horizontalLayout_8.addWidget(self.resume_button)
+        self.dry_run_button = QtWidgets.QPushButton(self.centralwidget)
+        self.dry_run_button.setMaximumSize(QtCore.QSize(150, 16777215))
+        self.dry_run_button.setObjectName("dry_run_button")
+        self.horizontalLayout_8.addWidget(self.dry_run_button)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_8)
+        self.horizontalLayout_7 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_7.setObjectName("horizontalLayout_7")
+        self.label_10 = QtWidgets.QLabel(self.centralwidget)
+        self.label_10.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_10.setObjectName("label_10")
+        self.horizontalLayout_7.addWidget(self.label_10)
+        self.filename_line = QtWidgets.QLineEdit(self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.filename_line.sizePolicy().hasHeightForWidth())
+        self.filename_line.setSizePolicy(sizePolicy)
+        self.filename_line.setMinimumSize(QtCore.QSize(200, 0))
+        self.filename_line.setObjectName("filename_line")
+        self.horizontalLayout_7.addWidget(self.filename_line)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_7)
+        self.verticalLayout_6.setStretch(0, 1)
+        self.horizontalLayout_9.addLayout(self.verticalLayout_6)
+        self.horizontalLayout_9.setStretch(1, 1)
+        self.verticalLayout_7.addLayout(self.horizontalLayout_9)
+        self.output_label = QtWidgets.QLabel(self.centralwidget)
+        self.output_label.setObjectName("output_label")
+        self.verticalLayout_7.addWidget(self.output_label)
+        self.output_terminal = QtWidgets.QTextEdit(self.centralwidget)
+        self.output_terminal.setFocusPolicy(QtCore.Qt.StrongFocus)
+        self.output_terminal.setReadOnly(True)
+        self.output_terminal.setObjectName("output_terminal")
+        self.verticalLayout_7.addWidget(self.output_terminal)
+        self.verticalLayout_7.setStretch(0, 1)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 757, 21))
+        self.menubar.setObjectName("menubar")
+        MainWindow.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
+        self.x_label.setText(_translate("MainWindow", "X coordinate coil"))
+        self.x_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The x coordinate for which the nozzle is underneath the coil</p></body></html>"))
+        self.y_label.setText(_translate("MainWindow", "Y coordinate coil"))
+        self.y_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The y coordinate for which the nozzle is underneath the coil</p></body></html>"))
+        self.z_label.setText(_translate("MainWindow", "Z height for test"))
+        self.z_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The z coordinate for which the nozzle is just above the coil</p></body></html>"))
+        self.z_label_2.setText(_translate("MainWindow", "Scanning range"))
+        self.range_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The distance left and right of the coil location that will be scanned through</p></body></html>"))
+        self.z_label_3.setText(_translate("MainWindow", "Speed"))
+        self.speed_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The speed at which the calibration will be performed</p></body></html>"))
+        self.temp_label.setText(_translate("MainWindow", "Nozzle temperature"))
+        self.temp_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The temperature to which the nozzles will be heated during the calibration</p></body></html>"))
+        self.temp_label_2.setText(_translate("MainWindow", "Bed temperature"))
+        self.bed_temp_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The temperature to which the bed will be heated during the calibration</p></body></html>"))
+        self.cooldown_label.setText(_translate("MainWindow", "Cooldown time"))
+        self.cooldown_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The time the coil is given to cool down after each pass.</p></body></html>"))
+        self.label_7.setText(_translate("MainWindow", "mm"))
+        self.label_6.setText(_translate("MainWindow", "mm"))
+        self.label_5.setText(_translate("MainWindow", "mm"))
+        self.label_4.setText(_translate("MainWindow", "mm"))
+        self.label_3.setText(_translate("MainWindow", "mm/s"))
+        self.label_11.setText(_translate("MainWindow", "°C"))
+        self.label_12.setText(_translate("MainWindow", "°C"))
+        self.label_15.setText(_translate("MainWindow", "s"))
+        self.duet_label.setText(_translate("MainWindow", "Duet port"))
+        self.duet_combo.setToolTip(_translate("MainWindow", "<html><head/><body><p>The COM port of the diabase</p></body></html>"))
+        self.ldc_label.setText(_translate("MainWindow", "LDC1101EVM port"))
+        self.ldc_combo.setToolTip(_translate("MainWindow", "<html><head/><body><p>The com port of the LDC1101EVM</p></body></html>"))
+        self.reference_label.setText(_translate("MainWindow", "Reference LDC1101EVM port"))
+        self.reference_combo.setToolTip(_translate("MainWindow", "<html><head/><body><p>The com port of an optional second LDC1101EVM with a coil the nozzles do not pass over. It is measured at the same time as the first one and its change during a pass is subtracted, which removes the drift the coils have in common.</p></body></html>"))
+        self.profile_label.setText(_translate("MainWindow", "Conversion profile"))
+        self.profile_combo.setToolTip(_translate("MainWindow", "<html><head/><body><p>The conversion profile of the LDC1101. Slower profiles average longer inside the chip and have less noise.</p></body></html>"))
+        self.auto_tune_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>When connecting, select the fastest conversion profile of which the noise is below the target noise</p></body></html>"))
+        self.auto_tune_box.setText(_translate("MainWindow", "Auto tune"))
+        self.noise_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The target noise (standard deviation) of a single conversion used for auto tuning the conversion profile</p></body></html>"))
+        self.noise_box.setSuffix(_translate("MainWindow", " nH"))
+        self.filter_label.setText(_translate("MainWindow", "Sample filter"))
+        self.filter_combo.setToolTip(_translate("MainWindow", "<html><head/><body><p>The filter through which the samples of the LDC1101EVM are passed before they are averaged. Outlier rejection removes spikes, for example caused by heaters switching. The low-pass filter delays the signal slightly.</p></body></html>"))
+        self.connect_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Connect to the selected COM ports. </p></body></html>"))
+        self.connect_button.setText(_translate("MainWindow", "Connect"))
+        self.reload_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Reload the available COM ports</p></body></html>"))
+        self.reload_button.setText(_translate("MainWindow", "Reload"))
+        self.label.setText(_translate("MainWindow", "Tools to calibrate"))
+        self.tool_list_list.setToolTip(_translate("MainWindow", "<html><head/><body><p>The tools that should be calibrated</p></body></html>"))
+        __sortingEnabled = self.tool_list_list.isSortingEnabled()
+        self.tool_list_list.setSortingEnabled(False)
+        item = self.tool_list_list.item(0)
+        item.setText(_translate("MainWindow", "0"))
+        item = self.tool_list_list.item(1)
+        item.setText(_translate("MainWindow", "1"))
+        item = self.tool_list_list.item(2)
+        item.setText(_translate("MainWindow", "2"))
+        item = self.tool_list_list.item(3)
+        item.setText(_translate("MainWindow", "3"))
+        item = self.tool_list_list.item(4)
+        item.setText(_translate("MainWindow", "4"))
+        item = self.tool_list_list.item(5)
+        item.setText(_translate("MainWindow", "5"))
+        item = self.tool_list_list.item(6)
+        item.setText(_translate("MainWindow", "6"))
+        item = self.tool_list_list.item(7)
+        item.setText(_translate("MainWindow", "7"))
+        item = self.tool_list_list.item(8)
+        item.setText(_translate("MainWindow", "8"))
+        item = self.tool_list_list.item(9)
+        item.setText(_translate("MainWindow", "9"))
+        item = self.tool_list_list.item(10)
+        item.setText(_translate("MainWindow", "10"))
+        self.tool_list_list.setSortingEnabled(__sortingEnabled)
+        self.label_2.setText(_translate("MainWindow", "Reference tool"))
+        self.ref_combo.setToolTip(_translate("MainWindow", "<html><head/><body><p>The tool that will be used a reference for the offsets</p></body></html>"))
+        self.ref_combo.setItemText(0, _translate("MainWindow", "0"))
+        self.ref_combo.setItemText(1, _translate("MainWindow", "1"))
+        self.ref_combo.setItemText(2, _translate("MainWindow", "2"))
+        self.ref_combo.setItemText(3, _translate("MainWindow", "3"))
+        self.ref_combo.setItemText(4, _translate("MainWindow", "4"))
+        self.ref_combo.setItemText(5, _translate("MainWindow", "5"))
+        self.ref_combo.setItemText(6, _translate("MainWindow", "6"))
+        self.ref_combo.setItemText(7, _translate("MainWindow", "7"))
+        self.ref_combo.setItemText(8, _translate("MainWindow", "8"))
+        self.ref_combo.setItemText(9, _translate("MainWindow", "9"))
+        self.ref_combo.setItemText(10, _translate("MainWindow", "10"))
+        self.ascend_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>If tools should be ordered in ascending order</p></body></html>"))
+        self.ascend_box.setText(_translate("MainWindow", "ascend"))
+        self.descend_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>If tools should be ordered in descending order</p></body></html>"))
+        self.descend_box.setText(_translate("MainWindow", "descend"))
+        self.fan_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>If the layer fan should be enabled during calibration. Assumes fan is on P3.</p></body></html>"))
+        self.fan_box.setText(_translate("MainWindow", "Fan"))
+        self.homing_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>If homing should be performed each round</p></body></html>"))
+        self.homing_box.setText(_translate("MainWindow", "Homing"))
+        self.drift_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>If the thermal drift of the coil should be removed before fitting, using a linear trend through the samples outside the dip. Experimental: it has not been verified yet that the offsets stay the same with a shorter cooldown time.</p></body></html>"))
+        self.drift_box.setText(_translate("MainWindow", "Drift compensation"))
+        self.early_stop_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>If a pass should be ended as soon as both flanks of the dip have been measured and the location of the nozzle, which is estimated while the samples arrive, is accurate enough</p></body></html>"))
+        self.early_stop_box.setText(_translate("MainWindow", "Stop passes early"))
+        self.early_stop_error_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The standard error of the estimated location of the nozzle below which a pass is ended early</p></body></html>"))
+        self.early_stop_error_box.setSuffix(_translate("MainWindow", " mm"))
+        self.template_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>If the response of each nozzle should be learned as a template, such that after the first round the nozzle is located from a few samples around its expected location instead of a whole pass</p></body></html>"))
+        self.template_box.setText(_translate("MainWindow", "Template passes"))
+        self.capture_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>Capture all raw data received from the LDC1101EVM to a file, for investigating problems with the sensor afterwards</p></body></html>"))
+        self.capture_box.setText(_translate("MainWindow", "Capture raw data"))
+        self.graph_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>Show the samples in the graph while measuring. Turn this off to reduce the load of the computer when following the calibration through the telemetry.</p></body></html>"))
+        self.graph_box.setText(_translate("MainWindow", "Live graph"))
+        self.telemetry_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>Publish the samples, progress, offsets and health counters of the calibration on TCP port 5025 of this computer, see telemetry.py</p></body></html>"))
+        self.telemetry_box.setText(_translate("MainWindow", "Telemetry"))
+        self.acquisition_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>Read the LDC1101EVMs in a separate process, such that the timing of the samples is not disturbed by the graph and the fits. Takes effect when connecting.</p></body></html>"))
+        self.acquisition_box.setText(_translate("MainWindow", "Separate acquisition process"))
+        self.clear_figure_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Clear all data from the figure above</p></body></html>"))
+        self.clear_figure_button.setText(_translate("MainWindow", "clear figure"))
+        self.stop_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Stop the calibration or sensor test</p></body></html>"))
+        self.stop_button.setText(_translate("MainWindow", "stop"))
+        self.test_sensor_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Test the sensor by plotting and saving the measured inductance</p></body></html>"))
+        self.test_sensor_button.setText(_translate("MainWindow", "Test sensor"))
+        self.cal_y_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Run the calibration algorithm to find the tool offsets in the y direction</p></body></html>"))
+        self.cal_y_button.setText(_translate("MainWindow", "Calibrate Y"))
+        self.cal_x_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Run the calibration algorithm to find the tool offsets in the x direction</p></body></html>"))
+        self.cal_x_button.setText(_translate("MainWindow", "Calibrate X"))
+        self.cal_xy_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Run the calibration algorithm to find the tool offsets in both the x and y direction in a single run</p></body></html>"))
+        self.cal_xy_button.setText(_translate("MainWindow", "Calibrate XY"))
+        self.label_8.setText(_translate("MainWindow", "y rounds:"))
+        self.rounds_y_spinner.setToolTip(_translate("MainWindow", "<html><head/><body><p>How often the calibration algorithm will be run when calibrating in the y direction. Used for determining the repeatability of the method.</p></body></html>"))
+        self.label_9.setText(_translate("MainWindow", "x rounds:"))
+        self.rounds_x_spinner.setToolTip(_translate("MainWindow", "<html><head/><body><p>How often the calibration algorithm will be run when calibrating in the y direction. Used for determining the repeatability of the method.</p></body></html>"))
+        self.converge_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>Stop repeating a tool as soon as the standard error of its offset is below the target. The number of rounds then becomes the maximum number of rounds.</p></body></html>"))
+        self.converge_box.setText(_translate("MainWindow", "Stop when converged"))
+        self.label_14.setText(_translate("MainWindow", "target error:"))
+        self.target_error_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The standard error of the offset below which a tool is considered to be converged</p></body></html>"))
+        self.target_error_box.setSuffix(_translate("MainWindow", " mm"))
+        self.label_16.setText(_translate("MainWindow", "printer:"))
+        self.printer_line.setToolTip(_translate("MainWindow", "<html><head/><body><p>The name under which the found offsets are stored in the calibration history</p></body></html>"))
+        self.printer_line.setText(_translate("MainWindow", "printer"))
+        self.stable_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>Measure tools of which the offset needed no correction in the last three calibrations of this printer at the same temperature for a reduced number of rounds</p></body></html>"))
+        self.stable_box.setText(_translate("MainWindow", "Reduce rounds of stable tools"))
+        self.label_17.setText(_translate("MainWindow", "rounds:"))
+        self.stable_rounds_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The number of rounds for stable tools, 0 to skip them</p></body></html>"))
+        self.label_18.setText(_translate("MainWindow", "tolerance:"))
+        self.stable_tolerance_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The maximum correction of the offset in the last calibrations for a tool to be considered stable</p></body></html>"))
+        self.stable_tolerance_box.setSuffix(_translate("MainWindow", " mm"))
+        self.sweep_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Calibrate the reference tool in x and y with every combination of the speeds, ranges and heights given, and apply the settings that reach the target error in the shortest time</p></body></html>"))
+        self.sweep_button.setText(_translate("MainWindow", "Sweep settings"))
+        self.label_20.setText(_translate("MainWindow", "speeds:"))
+        self.sweep_speeds_line.setToolTip(_translate("MainWindow", "<html><head/><body><p>The speeds to try in mm/s, separated by commas. When empty the current speed is used.</p></body></html>"))
+        self.label_21.setText(_translate("MainWindow", "ranges:"))
+        self.sweep_ranges_line.setToolTip(_translate("MainWindow", "<html><head/><body><p>The scanning ranges to try in mm, separated by commas. When empty the current range is used.</p></body></html>"))
+        self.label_22.setText(_translate("MainWindow", "heights:"))
+        self.sweep_heights_line.setToolTip(_translate("MainWindow", "<html><head/><body><p>The z-heights to try in mm, separated by commas. When empty the current z-height is used.</p></body></html>"))
+        self.label_23.setText(_translate("MainWindow", "rounds:"))
+        self.sweep_rounds_box.setToolTip(_translate("MainWindow", "<html><head/><body><p>The number of rounds measured with each combination, to determine the repeatability</p></body></html>"))
+        self.label_19.setText(_translate("MainWindow", "temperatures:"))
+        self.temperature_label.setToolTip(_translate("MainWindow", "<html><head/><body><p>The current and target temperatures of the printer in degrees Celcius</p></body></html>"))
+        self.temperature_label.setText(_translate("MainWindow", "-"))
+        self.apply_offsets_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Send the last measured offsets to the printer</p></body></html>"))
+        self.apply_offsets_button.setText(_translate("MainWindow", "Apply offsets"))
+        self.resume_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Continue the last interrupted calibration with the data file name below. Only the passes that are missing will be measured.</p></body></html>"))
+        self.resume_button.setText(_translate("MainWindow", "Resume"))
+        self.dry_run_button.setToolTip(_translate("MainWindow", "<html><head/><body><p>Compile the calibration in x and y with the current settings without connecting to the printer, store its G-code next to the data file and estimate how long it takes</p></body></html>"))
+        self.dry_run_button.setText(_translate("MainWindow", "Dry run"))
+        self.label_10.setText(_translate("MainWindow", "Datafile name:"))
+        self.filename_line.setToolTip(_translate("MainWindow", "<html><head/><body><p>Filename to use for the file with the calibration data. When installed using installer, the default file location will be %appdata%\\..\\Local\\Programs\\Inductive calibration GUI</p></body></html>"))
+        self.filename_line.setText(_translate("MainWindow", "data.mat"))
+        self.output_label.setText(_translate("MainWindow", "output:"))
+from pyqtgraph import PlotWidget
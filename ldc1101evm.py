@@ -6,90 +6,184 @@
 
 import serial
 import threading
-from time import sleep
+from time import sleep, time
 import numpy as np
+from capture import capture_writer
+from reader import serial_reader
 
 class ldc1101evm:
     received_bytes = b''
     """Stores all the bytes received from the LDC1101EVM"""
 
-    lock = threading.Lock()
-    """Mutex for making sure the serial daemon and the other functions don't try to access :attr:`ldc1101evm.received_bytes` at the same time"""
-
-    stop_thread = False
-    """If set to True, the serial daemon will kill itself"""
-
     Csensor = 1200e-12
     """Value of the capacitor soldered onto the LDC1101EVM. This will affect the measured inductance since the LDC1101EVM determines the osciallation frequency of an LC tank with this capaictor and the inductor to be measured."""
 
     error = False
 
-    def __init__(self, port):
-        """Code run when the ldc1101evm object is initialised. This initialises the communication with LDC1101EVM and start the serial daemon in a seperate thread.
+    Fclkin = 12e6
+    """Frequency of the reference clock of the LDC1101, used for converting the measured data into a sensor frequency and for calculating the conversion time."""
+
+    conversion_profiles = {
+        'fast': {'rcount': 0x0400, 'settling': 0x04, 'sensor_div': 0x00},
+        'balanced': {'rcount': 0x0FFF, 'settling': 0x07, 'sensor_div': 0x00},
+        'high resolution': {'rcount': 0xFFFF, 'settling': 0x07, 'sensor_div': 0x00},
+    }
+    """The available conversion profiles, ordered from fast to slow. 'rcount' sets the conversion time (registers 0x30 and 0x31), during which the LDC1101 averages the sensor signal, 'settling' is written to the settling time register (0x04) and 'sensor_div' is the power of two by which the sensor frequency is divided (register 0x34)."""
+
+    chip_id = 0xD4
+    """The value of the device ID register (0x3F) of the LDC1101"""
+
+    status_registers = ['3B']
+    """Registers of which the value read back does not have to match the value written, because the LDC1101 updates them itself"""
+
+    profile = 'balanced'
+    """The name of the conversion profile that is currently used"""
 
-        :param port: The full name of the port at which the printer can be found. Example: 'COM1'
+    filter = None
+    """Streaming filter from the dsp module through which all decoded inductance samples are passed, or None to use the samples as they are"""
+
+    capture = None
+    """The :class:`capture.capture_writer` to which all received bytes are written, or None if the received bytes are not captured"""
+
+    def __init__(self, port, reader=None):
+        """Code run when the ldc1101evm object is initialised. This initialises the communication with LDC1101EVM and registers its port with a :class:`reader.serial_reader`, which receives the bytes in a seperate thread.
+
+        :param port: The full name of the port at which the printer can be found. Example: 'COM1'. Instead an object behaving like a serial port can be given, such as a :class:`capture.replay_port` for replaying a capture.
+        :param reader: The :class:`reader.serial_reader` to share with other LDC1101EVMs, such that all of them are read by a single thread and their samples have timestamps from the same clock. If None the LDC1101EVM gets a reader of its own.
         :return: None
         :rtype: None
         """
-        try: 
-            self.ser = serial.Serial(port,baudrate=115200,timeout=1)
+        if not isinstance(port,str):
+            self.ser = port
+        else:
+            try: 
+                self.ser = serial.Serial(port,baudrate=115200,timeout=1)
+            except serial.serialutil.SerialException:
+                self.ser = serial.Serial(port,baudrate=115200,timeout=1)
+        #Mutex for making sure the reader thread and the other functions don't try to access the received bytes at the same time
+        self.lock = threading.Lock()
+        self.samples = np.zeros(0)
+        self.sample_times = np.zeros(0)
+        self.__clear_received()
+        self.own_reader = reader is None
+        if reader is None:
+            reader = serial_reader()
+        self.reader = reader
+        self.reader.register(self)
+
+    @classmethod
+    def identify(cls, port, timeout=0.5):
+        """Function for checking if a LDC1101EVM is connected to a port. A running conversion is stopped, after which the device ID register is read and compared to :attr:`ldc1101evm.chip_id`.
+
+        :param port: The full name of the port to check. Example: 'COM1'
+        :param timeout: The maximum time to wait for a reply in seconds
+        :return: A description of the device if a LDC1101EVM replied, otherwise None
+        :rtype: string
+        """
+        try:
+            ser = serial.Serial(port,baudrate=115200,timeout=0.05)
+        except serial.serialutil.SerialException:
+            return None
+        try:
+            #stop a conversion that might still be running, such that the reply is not mixed with measurements
+            ser.write(bytes('07', encoding='utf8'))
+            sleep(0.05)
+            ser.reset_input_buffer()
+            ser.write(bytes('033F\r\n', encoding='utf8'))
+            deadline = time() + timeout
+            answer = b''
+            while len(answer) < 9 and time() < deadline:
+                answer = answer + ser.read(9-len(answer))
+            if len(answer) == 9 and answer[8] == cls.chip_id:
+                return 'LDC1101 (device ID %02X)' % answer[8]
         except serial.serialutil.SerialException:
-            self.ser = serial.Serial(port,baudrate=115200,timeout=1)
-        self.thread = threading.Thread(target=self.serial_daemon, args=(), daemon=True)
-        self.thread.start()
+            return None
+        finally:
+            ser.close()
+        return None
 
-    def serial_daemon(self):
-        """The serial daemon which is run in a seperate thread as the rest and just puts all the received bytes in :attr:`ldc1101evm.received_bytes`
+    def receive(self,data,timestamp):
+        """Function called by the :class:`reader.serial_reader` with the bytes received from the LDC1101EVM, which are added to :attr:`ldc1101evm.received_bytes`. The time at which they arrived is kept to timestamp the samples decoded from them.
 
+        :param data: The received bytes
+        :param timestamp: The time at which they were received in seconds since the epoch
         :return: None
         :rtype: None
         """
-        while(1):
-            if self.ser.isOpen():
-                try:
-                    received_bytes_local = bytes(self.ser.read(8))
-                except Exception as e:
-                    print('error: could not read data from LDC1101')
-                    self.error = True
-                    break
-            with self.lock:
-                self.received_bytes = self.received_bytes + received_bytes_local
-            if self.stop_thread == True:
-                break
+        with self.lock:
+            self.received_bytes = self.received_bytes + data
+            self.received_count = self.received_count + len(data)
+            self.chunk_ends.append(self.received_count)
+            self.chunk_times.append(timestamp)
+            if self.capture is not None:
+                if not self.capture.write(data,timestamp):
+                    print('capture file full, stopped capturing')
+                    self.capture.close()
+                    self.capture = None
 
+    def __clear_received(self):
+        """Function for discarding all received bytes that have not been decoded yet
 
-    def __read_register(self,register):
-        """Read a register inside the LDC1101 IC`
-        
-        :param port: Address of the register to be read.
-        :return: Value of the register
-        :rtype: byte
+        :return: None
+        :rtype: None
         """
-        self.ser.write(bytes('03'+register+'\r\n', encoding='utf8'))
-        while len(self.received_bytes) < 8:
-            sleep(0.001)
-        result = self.received_bytes
         self.received_bytes = b''
-        return result[8]
-    
-    def __write_register(self,register,value):
-        """Write a register inside the LDC1101 IC`
+        self.received_count = 0
+        self.consumed_count = 0
+        self.chunk_ends = []
+        self.chunk_times = []
+
+    def __wait_for_replies(self,count,timeout):
+        """Wait until a number of replies of 9 bytes have been received from the LDC1101EVM and take them out of :attr:`ldc1101evm.received_bytes`
         
-        :param port: Address of the register to be written.
-        :param port: Value to write to the register.
-        :return: True if succesfull, False if unsuccesfull
-        :rtype: Boolean
+        :param count: The number of replies to wait for
+        :param timeout: The maximum time to wait in seconds
+        :return: The register values contained in the replies
+        :rtype: list
         """
-        self.ser.write(bytes('02'+register+value+'\r\n', encoding='utf8'))
-        while len(self.received_bytes) < 9:
+        deadline = time() + timeout
+        while len(self.received_bytes) < 9*count:
+            if time() > deadline:
+                raise RuntimeError('LDC1101EVM did not reply to all register commands, received ' + str(len(self.received_bytes)) + ' of ' + str(9*count) + ' bytes')
             sleep(0.001)
-        result = self.received_bytes
-        value_hex = int(value[0:2],16)
-        self.received_bytes = b''
-        if value_hex == result[8]:
-            return True
-        else:
-            return False
+        with self.lock:
+            result = self.received_bytes
+            self.__clear_received()
+        return [result[9*i1+8] for i1 in range(count)]
+
+    def __write_registers(self,program,timeout=2.0):
+        """Write a list of registers inside the LDC1101 IC at once. All write commands are sent in one batch and the replies are verified afterwards.
+        
+        :param program: List of (register, value) tuples, with the register address and value as hexadecimal strings.
+        :param timeout: The maximum time to wait for all replies in seconds
+        :return: None
+        :rtype: None
+        """
+        commands = b''.join(bytes('02'+register+value+'\r\n', encoding='utf8') for register, value in program)
+        self.ser.write(commands)
+        replies = self.__wait_for_replies(len(program),timeout)
+        failed = [register for (register, value), reply in zip(program,replies) if register not in self.status_registers and int(value,16) != reply]
+        if failed:
+            raise RuntimeError('writing LDC1101 register(s) ' + ', '.join(failed) + ' failed')
+
+    def __verify_registers(self,program,timeout=2.0):
+        """Read back all registers written by a register program in one batch and check that they contain the last value written to them.
+        
+        :param program: List of (register, value) tuples, with the register address and value as hexadecimal strings.
+        :param timeout: The maximum time to wait for all replies in seconds
+        :return: None
+        :rtype: None
+        """
+        expected = {}
+        for register, value in program:
+            if register not in self.status_registers:
+                expected[register] = int(value,16)
+        commands = b''.join(bytes('03'+register+'\r\n', encoding='utf8') for register in expected)
+        self.ser.write(commands)
+        replies = self.__wait_for_replies(len(expected),timeout)
+        failed = ['%s (%02X instead of %02X)' % (register, reply, value) for (register, value), reply in zip(expected.items(),replies) if value != reply]
+        if failed:
+            raise RuntimeError('LDC1101 register(s) ' + ', '.join(failed) + ' not configured correctly')
     
     def __stop_conversion(self):
         """Function for stopping the current conversion inside the LDC1101EVM
@@ -107,73 +201,141 @@ class ldc1101evm:
         """
         self.ser.write(bytes('0638', encoding='utf8'))
         
-    def LHR_init(self):
-        """Function for initialising a high resolution measurement. A high resolution measurement is 24 bit and has no R measurement.
+    def LHR_init(self, profile='balanced'):
+        """Function for initialising a high resolution measurement. A high resolution measurement is 24 bit and has no R measurement. The registers are written in a single batch, after which they are all read back. If the LDC1101 does not end up configured as intended a RuntimeError is raised.
 
+        :param profile: The name of the conversion profile to use, see :attr:`ldc1101evm.conversion_profiles`
         :return: None
         :rtype: None
         """
+        self.profile = profile
+        settings = self.conversion_profiles[profile]
         
+        #stop the conversion and get rid of the measurements that were still underway
         self.__stop_conversion()
-        #set to sleep mode
-        self.__write_register('0B','01')
-        
-        #reset Rp range to maximum
-        self.__write_register('01','07')
-        
-        #enable L-only optimisation
-        self.__write_register('05','01')
-        
-        # continue if sensor amplitude cannot be kept regulated
-        self.__write_register('0C','01')
-        
-        #again put into sleep mode
-        self.__write_register('0B','01') 
-        
-        #again put into sleep mode
-        #self.__write_register('0A','00')
-        
-        #don't use interrupt pin
-        #self.__write_register('0A','00') 
-        
-        #downsample sensor frequency by a factor 8
-        #self.__write_register('34','03') 
-        
-        #do not downsample
-        self.__write_register('34','00') 
+        sleep(0.1)
+        self.flush()
+        if self.filter is not None:
+            self.filter.reset()
 
-        #reset inductance offset
-        self.__write_register('32','00') 
-        
-        #reset status register
-        self.__write_register('3B','00')
-        
-        #set RID to zero?
-        #self.__write_register('3E','00')
-        
-        #set ID to zero?
-        #self.__write_register('3F','00')
-        
-        #reset Rp range to maximum
-        #self.__write_register('01','07')
-        
-        #don't use interrupt pin
-        self.__write_register('0A','00') 
-        
-        #set to maximum settling time
-        self.__write_register('04','07')
-        
-        #set conversion time LSB
-        self.__write_register('30','FF')
-        
-        #set conversion time MSB
-        self.__write_register('31','0F')
+        program = [
+            #set to sleep mode
+            ('0B','01'),
+            #reset Rp range to maximum
+            ('01','07'),
+            #enable L-only optimisation
+            ('05','01'),
+            # continue if sensor amplitude cannot be kept regulated
+            ('0C','01'),
+            #divide the sensor frequency as set in the conversion profile
+            ('34','%02X' % settings['sensor_div']),
+            #reset inductance offset
+            ('32','00'),
+            #reset status register
+            ('3B','00'),
+            #don't use interrupt pin
+            ('0A','00'),
+            #set the settling time
+            ('04','%02X' % settings['settling']),
+            #set conversion time LSB
+            ('30','%02X' % (settings['rcount'] & 0xFF)),
+            #set conversion time MSB
+            ('31','%02X' % (settings['rcount'] >> 8)),
+        ]
+        self.__write_registers(program)
+        self.__verify_registers(program)
         
         #set into active conversion mode
-        self.__write_register('0B','00')
+        self.__write_registers([('0B','00')])
         
         self.__start_LHR_conversion()
+
+    def get_frame_rate(self):
+        """Function for getting the number of conversions per second of the current conversion profile.
+
+        :return: The frame rate in Hz
+        :rtype: float
+        """
+        rcount = self.conversion_profiles[self.profile]['rcount']
+        return self.Fclkin/(16*rcount+55)
+
+    def get_down_sample_ratio(self, duration):
+        """Function for getting the number of conversions that fit in a given time with the current conversion profile. Use this as the down sample ratio of :meth:`ldc1101evm.get_LHR_data` to average over a fixed time independent of the profile, such that slow profiles average inside the chip instead of in Python.
+
+        :param duration: The time to average over in seconds
+        :return: The down sample ratio, at least 1
+        :rtype: int
+        """
+        return max(int(round(duration*self.get_frame_rate())),1)
+
+    def auto_tune(self, target_noise, samples=50):
+        """Function for selecting the fastest conversion profile of which the noise is below a target. Each profile is initialised in turn and the standard deviation of a number of single conversions is measured. If no profile reaches the target the slowest profile is used. The nozzle should not be above the coil while tuning.
+
+        :param target_noise: The maximum allowed standard deviation of a single conversion in Henry
+        :param samples: The number of conversions used to measure the noise of each profile
+        :return: The name of the selected profile
+        :rtype: string
+        """
+        for profile in self.conversion_profiles:
+            self.LHR_init(profile)
+            self.flush()
+            self.get_LHR_data(1)
+            values = np.zeros(samples)
+            for i1 in range(samples):
+                values[i1] = self.get_LHR_data(1)
+            print('noise of profile ' + profile + ': ' + str(values.std()))
+            if values.std() <= target_noise:
+                break
+        return profile
         
+    def decode_frames(self):
+        """Decode all complete frames in :attr:`ldc1101evm.received_bytes` into inductances at once, pass them through :attr:`ldc1101evm.filter` and add them to the decoded samples. A frame consists of 8 bytes of which bytes 4, 6 and 7 are 0x5A. If a frame is not valid, a byte is skipped to find the start of the next frame. Each sample gets the time at which the last byte of its frame was received.
+
+        :return: None
+        :rtype: None
+        """
+        with self.lock:
+            raw = np.frombuffer(self.received_bytes,dtype=np.uint8)
+            frames = list()
+            frame_ends = list()
+            start = 0
+            while len(raw)-start >= 8:
+                block = raw[start:start+8*((len(raw)-start)//8)].reshape(-1,8)
+                valid = (block[:,4] == 0x5A) & (block[:,6] == 0x5A) & (block[:,7] == 0x5A)
+                if valid.all():
+                    frames.append(block)
+                    frame_ends.append(start+8*np.arange(1,len(block)+1))
+                    start = start + 8*len(block)
+                else:
+                    first_invalid = int(np.argmin(valid))
+                    frames.append(block[:first_invalid])
+                    frame_ends.append(start+8*np.arange(1,first_invalid+1))
+                    start = start + 8*first_invalid + 1
+            self.received_bytes = self.received_bytes[start:]
+
+            #look up the chunk in which the last byte of each frame arrived and forget the chunks that have been decoded completely
+            chunk_ends = np.array(self.chunk_ends)
+            if frames:
+                frame_ends = self.consumed_count + np.concatenate(frame_ends)
+                frame_times = np.array(self.chunk_times)[np.searchsorted(chunk_ends,frame_ends)]
+            self.consumed_count = self.consumed_count + start
+            decoded = int(np.searchsorted(chunk_ends,self.consumed_count,side='right'))
+            del self.chunk_ends[:decoded]
+            del self.chunk_times[:decoded]
+        if not frames:
+            return
+        frames = np.concatenate(frames).astype(np.int64)
+        if len(frames) == 0:
+            return
+
+        LHR_value = frames[:,1]*2**16+frames[:,2]*2**8+frames[:,3]
+        fosc = self.Fclkin/2**24*(LHR_value+1)*2**self.conversion_profiles[self.profile]['sensor_div']
+        inductance = 1/(self.Csensor*(2*np.pi*fosc)**2)
+        if self.filter is not None:
+            inductance = self.filter.process(inductance)
+        self.samples = np.concatenate([self.samples,inductance])
+        self.sample_times = np.concatenate([self.sample_times,frame_times])
+
     def get_LHR_data(self,down_sample_ratio):
         """Function getting the inductance measured by the LDC1101EVM in LHR mode. To put it in LHR mode run :meth:`ldc1101evm.LHR_init` first. This function blocks until an inductance value that has not been read is available. To delete all currently stored measurements run :meth:`ldc1101evm.flush` first.
 
@@ -181,42 +343,86 @@ class ldc1101evm:
         :return: The measured inductance
         :rtype: float
         """
-        average = 0
-        i1 = 0
         while 1:
-            while len(self.received_bytes) < 8:
-                sleep(0.001)
-            result = self.received_bytes[0:8]
-            if ((result[4] == 0x5A) & (result[6] == 0x5A) & (result[7] == 0x5A)):
-                LHR_value = result[1]*2**16+result[2]*2**8+result[3]
-                self.received_bytes =  self.received_bytes[8:]
-                fosc = 12e6/2**24*(LHR_value+1)
-                inductance = 1/(self.Csensor*(2*np.pi*fosc)**2)
-                average = average + inductance/down_sample_ratio
-                i1 = i1 + 1
-                
-                if i1 < down_sample_ratio:
-                    continue
-                else:                    
-                    return average
-            else:
-                self.received_bytes =  self.received_bytes[1:]
-                continue
+            self.decode_frames()
+            if len(self.samples) >= down_sample_ratio:
+                break
+            sleep(0.001)
+        average = self.samples[:down_sample_ratio].mean()
+        self.samples = self.samples[down_sample_ratio:]
+        self.sample_times = self.sample_times[down_sample_ratio:]
+        return average
+
+    def get_window(self,start,end,timeout=1.0):
+        """Function for getting the inductance averaged over a time window. This blocks until a sample received after the end of the window is available. Measuring several LDC1101EVMs sharing a :class:`reader.serial_reader` over the same window gives time-aligned values. The samples before the end of the window are deleted.
+
+        :param start: The start of the window in seconds since the epoch
+        :param end: The end of the window in seconds since the epoch
+        :param timeout: The maximum time to wait after the end of the window in seconds
+        :return: The average inductance of the samples in the window. If the window is shorter than a conversion, the first sample after it.
+        :rtype: float
+        """
+        deadline = max(end,time()) + timeout
+        while 1:
+            self.decode_frames()
+            if len(self.sample_times) > 0 and self.sample_times[-1] >= end:
+                break
+            if time() > deadline:
+                raise RuntimeError('LDC1101EVM did not send samples')
+            sleep(0.001)
+        inside = (self.sample_times >= start) & (self.sample_times < end)
+        after = int(np.searchsorted(self.sample_times,end))
+        if inside.any():
+            average = self.samples[inside].mean()
+        else:
+            average = self.samples[after]
+        self.samples = self.samples[after:]
+        self.sample_times = self.sample_times[after:]
+        return average
     
+    def start_capture(self,filename,size=64e6):
+        """Start writing all bytes received from the LDC1101EVM, with the time at which they were received, to a capture file. The file is created with its full size at once and capturing stops when it is full. Use :class:`capture.replay_port` to replay the capture.
+
+        :param filename: The name of the capture file
+        :param size: The size of the capture file in bytes
+        :return: None
+        :rtype: None
+        """
+        self.stop_capture()
+        self.capture = capture_writer(filename,size)
+
+    def stop_capture(self):
+        """Stop capturing the received bytes and close the capture file
+
+        :return: None
+        :rtype: None
+        """
+        with self.lock:
+            if self.capture is not None:
+                self.capture.close()
+                self.capture = None
+
     def flush(self):
-        """Delete all currently stored measurements
+        """Delete all currently stored measurements. The frames received so far are still decoded and passed through :attr:`ldc1101evm.filter` first, such that the filter continues where it was instead of holding the samples of the previous measurement.
 
         :return: None
         :rtype: None
         """
-        self.received_bytes = b''
+        self.decode_frames()
+        with self.lock:
+            self.__clear_received()
+        self.samples = np.zeros(0)
+        self.sample_times = np.zeros(0)
         self.ser.reset_input_buffer()
     
     def close(self):
-        """Close the serial connection and tell the daemon to go kill itself.
+        """Close the serial connection and stop reading it. A reader of its own is stopped as well.
 
         :return: None
         :rtype: None
         """
-        self.stop_thread = True
+        self.reader.unregister(self)
+        if self.own_reader:
+            self.reader.close()
+        self.stop_capture()
         self.ser.close()
\ No newline at end of file
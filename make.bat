@@ -1,2 +1,3 @@
 CALL venv\Scripts\activate
-pyinstaller app.py --add-binary "./interface.ui;./" --add-binary "./settings.yaml;./"
\ No newline at end of file
+pyuic5 interface.ui -o interface_ui.py
+pyinstaller app.py --add-binary "./settings.yaml;./"
\ No newline at end of file
@@ -0,0 +1,351 @@
+"""
+.. module:: plan
+    :synopsis: This module compiles a calibration into a plan of G-code and sync points before anything is sent to the printer
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+The plan is a list of steps: blocks of G-code that are sent to the printer at once, and sync points at which the GUI has to do something itself, like waiting for a heater, measuring a pass or storing the progress. Since all G-code is generated up front, the plan can be inspected and its duration can be estimated with a simulated printer before a calibration is started.
+
+The sync points are, in the order in which they appear in each round:
+
+* 'round': start of a round, where the GUI checks whether the tools have converged
+* 'wait_bed': wait for the bed to reach its temperature
+* 'tool': start of the passes of a tool, where the GUI checks whether the tool still needs to be measured
+* 'wait_tool': wait for the tool that has just been selected to reach its temperature
+* 'pass': start of a pass, where the GUI checks whether the pass was already measured before the calibration was resumed
+* 'scan': the pass itself. The scanning moves are not part of the plan, since they follow the samples of the LDC1101EVM.
+* 'cooldown': wait for the coil to cool down and store the progress, after which a pass that failed can be repeated
+
+Before the rounds there are the sync point 'heat', where the heaters are switched on, and after them the sync point 'finish', after which the printer is homed.
+"""
+import re
+from collections import namedtuple
+
+step = namedtuple('step',['kind','cycle','tool','scan','gcode','timeout'])
+"""A step of a plan: the kind of step ('gcode' or the name of a sync point), the round, the index of the tool in the tool list, the index of the pass in the passes of a round, the lines of G-code of a 'gcode' step and the maximum time in seconds to wait for the printer to execute them. Fields that do not apply are None."""
+
+levels = {'finish':0, 'round':1, 'tool':2, 'pass':3}
+"""The sync points that a sync point can skip to, from the highest to the lowest level. Skipping to a level continues with the next sync point of that level or a higher one."""
+
+homing_timeout = 300
+"""The maximum time in seconds to wait for homing or probing"""
+
+tool_timeout = 120
+"""The maximum time in seconds to wait for a tool change"""
+
+move_timeout = 60
+"""The maximum time in seconds to wait for a move"""
+
+def number(value):
+    """Function for writing a coordinate or feed rate in G-code
+
+    :param value: The number
+    :return: The number with at most 4 decimals and without trailing zeros, for example '8.5'
+    :rtype: string
+    """
+    return ('%.4f' % value).rstrip('0').rstrip('.')
+
+def move(feed,**position):
+    """Function for generating a G1 command
+
+    :param feed: The feed rate in mm/min
+    :param position: The coordinates to move to, for example z=2, y=20, x=8.5
+    :return: For example 'G1 Z2 Y20 X8.5 F3600'
+    :rtype: string
+    """
+    return 'G1 ' + ' '.join(axis.upper() + number(value) for axis, value in position.items()) + ' F' + number(feed)
+
+def compile_plan(tool_list,rounds,passes,center,start,stop,z_pos,cooldown_height,default_speed,homing_every_round,fan_on):
+    """Function for compiling a calibration, with the same order of moves as the calibration had before it was compiled
+
+    :param tool_list: List with the tool numbers, the first one being the reference tool
+    :param rounds: The number of rounds
+    :param passes: List with a tuple of the axis and direction (0 for up, 1 for down) of each pass in a round
+    :param center: Dict with the position of the coil for the keys 'x' and 'y'
+    :param start: Dict with the position at which a pass going up starts for the keys 'x' and 'y'
+    :param stop: Dict with the position at which a pass going up ends for the keys 'x' and 'y'
+    :param z_pos: The height of the nozzle during a pass in mm
+    :param cooldown_height: The distance the nozzle is moved up between passes in mm
+    :param default_speed: The speed of the moves between passes in mm/s
+    :param homing_every_round: If True the printer is homed and probed every round, otherwise only in the first round
+    :param fan_on: Whether the layer fan is switched on
+    :return: List with the steps of the plan
+    :rtype: list
+    """
+    feed = default_speed*60
+    plan = []
+    plan.append(step('gcode',None,None,None,('M106 P3 S255' if fan_on else 'M106 P3 S0',),move_timeout))
+    plan.append(step('heat',None,None,None,None,None))
+    #select coordinate system 1 (because the coordinate system might have been changed during the z calibration)
+    plan.append(step('gcode',None,None,None,('G54',),move_timeout))
+
+    for cycle in range(rounds):
+        plan.append(step('round',cycle,None,None,None,None))
+        if homing_every_round or cycle == 0:
+            plan.append(step('gcode',cycle,None,None,('G28','G90','G1 X0 Y0 Z8 F8000'),homing_timeout))
+            #the bed expands while heating up, so only probe it once it is at temperature
+            plan.append(step('wait_bed',cycle,None,None,None,None))
+            plan.append(step('gcode',cycle,None,None,('G30',),homing_timeout))
+
+        #select the first tool and move to the start of the first pass. The heater of a tool that has not been selected before is off, so a tool is only waited for once it is selected.
+        axis = passes[0][0]
+        target = dict(center)
+        target[axis] = start[axis]
+        plan.append(step('gcode',cycle,0,None,('M400;after homing','T'+str(tool_list[0]),'M400;after initial tool select',move(feed,z=z_pos+cooldown_height,y=target['y'],x=target['x']),'M400;After move'),tool_timeout))
+
+        for tool in range(len(tool_list)):
+            plan.append(step('tool',cycle,tool,None,None,None))
+            plan.append(step('gcode',cycle,tool,None,('T'+str(tool_list[tool]),'M400; after tool select'),tool_timeout))
+            plan.append(step('wait_tool',cycle,tool,None,None,None))
+            for scan, (axis, dir) in enumerate(passes):
+                target = dict(center)
+                target[axis] = start[axis] if dir == 0 else stop[axis]
+                plan.append(step('pass',cycle,tool,scan,None,None))
+                plan.append(step('gcode',cycle,tool,scan,(move(feed,z=z_pos,y=target['y'],x=target['x']),'M400'),move_timeout))
+                plan.append(step('scan',cycle,tool,scan,None,None))
+                #move the nozzle up and let the coil cool down
+                plan.append(step('gcode',cycle,tool,scan,(move(feed,z=z_pos+cooldown_height),'M400'),move_timeout))
+                plan.append(step('cooldown',cycle,tool,scan,None,None))
+
+    plan.append(step('finish',None,None,None,None,None))
+    plan.append(step('gcode',None,None,None,('G28',),homing_timeout))
+    return plan
+
+def describe_plan(plan):
+    """Function for listing a plan in a readable form, with the G-code as it will be sent and the sync points as comments
+
+    :param plan: List with the steps of the plan, see :func:`compile_plan`
+    :return: The plan with one line per line of G-code or sync point
+    :rtype: string
+    """
+    lines = []
+    for item in plan:
+        if item.kind == 'gcode':
+            lines.extend(item.gcode)
+            continue
+        description = '; sync ' + item.kind
+        for name in ['cycle','tool','scan']:
+            value = getattr(item,name)
+            if value is not None:
+                description = description + ' ' + name + ' ' + str(value)
+        lines.append(description)
+    return '\n'.join(lines) + '\n'
+
+def repeat_from(plan,index):
+    """Function for finding where to continue when a sync point repeats the current pass
+
+    :param plan: List with the steps of the plan
+    :param index: The index of the sync point
+    :return: The index of the 'pass' sync point of the current pass
+    :rtype: int
+    """
+    for i in range(index,-1,-1):
+        if plan[i].kind == 'pass':
+            return i
+    raise ValueError('there is no pass to repeat')
+
+def skip_to(plan,index,level):
+    """Function for finding where to continue when a sync point skips the rest of a round, tool or pass
+
+    :param plan: List with the steps of the plan
+    :param index: The index of the sync point
+    :param level: The level to skip to, a key of :data:`levels`
+    :return: The index of the next sync point of that level or a higher one
+    :rtype: int
+    """
+    for i in range(index+1,len(plan)):
+        if plan[i].kind in levels and levels[plan[i].kind] <= levels[level]:
+            return i
+    return len(plan)
+
+class plan_executor:
+    """Class for executing a plan. The G-code of a step is written to the printer in a single write, after which the replies to all its lines are awaited, instead of waiting for each line before sending the next. Sync points are handed to functions of the caller.
+    """
+
+    def __init__(self,printer,handlers,idle=None):
+        """Code run when the plan_executor object is initialised.
+
+        :param printer: Object with a method write_lines(lines,timeout), like :class:`diabase.diabase` or :class:`simulated_printer`
+        :param handlers: Dict with a function for each kind of sync point, called with the step. The function returns None to continue with the next step, a key of :data:`levels` to skip to the next sync point of that level, 'repeat' to go back to the start of the current pass or False to stop the plan. Sync points without a function are passed.
+        :param idle: Function called before every step, for example to keep a GUI responsive. If it returns False the plan is stopped.
+        :return: None
+        :rtype: None
+        """
+        self.printer = printer
+        self.handlers = handlers
+        self.idle = idle
+        self.index = 0
+
+    def run(self,plan):
+        """Function for executing a plan from the start
+
+        :param plan: List with the steps of the plan, see :func:`compile_plan`
+        :return: True if the plan was executed completely, False if it was stopped
+        :rtype: Boolean
+        """
+        self.index = 0
+        while self.index < len(plan):
+            item = plan[self.index]
+            if self.idle is not None and self.idle() is False:
+                return False
+            if item.kind == 'gcode':
+                self.printer.write_lines(item.gcode,item.timeout)
+                result = None
+            elif item.kind in self.handlers:
+                result = self.handlers[item.kind](item)
+            else:
+                result = None
+            if result is False:
+                return False
+            if result is None:
+                self.index = self.index + 1
+            elif result == 'repeat':
+                self.index = repeat_from(plan,self.index)
+            else:
+                self.index = skip_to(plan,self.index,result)
+        return True
+
+class simulated_printer:
+    """Class that takes the place of the printer to estimate how long a plan takes. Moves take their distance divided by their feed rate, without accelerations, and homing, probing and tool changes take a fixed time.
+    """
+
+    homing_time = 20
+    """The time of a G28 command in seconds"""
+
+    probing_time = 10
+    """The time of a G30 command in seconds"""
+
+    tool_change_time = 15
+    """The time of a tool change in seconds"""
+
+    command_pattern = re.compile(r'^\s*([GMT])(\d+)')
+    """Pattern matching the command at the start of a line of G-code"""
+
+    axis_pattern = re.compile(r'\b([XYZF])(-?\d+(?:\.\d*)?)')
+    """Pattern matching an axis or feed rate and its value"""
+
+    def __init__(self):
+        """Code run when the simulated_printer object is initialised. The printer starts at the origin with no tool selected.
+
+        :return: None
+        :rtype: None
+        """
+        self.position = {'x':0.0, 'y':0.0, 'z':0.0}
+        self.tool = None
+        self.elapsed = 0.0
+        self.lines = 0
+        self.writes = 0
+
+    def write_lines(self,lines,timeout):
+        """Function for executing lines of G-code, which adds their duration to :attr:`simulated_printer.elapsed`
+
+        :param lines: List with the lines of G-code
+        :param timeout: Not used, for compatibility with :meth:`diabase.diabase.write_lines`
+        :return: None
+        :rtype: None
+        """
+        self.writes = self.writes + 1
+        for line in lines:
+            self.lines = self.lines + 1
+            command = self.command_pattern.match(line)
+            if command is None:
+                continue
+            code = command.group(1) + command.group(2)
+            values = {name.lower():float(value) for name, value in self.axis_pattern.findall(line[command.end():])}
+            if code in ['G0','G1']:
+                self.move(values)
+            elif code == 'G28':
+                self.position = {'x':0.0, 'y':0.0, 'z':0.0}
+                self.elapsed = self.elapsed + self.homing_time
+            elif code == 'G30':
+                self.elapsed = self.elapsed + self.probing_time
+            elif command.group(1) == 'T' and int(command.group(2)) != self.tool:
+                self.tool = int(command.group(2))
+                self.elapsed = self.elapsed + self.tool_change_time
+
+    def move(self,values):
+        """Function for simulating a move in a straight line
+
+        :param values: Dict with the coordinates to move to and the feed rate in mm/min with the key 'f'
+        :return: None
+        :rtype: None
+        """
+        distance = sum((values[axis]-self.position[axis])**2 for axis in self.position if axis in values)**0.5
+        for axis in self.position:
+            if axis in values:
+                self.position[axis] = values[axis]
+        if 'f' in values and values['f'] > 0:
+            self.elapsed = self.elapsed + distance/(values['f']/60)
+
+def simulate(plan,scan_range,speed,settle_time,cooldown_time,heating_time=0):
+    """Function for estimating the duration of a plan with a :class:`simulated_printer`. All passes are assumed to be measured completely, so convergence, early stopping and resuming can only make a calibration shorter.
+
+    :param plan: List with the steps of the plan, see :func:`compile_plan`
+    :param scan_range: The distance from the center at which a pass starts and ends in mm
+    :param speed: The speed of a pass in mm/s
+    :param settle_time: The time waited for the LDC1101EVM at the start of a pass in s
+    :param cooldown_time: The time to let the coil cool down after a pass in s
+    :param heating_time: The time the heaters need to reach their temperature in s, counted from the 'heat' sync point
+    :return: Dict with the total duration in s ('total'), the duration of each kind of step, the number of lines of G-code ('lines') and the number of writes to the printer ('writes')
+    :rtype: Dict
+    """
+    printer = simulated_printer()
+    heated = {'time':None}
+    durations = {}
+
+    def heat(item):
+        heated['time'] = printer.elapsed + heating_time
+
+    def wait(item):
+        if heated['time'] is not None:
+            printer.elapsed = max(printer.elapsed,heated['time'])
+
+    def scan(item):
+        printer.elapsed = printer.elapsed + settle_time + 2*scan_range/speed
+
+    def cooldown(item):
+        printer.elapsed = printer.elapsed + cooldown_time
+
+    handlers = {'heat':heat, 'wait_bed':wait, 'wait_tool':wait, 'scan':scan, 'cooldown':cooldown}
+    for item in plan:
+        before = printer.elapsed
+        plan_executor(printer,handlers).run([item])
+        durations[item.kind] = durations.get(item.kind,0) + printer.elapsed - before
+    durations['total'] = printer.elapsed
+    durations['lines'] = printer.lines
+    durations['writes'] = printer.writes
+    return durations
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Show the plan of a calibration with the settings of the inductive calibration GUI and estimate its duration')
+    parser.add_argument('--settings', default='settings.yaml', help='The settings file of the GUI')
+    parser.add_argument('--axes', default='xy', choices=['x','y','xy'], help='The axes to calibrate')
+    parser.add_argument('--tools', type=int, nargs='+', default=[10,6], help='The tool numbers, the first one being the reference tool')
+    parser.add_argument('--heating-time', type=float, default=0, help='The time the heaters need to reach their temperature in s')
+    parser.add_argument('--gcode', action='store_true', help='Also print the plan itself')
+    args = parser.parse_args()
+
+    import yaml
+    with open(args.settings,'r') as stream:
+        settings = yaml.safe_load(stream)
+    if args.axes == 'x':
+        rounds = settings['x_rounds']
+    elif args.axes == 'y':
+        rounds = settings['y_rounds']
+    else:
+        rounds = max(settings['x_rounds'],settings['y_rounds'])
+    scan_range = settings['range']
+    center = {'x':settings['x_cor'], 'y':settings['y_cor']}
+    start = {axis:center[axis]-scan_range for axis in center}
+    stop = {axis:center[axis]+scan_range for axis in center}
+    passes = [(axis,dir) for axis in args.axes for dir in range(2)]
+    plan = compile_plan(args.tools,rounds,passes,center,start,stop,settings['z_cor'],1,60,settings['homing_on'],settings['fan_on'])
+    if args.gcode:
+        print(describe_plan(plan))
+    estimate = simulate(plan,scan_range,settings['speed'],0.27,settings.get('cooldown_time',0),args.heating_time)
+    print('%d lines of G-code in %d writes, estimated duration %.0f s' % (estimate['lines'],estimate['writes'],estimate['total']))
+    for kind in ['gcode','wait_bed','wait_tool','scan','cooldown']:
+        print('%s: %.0f s' % (kind,estimate.get(kind,0)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+.. module:: reader
+    :synopsis: This class receives the bytes of several LDC1101EVMs in a single thread
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+Every :class:`ldc1101evm.ldc1101evm` registers its serial port with a :class:`serial_reader`, which hands each chunk of received bytes to the sensor it belongs to together with the time at which it arrived. Sensors sharing a reader therefore have timestamps from the same clock, such that their samples can be aligned in time.
+
+On Linux and macOS the reader waits for all ports at once with :mod:`selectors`. Serial ports on Windows, and objects that only behave like a serial port such as :class:`capture.replay_port`, can not be waited for that way, so then the ports are polled instead.
+"""
+import selectors
+import sys
+import threading
+from time import sleep, time
+
+class serial_reader:
+    """Class with a thread that reads the serial ports of all registered sensors
+    """
+
+    poll_interval = 0.001
+    """The time to wait in seconds when polling and no port received bytes"""
+
+    select_timeout = 0.1
+    """The maximum time in seconds to wait for bytes with :mod:`selectors`, after which changes in the registered sensors are picked up"""
+
+    def __init__(self):
+        """Code run when the serial_reader object is initialised. This starts the thread, which waits for sensors to be registered.
+
+        :return: None
+        :rtype: None
+        """
+        self.sensors = []
+        self.lock = threading.Lock()
+        self.stop_thread = False
+        self.selector = None
+        self.thread = threading.Thread(target=self.reader_daemon, args=(), daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def selectable(port):
+        """Function for checking if a port can be waited for with :mod:`selectors`
+
+        :param port: The serial port
+        :return: True if the port has a file descriptor that can be selected
+        :rtype: Boolean
+        """
+        if sys.platform.startswith('win') or not hasattr(port,'fileno'):
+            return False
+        try:
+            port.fileno()
+        except Exception:
+            return False
+        return True
+
+    def register(self,sensor):
+        """Function for starting to read the port of a sensor
+
+        :param sensor: Object with the serial port in the attribute ser, a method receive(data,timestamp) that is called with every chunk of received bytes and an attribute error that is set to True when the port fails
+        :return: None
+        :rtype: None
+        """
+        with self.lock:
+            self.sensors.append(sensor)
+            self.__update_selector()
+
+    def unregister(self,sensor):
+        """Function for stopping to read the port of a sensor
+
+        :param sensor: A sensor passed to :meth:`serial_reader.register` before
+        :return: None
+        :rtype: None
+        """
+        with self.lock:
+            if sensor in self.sensors:
+                self.sensors.remove(sensor)
+                self.__update_selector()
+
+    def __update_selector(self):
+        """Function for creating a selector for the registered ports, or None if some of them can not be selected such that all ports are polled
+
+        :return: None
+        :rtype: None
+        """
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+        if self.sensors and all(self.selectable(sensor.ser) for sensor in self.sensors):
+            self.selector = selectors.DefaultSelector()
+            for sensor in self.sensors:
+                self.selector.register(sensor.ser.fileno(),selectors.EVENT_READ,sensor)
+
+    def __read(self,sensor):
+        """Function for reading the bytes waiting at the port of a sensor and handing them to the sensor
+
+        :param sensor: The sensor
+        :return: The number of bytes read
+        :rtype: int
+        """
+        try:
+            if not sensor.ser.isOpen():
+                return 0
+            waiting = sensor.ser.in_waiting
+            if waiting == 0:
+                return 0
+            received_bytes = bytes(sensor.ser.read(waiting))
+        except Exception:
+            print('error: could not read data from LDC1101')
+            sensor.error = True
+            self.unregister(sensor)
+            return 0
+        sensor.receive(received_bytes,time())
+        return len(received_bytes)
+
+    def reader_daemon(self):
+        """The daemon which is run in a seperate thread and reads the ports of all registered sensors until :meth:`serial_reader.close` is called
+
+        :return: None
+        :rtype: None
+        """
+        while not self.stop_thread:
+            with self.lock:
+                selector = self.selector
+                sensors = list(self.sensors)
+            if selector is not None:
+                try:
+                    events = selector.select(self.select_timeout)
+                except (OSError,ValueError):
+                    #the selector was replaced while waiting
+                    continue
+                for key, _ in events:
+                    self.__read(key.data)
+            elif sum(self.__read(sensor) for sensor in sensors) == 0:
+                sleep(self.poll_interval)
+
+    def close(self):
+        """Function for stopping the thread. The ports themselves are closed by the sensors.
+
+        :return: None
+        :rtype: None
+        """
+        self.stop_thread = True
+        self.thread.join(1)
+        with self.lock:
+            self.sensors = []
+            self.__update_selector()
@@ -0,0 +1,187 @@
+"""
+.. module:: reanalyse
+    :synopsis: This script processes stored calibrations again without the GUI
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+It can be used for example to evaluate a new method for finding the nozzle location over an archive of calibrations. The .mat files are loaded and fitted in parallel processes and the results of all passes are written to a single CSV table.
+
+The .mat files can not be memory-mapped, so with --cache the arrays of each file are also stored as .npy files the first time it is loaded. Later runs memory-map these instead of parsing the .mat file again, and only read the samples that are actually used.
+
+Example: python reanalyse.py archive --method polynomial mirror --output offsets.csv
+"""
+import csv
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import analysis
+
+arrays = ['pos','time','data']
+"""The large arrays of a calibration, which are cached as .npy files"""
+
+def find_archives(paths):
+    """Function for finding all .mat files in a list of files and folders. Folders are searched recursively and checkpoint files are skipped.
+
+    :param paths: List with file and folder names
+    :return: The sorted list of .mat files
+    :rtype: list
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += glob.glob(os.path.join(path,'**','*.mat'),recursive=True)
+        else:
+            files.append(path)
+    return sorted(file for file in files if not file.endswith('_checkpoint.mat'))
+
+def load_archive(filename,cache=None):
+    """Function for loading a .mat file stored by the GUI. If a cache folder is given, the large arrays are memory-mapped from the .npy files in it, which are created if they do not exist or are older than the .mat file.
+
+    :param filename: The name of the .mat file
+    :param cache: The folder for the .npy files, or None to not use a cache
+    :return: Dict with the contents of the file
+    :rtype: Dict
+    """
+    import scipy.io as sio
+    if cache is not None:
+        base = os.path.join(cache,os.path.abspath(filename).replace(':','').strip(os.sep).replace(os.sep,'__'))
+        meta_file = base + '.meta'
+        if os.path.exists(meta_file) and os.path.getmtime(meta_file) >= os.path.getmtime(filename):
+            with open(meta_file,'rb') as stream:
+                archive = sio.loadmat(stream)
+            for key in arrays:
+                if os.path.exists(base + '.' + key + '.npy'):
+                    archive[key] = np.load(base + '.' + key + '.npy',mmap_mode='r')
+            return archive
+
+    archive = sio.loadmat(filename)
+    if cache is not None:
+        os.makedirs(cache,exist_ok=True)
+        for key in arrays:
+            if key in archive:
+                np.save(base + '.' + key + '.npy',archive[key])
+        with open(meta_file,'wb') as stream:
+            sio.savemat(stream,{key:value for key,value in archive.items() if key not in arrays and not key.startswith('__')})
+    return archive
+
+def archive_axes(archive):
+    """Function for finding the axes calibrated in a calibration file. Files of older versions only store whether x was calibrated.
+
+    :param archive: Dict with the contents of the file
+    :return: The calibrated axes, 'x', 'y' or 'xy'
+    :rtype: string
+    """
+    if 'axes' in archive:
+        return str(np.atleast_1d(archive['axes'])[0])
+    if 'calibrated_x' in archive and not archive['calibrated_x'].any():
+        return 'y'
+    return 'x'
+
+def analyse_archive(filename,methods,drift_compensation=False,cache=None):
+    """Function for fitting all passes of a calibration file with each of the given methods. Files stored by the test sensor button only contain the inductance, for these the noise is reported instead.
+
+    :param filename: The name of the .mat file
+    :param methods: List with names of methods in :data:`analysis.fit_methods`
+    :param drift_compensation: If the thermal drift should be removed before fitting, see :func:`analysis.remove_drift`
+    :param cache: The folder for the .npy files, or None to not use a cache
+    :return: List with a dict for each pass and method
+    :rtype: list
+    """
+    try:
+        archive = load_archive(filename,cache)
+    except Exception as error:
+        return [{'file':filename, 'kind':'error', 'error':str(error)}]
+
+    if 'L' in archive:
+        L = np.ravel(archive['L'])
+        return [{'file':filename, 'kind':'sensor', 'samples':len(L), 'quality':np.std(L)}]
+    if 'data' not in archive:
+        return [{'file':filename, 'kind':'error', 'error':'not a calibration file'}]
+
+    axes = archive_axes(archive)
+    passes = [(axis,dir) for axis in axes for dir in range(2)]
+    tool_list = [int(tool) for tool in np.ravel(archive['tool_list'])]
+    n_tools = len(tool_list)
+    data_shape = [-1,n_tools,archive['data'].size//archive['data'].shape[0]//(n_tools*len(passes)),len(passes)]
+    pos = np.reshape(archive['pos'],data_shape)
+    data = np.reshape(archive['data'],data_shape)
+    timestamps = np.reshape(archive['time'],data_shape)
+    rounds = data.shape[2]
+    if 'measured' in archive:
+        measured = np.reshape(archive['measured'],[n_tools,rounds,len(passes)]).astype(bool)
+    else:
+        measured = np.ones([n_tools,rounds,len(passes)],dtype=bool)
+    #passes located with a template only have a few samples around the nozzle, which can not be fitted again
+    if 'templated' in archive:
+        measured = measured & ~np.reshape(archive['templated'],[n_tools,rounds,len(passes)]).astype(bool)
+
+    #fit all passes with all methods, using the same samples as the GUI
+    loc = np.full([len(methods),n_tools,rounds,len(passes)],np.nan)
+    quality = np.full([len(methods),n_tools,rounds,len(passes)],np.nan)
+    samples = np.zeros([n_tools,rounds,len(passes)],dtype=int)
+    for tool in range(n_tools):
+        for cycle in range(rounds):
+            for scan in range(len(passes)):
+                n = np.count_nonzero(timestamps[:,tool,cycle,scan])
+                samples[tool,cycle,scan] = n
+                if not measured[tool,cycle,scan] or n < 10:
+                    continue
+                x = np.array(pos[int(n/10):int(9/10*n),tool,cycle,scan])
+                y = np.array(data[0:n,tool,cycle,scan])
+                if drift_compensation:
+                    #like the GUI a pass with too few samples outside the dip is fitted without compensation
+                    try:
+                        y = analysis.remove_drift(np.array(timestamps[0:n,tool,cycle,scan]),y,np.array(pos[0:n,tool,cycle,scan]))
+                    except RuntimeError:
+                        pass
+                y = y[int(n/10):int(9/10*n)]
+                for method in range(len(methods)):
+                    try:
+                        loc[method,tool,cycle,scan] = analysis.find_symmetry_axis(x,y,methods[method])
+                        quality[method,tool,cycle,scan] = analysis.symmetry_error(x,y,loc[method,tool,cycle,scan])
+                    except (RuntimeError,ValueError,np.linalg.LinAlgError):
+                        pass
+
+    rows = []
+    for method in range(len(methods)):
+        for tool in range(n_tools):
+            for cycle in range(rounds):
+                for scan in range(len(passes)):
+                    if samples[tool,cycle,scan] == 0:
+                        continue
+                    rows.append({'file':filename, 'kind':'calibration', 'method':methods[method], 'tool':tool_list[tool], 'reference_tool':tool_list[0], 'round':cycle, 'axis':passes[scan][0], 'direction':['up','down'][passes[scan][1]],
+                        'samples':samples[tool,cycle,scan], 'time':timestamps[0,tool,cycle,scan], 'location':loc[method,tool,cycle,scan], 'offset':loc[method,0,cycle,scan]-loc[method,tool,cycle,scan], 'quality':quality[method,tool,cycle,scan]})
+    return rows
+
+columns = ['file','kind','method','tool','reference_tool','round','axis','direction','samples','time','location','offset','quality','error']
+"""The columns of the table written by :func:`main`"""
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Process stored calibrations of the inductive calibration GUI again')
+    parser.add_argument('paths', nargs='+', help='.mat files or folders containing them')
+    parser.add_argument('--method', nargs='+', default=['polynomial'], choices=list(analysis.fit_methods), help='Methods for finding the nozzle location')
+    parser.add_argument('--drift', action='store_true', help='Remove the thermal drift before fitting')
+    parser.add_argument('--workers', type=int, help='Number of processes, the number of processors by default')
+    parser.add_argument('--cache', help='Folder in which the arrays are stored as .npy files for memory-mapping them in later runs')
+    parser.add_argument('--output', default='reanalysis.csv', help='CSV file to which the results are written')
+    args = parser.parse_args()
+
+    files = find_archives(args.paths)
+    print('processing %d files' % len(files))
+    tic = time.time()
+    n_rows = 0
+    with ProcessPoolExecutor(args.workers) as executor, open(args.output,'w',newline='') as stream:
+        writer = csv.DictWriter(stream,columns)
+        writer.writeheader()
+        results = executor.map(analyse_archive,files,[args.method]*len(files),[args.drift]*len(files),[args.cache]*len(files))
+        for filename, rows in zip(files,results):
+            writer.writerows(rows)
+            n_rows += len(rows)
+            if rows and rows[0]['kind'] == 'error':
+                print('%s: %s' % (filename,rows[0]['error']))
+    print('wrote %d rows to %s in %.1f s' % (n_rows,args.output,time.time()-tic))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+.. module:: startup_benchmark
+    :synopsis: This script measures the startup time of the inductive calibration GUI, such that changes in the startup time can be tracked
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+import datetime
+import io
+import os
+import numpy as np
+
+def measure_startup(command, cwd):
+    """Function for starting the application once in benchmark mode and measuring how long it takes before the window is shown and the event loop is running.
+
+    :param command: List with the command used to start the application
+    :param cwd: The folder to start the application in
+    :return: The startup time reported by the application itself and the total wall clock time including starting the interpreter and closing the application, both in seconds
+    :rtype: tuple
+    """
+    tic = time.time()
+    result = subprocess.run(command + ['--startup-benchmark'], cwd=cwd, capture_output=True, text=True)
+    toc = time.time() - tic
+    reported = np.nan
+    for line in result.stdout.splitlines():
+        if line.startswith('startup time:'):
+            reported = float(line.split(':')[1].strip().split(' ')[0])
+    if np.isnan(reported):
+        print(result.stderr)
+    return reported, toc
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the startup time of the inductive calibration GUI')
+    parser.add_argument('--exe', help='Frozen application to benchmark instead of app.py')
+    parser.add_argument('--runs', type=int, default=5, help='Number of times to start the application')
+    parser.add_argument('--log', help='CSV file to which the median startup time is appended, for tracking the startup time over time')
+    args = parser.parse_args()
+
+    if args.exe:
+        command = [os.path.abspath(args.exe)]
+    else:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')]
+    cwd = os.path.dirname(command[-1])
+
+    reported = np.zeros(args.runs)
+    total = np.zeros(args.runs)
+    for i1 in range(args.runs):
+        reported[i1], total[i1] = measure_startup(command, cwd)
+        print('run ' + str(i1+1) + ': ' + f"{reported[i1]:.3f}" + ' s until event loop, ' + f"{total[i1]:.3f}" + ' s in total')
+
+    print('median: ' + f"{np.median(reported):.3f}" + ' s until event loop, ' + f"{np.median(total):.3f}" + ' s in total')
+
+    if args.log:
+        new_file = not os.path.exists(args.log)
+        with io.open(args.log, 'a', encoding='utf8') as outfile:
+            if new_file:
+                outfile.write('date,command,runs,median_startup,median_total\n')
+            outfile.write(datetime.datetime.now().isoformat() + ',' + ' '.join(command) + ',' + str(args.runs) + ',' + f"{np.median(reported):.3f}" + ',' + f"{np.median(total):.3f}" + '\n')
+
+if __name__ == '__main__':
+    main()
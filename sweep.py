@@ -0,0 +1,203 @@
+"""
+.. module:: sweep
+    :synopsis: This module finds the fastest calibration settings that still give the required precision
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+The GUI measures the reference tool for a number of rounds with every combination of speed, scanning range and height in a grid, and stores each run in its own .mat file. While the next combination is measured, the stored runs are analysed in parallel processes: the repeatability of the nozzle location and the time per round follow from the passes, and from these the number of rounds needed to reach a target standard error of the offset.
+
+The analysis can also be repeated without the GUI, for example: python sweep.py calibration_sweep_*.mat --target 0.005 --write settings.yaml
+"""
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import reanalyse
+
+def parse_values(text):
+    """Function for reading a list of values typed in the GUI
+
+    :param text: The values separated by commas or spaces, for example '1, 2, 4'
+    :return: List with the values
+    :rtype: list
+    """
+    values = [float(value) for value in text.replace(',',' ').split()]
+    if len(values) == 0:
+        raise ValueError('no values given')
+    return values
+
+def sweep_grid(speeds,ranges,heights):
+    """Function for listing all combinations of the settings to measure, the fastest ones first
+
+    :param speeds: List with the speeds in mm/s
+    :param ranges: List with the scanning ranges in mm
+    :param heights: List with the heights of the nozzle above the coil in mm
+    :return: List with a dict for each combination, with the keys 'speed', 'scan_range' and 'z_pos' of the run settings of :meth:`app.MainWindow.calibrate`
+    :rtype: list
+    """
+    grid = [{'speed':speed, 'scan_range':scan_range, 'z_pos':z_pos} for speed, scan_range, z_pos in itertools.product(speeds,ranges,heights)]
+    return sorted(grid,key=lambda setting: setting['scan_range']/setting['speed'])
+
+def sweep_filename(filename,setting):
+    """Function for getting the name of the file in which the run with a combination of settings is stored
+
+    :param filename: The name of the data file of a normal calibration
+    :param setting: Dict with the settings of the run, see :func:`sweep_grid`
+    :return: For example 'calibration_sweep_v2_r4_z9.4.mat' for 'calibration.mat'
+    :rtype: string
+    """
+    if filename.endswith('.mat'):
+        filename = filename[:-4]
+    return filename + '_sweep_v%g_r%g_z%g.mat' % (setting['speed'],setting['scan_range'],setting['z_pos'])
+
+def analyse_setting(filename):
+    """Function for determining the repeatability and duration of a run of the sweep. The location of the reference tool is averaged over the directions of each round, and the standard deviation of these averages is the repeatability along an axis. The offset of a tool is the difference of two such locations, so its standard deviation is taken to be sqrt(2) times the worst repeatability of the axes.
+
+    :param filename: The name of the .mat file of the run
+    :return: Dict with the settings of the run, the number of rounds, the number of failed passes, the standard deviation of the offset of a single round in mm ('repeatability'), the time per round in s ('round_time') and an error message if the file could not be analysed
+    :rtype: Dict
+    """
+    import scipy.io as sio
+    result = {'file':filename, 'rounds':0, 'failed':0, 'repeatability':np.nan, 'round_time':np.nan, 'error':''}
+    try:
+        run_settings = sio.loadmat(filename,variable_names=['run_settings'],simplify_cells=True)['run_settings']
+    except (OSError,KeyError,ValueError) as error:
+        result['error'] = 'no run settings in file: ' + str(error)
+        return result
+    for key in ['speed','scan_range','z_pos']:
+        result[key] = float(run_settings[key])
+
+    rows = [row for row in reanalyse.analyse_archive(filename,['polynomial']) if row['kind'] == 'calibration' and row['tool'] == row['reference_tool']]
+    if len(rows) == 0:
+        result['error'] = 'no passes found'
+        return result
+    rounds = max(row['round'] for row in rows) + 1
+    result['rounds'] = rounds
+    result['failed'] = sum(1 for row in rows if not np.isfinite(row['location']))
+
+    #the location of each round is the average of the directions, like the offsets calculated by the GUI
+    deviations = []
+    for axis in sorted(set(row['axis'] for row in rows)):
+        locations = np.full([rounds,2],np.nan)
+        for row in rows:
+            if row['axis'] == axis:
+                locations[row['round'],['up','down'].index(row['direction'])] = row['location']
+        averages = locations.mean(axis=1)
+        averages = averages[np.isfinite(averages)]
+        if len(averages) >= 2:
+            deviations.append(averages.std(ddof=1))
+    if deviations:
+        result['repeatability'] = np.sqrt(2)*max(deviations)
+
+    #the time per round follows from the start of the first pass of consecutive rounds, which includes moving, cooling down and changing tools
+    starts = [min(row['time'] for row in rows if row['round'] == cycle) for cycle in range(rounds)]
+    if rounds >= 2:
+        result['round_time'] = float(np.median(np.diff(starts)))
+    return result
+
+def analyse_sweep(files,workers=None):
+    """Function for analysing the runs of a sweep in parallel processes, see :func:`analyse_setting`
+
+    :param files: List with the names of the .mat files
+    :param workers: The number of processes, the number of processors by default
+    :return: List with a dict for each file
+    :rtype: list
+    """
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(analyse_setting,files))
+
+def required_rounds(result,target_error):
+    """Function for calculating the number of rounds needed to get the standard error of the offset below the target with the settings of a run
+
+    :param result: Dict with the analysis of the run, see :func:`analyse_setting`
+    :param target_error: The target standard error of the offset in mm
+    :return: The number of rounds, or infinity if the repeatability is unknown
+    :rtype: int or float
+    """
+    if not np.isfinite(result['repeatability']):
+        return np.inf
+    return max(math.ceil((result['repeatability']/target_error)**2),1)
+
+def recommend(results,target_error,max_rounds=20):
+    """Function for selecting the settings with which a calibration reaches the target precision in the shortest time. Runs with failed passes are not considered, since settings that sometimes fail are not reliable.
+
+    :param results: List with the analyses of the runs, see :func:`analyse_setting`
+    :param target_error: The target standard error of the offset in mm
+    :param max_rounds: The maximum number of rounds that may be recommended
+    :return: The analysis of the best run, the number of rounds and the time per tool in s, or None if no settings reach the target
+    :rtype: tuple
+    """
+    best = None
+    for result in results:
+        rounds = required_rounds(result,target_error)
+        if result['error'] or result['failed'] > 0 or rounds > max_rounds or not np.isfinite(result['round_time']):
+            continue
+        duration = rounds*result['round_time']
+        if best is None or duration < best[2]:
+            best = (result,rounds,duration)
+    return best
+
+def describe(result,target_error):
+    """Function for describing the analysis of a run in a single line
+
+    :param result: Dict with the analysis of the run, see :func:`analyse_setting`
+    :param target_error: The target standard error of the offset in mm
+    :return: For example 'speed 2 mm/s, range 4 mm, z 9.4 mm: 0.0041 mm per round, 38.2 s per round, 3 rounds needed'
+    :rtype: string
+    """
+    if result['error']:
+        return os.path.basename(result['file']) + ': ' + result['error']
+    text = 'speed %g mm/s, range %g mm, z %g mm: %.4f mm per round, %.1f s per round' % (result['speed'],result['scan_range'],result['z_pos'],result['repeatability'],result['round_time'])
+    if result['failed'] > 0:
+        text = text + ', ' + str(result['failed']) + ' passes failed'
+    rounds = required_rounds(result,target_error)
+    if np.isfinite(rounds):
+        text = text + ', ' + str(rounds) + ' rounds needed'
+    return text
+
+def write_settings(filename,result,rounds):
+    """Function for storing recommended settings in the settings file of the GUI. The other settings in the file are kept.
+
+    :param filename: The name of the settings file, normally settings.yaml
+    :param result: Dict with the analysis of the recommended run, see :func:`analyse_setting`
+    :param rounds: The recommended number of rounds, used for both axes
+    :return: None
+    :rtype: None
+    """
+    import io
+    import yaml
+    with open(filename,'r') as stream:
+        settings_dict = yaml.safe_load(stream)
+    settings_dict['speed'] = result['speed']
+    settings_dict['range'] = result['scan_range']
+    settings_dict['z_cor'] = result['z_pos']
+    settings_dict['x_rounds'] = rounds
+    settings_dict['y_rounds'] = rounds
+    with io.open(filename, 'w', encoding='utf8') as outfile:
+        yaml.dump(settings_dict, outfile, default_flow_style=False, allow_unicode=True)
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Recommend calibration settings from the runs of a sweep made by the inductive calibration GUI')
+    parser.add_argument('files', nargs='+', help='The .mat files of the sweep')
+    parser.add_argument('--target', type=float, default=0.005, help='The target standard error of the offsets in mm')
+    parser.add_argument('--max-rounds', type=int, default=20, help='The maximum number of rounds to recommend')
+    parser.add_argument('--workers', type=int, help='Number of processes, the number of processors by default')
+    parser.add_argument('--write', help='Settings file in which the recommended settings are stored, for example settings.yaml')
+    args = parser.parse_args()
+
+    results = analyse_sweep(args.files,args.workers)
+    for result in results:
+        print(describe(result,args.target))
+    best = recommend(results,args.target,args.max_rounds)
+    if best is None:
+        print('no settings reach a standard error of %g mm within %d rounds' % (args.target,args.max_rounds))
+        return
+    result, rounds, duration = best
+    print('recommended: speed %g mm/s, range %g mm, z %g mm, %d rounds, %.0f s per tool' % (result['speed'],result['scan_range'],result['z_pos'],rounds,duration))
+    if args.write:
+        write_settings(args.write,result,rounds)
+        print('stored in ' + args.write)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""
+.. module:: telemetry
+    :synopsis: This module publishes the progress of a calibration over a local TCP connection
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+This way it can be followed without looking at the GUI, for example from a dashboard or with the viewer in this module. Every message is a frame consisting of a header with the message type and the length of the payload, followed by the payload packed with :mod:`struct`. All numbers are little-endian and every payload starts with the time in seconds since the epoch.
+
+Run this module to show the messages of a running GUI, for example: python telemetry.py --port 5025
+"""
+import socket
+import struct
+import threading
+import queue
+from time import time
+
+header = struct.Struct('<2sBH')
+"""The header of a frame: the characters 'IC', the message type and the length of the payload in bytes"""
+
+magic = b'IC'
+"""The first two bytes of every frame"""
+
+SAMPLE = 1
+"""Message with a sample: time, tool number, pass, position in mm and inductance in H. The pass is the index in the passes of the calibration, 255 for the test sensor button."""
+
+PHASE = 2
+"""Message with a change of the phase of the calibration: time followed by a description in UTF-8, for example 'heating' or 'tool 6 x up'"""
+
+RESULT = 3
+"""Message with the nozzle location found in a pass: time, tool number, axis ('x' or 'y'), direction (0 for up, 1 for down) and location in mm"""
+
+OFFSET = 4
+"""Message with the offset of a tool: time, tool number, axis, offset in mm and its standard deviation in mm"""
+
+HEALTH = 5
+"""Message with the health counters: time, number of samples, number of failed passes, number of samples rejected by the filter, number of frames dropped because a client could not keep up and whether the LDC1101EVM reported an error"""
+
+payloads = {
+    SAMPLE:struct.Struct('<dHBdd'),
+    PHASE:struct.Struct('<d'),
+    RESULT:struct.Struct('<dHcBd'),
+    OFFSET:struct.Struct('<dHcdd'),
+    HEALTH:struct.Struct('<dIIII?'),
+}
+"""The fixed part of the payload of each message type, the payload of a phase message is followed by the description"""
+
+names = {SAMPLE:'sample', PHASE:'phase', RESULT:'result', OFFSET:'offset', HEALTH:'health'}
+"""The names of the message types, used by the viewer"""
+
+def encode(kind,*values):
+    """Function for packing a message into a frame
+
+    :param kind: The message type, for example :data:`SAMPLE`
+    :param values: The values of the payload, without the time, which is added. For :data:`PHASE` the description.
+    :return: The frame
+    :rtype: bytes
+    """
+    if kind == PHASE:
+        payload = payloads[PHASE].pack(time()) + values[0].encode('utf8')
+    else:
+        values = [value.encode('ascii') if isinstance(value,str) else value for value in values]
+        payload = payloads[kind].pack(time(),*values)
+    return header.pack(magic,kind,len(payload)) + payload
+
+def decode(kind,payload):
+    """Function for unpacking the payload of a frame
+
+    :param kind: The message type
+    :param payload: The payload
+    :return: The values of the payload, starting with the time. Characters and the description of a phase are returned as strings.
+    :rtype: tuple
+    """
+    if kind == PHASE:
+        size = payloads[PHASE].size
+        return payloads[PHASE].unpack(payload[:size]) + (payload[size:].decode('utf8'),)
+    values = payloads[kind].unpack(payload)
+    return tuple(value.decode('ascii') if isinstance(value,bytes) else value for value in values)
+
+def read_frames(stream):
+    """Generator for reading the frames from a connection
+
+    :param stream: A socket connected to a :class:`telemetry_server`
+    :return: Tuples with the message type and the values of the payload, see :func:`decode`. Unknown message types are skipped.
+    :rtype: generator
+    """
+    buffer = b''
+    while True:
+        received = stream.recv(65536)
+        if not received:
+            return
+        buffer = buffer + received
+        while len(buffer) >= header.size:
+            start, kind, length = header.unpack_from(buffer)
+            if start != magic:
+                raise RuntimeError('telemetry stream is out of sync')
+            if len(buffer) < header.size + length:
+                break
+            payload = buffer[header.size:header.size+length]
+            buffer = buffer[header.size+length:]
+            if kind in payloads:
+                yield kind, decode(kind,payload)
+
+class telemetry_server:
+    """Class for publishing messages to all clients connected to a TCP port. Every client has its own queue and thread for sending, such that a slow client does not delay the calibration. When the queue of a client is full, new frames for it are dropped and counted in :attr:`telemetry_server.dropped`.
+    """
+
+    queue_size = 10000
+    """The maximum number of frames waiting to be sent to a client"""
+
+    def __init__(self,port=5025,host='127.0.0.1'):
+        """Code run when the telemetry_server object is initialised. The server is not started yet.
+
+        :param port: The TCP port to listen on
+        :param host: The address to listen on, only the local computer by default
+        :return: None
+        :rtype: None
+        """
+        self.port = port
+        self.host = host
+        self.listener = None
+        self.clients = []
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def running(self):
+        """True if the server is listening for clients"""
+        return self.listener is not None
+
+    def start(self):
+        """Function for starting to listen for clients in a background thread
+
+        :return: None
+        :rtype: None
+        """
+        if self.running:
+            return
+        self.listener = socket.create_server((self.host,self.port))
+        thread = threading.Thread(target=self.__accept, args=(self.listener,), daemon=True)
+        thread.start()
+
+    def __accept(self,listener):
+        """Function run in a seperate thread that accepts clients until the server is stopped
+
+        :param listener: The listening socket
+        :return: None
+        :rtype: None
+        """
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            connection.setsockopt(socket.IPPROTO_TCP,socket.TCP_NODELAY,1)
+            frames = queue.Queue(self.queue_size)
+            with self.lock:
+                self.clients.append((connection,frames))
+            thread = threading.Thread(target=self.__send, args=(connection,frames), daemon=True)
+            thread.start()
+
+    def __send(self,connection,frames):
+        """Function run in a seperate thread for each client, which sends the queued frames until the client disconnects or the server is stopped
+
+        :param connection: The socket of the client
+        :param frames: The queue with the frames for the client, None stops the thread
+        :return: None
+        :rtype: None
+        """
+        while True:
+            frame = frames.get()
+            #send whatever else is waiting in the same call, to reduce the number of packets
+            try:
+                while frame is not None and len(frame) < 65536:
+                    next_frame = frames.get_nowait()
+                    if next_frame is None:
+                        frames.put(None)
+                        break
+                    frame = frame + next_frame
+            except queue.Empty:
+                pass
+            if frame is None:
+                break
+            try:
+                connection.sendall(frame)
+            except OSError:
+                break
+        with self.lock:
+            self.clients = [client for client in self.clients if client[0] is not connection]
+        connection.close()
+
+    def publish(self,kind,*values):
+        """Function for sending a message to all clients, see :func:`encode`. Without clients this returns immediately.
+
+        :param kind: The message type, for example :data:`SAMPLE`
+        :param values: The values of the payload
+        :return: None
+        :rtype: None
+        """
+        if not self.clients:
+            return
+        frame = encode(kind,*values)
+        with self.lock:
+            for _, frames in self.clients:
+                try:
+                    frames.put_nowait(frame)
+                except queue.Full:
+                    self.dropped = self.dropped + 1
+
+    def stop(self):
+        """Function for stopping the server and disconnecting all clients
+
+        :return: None
+        :rtype: None
+        """
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        with self.lock:
+            for _, frames in self.clients:
+                try:
+                    frames.put_nowait(None)
+                except queue.Full:
+                    pass
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Show the telemetry of a running inductive calibration GUI')
+    parser.add_argument('--host', default='127.0.0.1', help='The address of the computer running the GUI')
+    parser.add_argument('--port', type=int, default=5025, help='The telemetry port')
+    parser.add_argument('--samples', action='store_true', help='Also show every sample instead of only counting them')
+    args = parser.parse_args()
+
+    connection = socket.create_connection((args.host,args.port))
+    samples = 0
+    try:
+        for kind, values in read_frames(connection):
+            if kind == SAMPLE:
+                samples = samples + 1
+                if not args.samples:
+                    continue
+            print(names[kind] + ' ' + ' '.join(f"{value:.6g}" if isinstance(value,float) else str(value) for value in values[1:]))
+    except KeyboardInterrupt:
+        pass
+    print('%d samples received' % samples)
+
+if __name__ == '__main__':
+    main()
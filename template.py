@@ -0,0 +1,193 @@
+"""
+.. module:: template
+    :synopsis: This class stores the response of the coil to a nozzle in a local SQLite database
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+
+This way later calibrations can locate the nozzle from a few samples instead of a whole pass. The response of a given nozzle over a given coil at a given height has nearly the same shape every time, so it is learned as a template from the passes of earlier calibrations and registered to the samples with :func:`analysis.register_template`.
+"""
+import sqlite3
+import time
+from collections import namedtuple
+import numpy as np
+import analysis
+
+template_key = namedtuple('template_key',['printer','tool','axis','direction','z','coil_x','coil_y','temperature','conversion_profile','sample_filter'])
+"""The settings a template belongs to. A template is only used with exactly the same settings, so changing any of them starts learning a new template."""
+
+template = namedtuple('template',['u','profile','count','timestamp'])
+"""A learned template: the distances from the location of the nozzle, the normalised response at those distances (see :func:`analysis.response_profile`), the number of passes it was learned from and the time it was last updated"""
+
+def key(printer,tool,axis,direction,z,coil_x,coil_y,temperature,conversion_profile,sample_filter):
+    """Function for making the key of a template. The positions and the temperature are rounded, such that the same settings always give the same key.
+
+    :param printer: The name of the printer
+    :param tool: The number of the tool
+    :param axis: The axis of the pass, 'x' or 'y'
+    :param direction: The direction of the pass, 0 for up and 1 for down
+    :param z: The height of the nozzle above the coil in mm
+    :param coil_x: The x coordinate of the coil in mm
+    :param coil_y: The y coordinate of the coil in mm
+    :param temperature: The nozzle temperature in degrees Celcius
+    :param conversion_profile: The name of the conversion profile of the LDC1101EVM, see :attr:`ldc1101evm.ldc1101evm.conversion_profiles`
+    :param sample_filter: The name of the filter applied to the samples, see :data:`dsp.filter_names`
+    :return: The key of the template
+    :rtype: template_key
+    """
+    return template_key(printer,int(tool),axis,int(direction),round(float(z),2),round(float(coil_x),2),round(float(coil_y),2),round(float(temperature)),conversion_profile,sample_filter)
+
+def width(learned):
+    """Function for calculating the half width of the dip of a template at half its depth
+
+    :param learned: The template
+    :return: The half width in mm
+    :rtype: float
+    """
+    inside = learned.u[learned.profile <= -0.5]
+    if len(inside) == 0:
+        return np.max(learned.u)
+    return max(-np.min(inside),np.max(inside))
+
+def sample_positions(learned,expected,count,low,high):
+    """Function for choosing the positions at which a pass is sampled when the nozzle is located with a template. The samples are spread evenly over the flanks of the dip on both sides of the expected location, which is where the response changes most with the location of the nozzle.
+
+    :param learned: The template
+    :param expected: The expected location of the nozzle
+    :param count: The number of samples
+    :param low: The lowest position that may be sampled
+    :param high: The highest position that may be sampled
+    :return: Array with the positions in ascending order
+    :rtype: numpy array
+    """
+    reach = min(2*width(learned),np.max(learned.u))
+    return np.linspace(max(expected-reach,low),min(expected+reach,high),count)
+
+class template_cache:
+    """Class for learning, storing and invalidating the templates of the response. Each template is stored with the settings of :data:`template_key`, the number of passes it was learned from and the time it was last updated.
+    """
+    resolution = 0.05
+    """The distance in mm between the points of a template"""
+
+    max_count = 10
+    """The number of passes after which a template is no longer averaged, but follows new passes with a fixed weight, such that slow changes of the nozzle or the coil are followed"""
+
+    def __init__(self,filename='templates.sqlite',max_age=30*24*3600):
+        """Code run when the template_cache object is initialised. The database and its table are created if they do not exist yet.
+
+        :param filename: The name of the SQLite database file
+        :param max_age: The time in seconds after which a template that has not been updated is no longer used
+        :return: None
+        :rtype: None
+        """
+        self.max_age = max_age
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS templates (' + ', '.join(template_key._fields) + ', count INTEGER, timestamp REAL, u BLOB, profile BLOB, PRIMARY KEY (' + ', '.join(template_key._fields) + '))')
+        self.connection.commit()
+
+    def get(self,key):
+        """Function for getting the template belonging to a key
+
+        :param key: The key made with :func:`key`
+        :return: The template, or None if no template was learned or it is older than the maximum age
+        :rtype: template
+        """
+        row = self.connection.execute('SELECT count, timestamp, u, profile FROM templates WHERE ' + ' AND '.join(field + ' = ?' for field in template_key._fields),tuple(key)).fetchone()
+        if row is None or time.time() - row[1] > self.max_age:
+            return None
+        return template(np.frombuffer(row[2]),np.frombuffer(row[3]),row[0],row[1])
+
+    def learn(self,key,x,y,o):
+        """Function for updating a template with a pass in which the location of the nozzle was found by fitting. The response is symmetric around the nozzle, so the profile is averaged with its mirror image, which halves the noise and removes any asymmetry the noise would otherwise bias the registration with.
+
+        :param key: The key made with :func:`key`
+        :param x: List with the positions of the samples of the pass
+        :param y: List with the measured values of the pass
+        :param o: The location of the nozzle found in the pass
+        :return: The updated template
+        :rtype: template
+        """
+        learned = self.get(key)
+        if learned is None:
+            half_width = (np.max(x)-np.min(x))/2
+            u = np.linspace(-half_width,half_width,2*int(half_width/self.resolution)+1)
+            profile = np.full(len(u),np.nan)
+            count = 0
+        else:
+            u, profile, count = learned.u, learned.profile.copy(), learned.count
+
+        new = analysis.response_profile(x,y,o,u)
+        new = np.where(np.isfinite(new),new,new[::-1])
+        new = (new+new[::-1])/2
+
+        #average the passes, where the template is still unknown the new profile is used as it is
+        weight = 1/min(count+1,self.max_count)
+        known = np.isfinite(profile) & np.isfinite(new)
+        profile = np.where(np.isfinite(profile),profile,new)
+        profile[known] += weight*(new[known]-profile[known])
+        learned = template(u,profile,count+1,time.time())
+        self.connection.execute('INSERT OR REPLACE INTO templates VALUES (' + ','.join('?'*(len(template_key._fields)+4)) + ')',tuple(key) + (learned.count,learned.timestamp,u.tobytes(),profile.tobytes()))
+        self.connection.commit()
+        return learned
+
+    def invalidate(self,key):
+        """Function for removing a template, for example because samples did not match it. It is learned again from the next passes.
+
+        :param key: The key made with :func:`key`
+        :return: None
+        :rtype: None
+        """
+        self.connection.execute('DELETE FROM templates WHERE ' + ' AND '.join(field + ' = ?' for field in template_key._fields),tuple(key))
+        self.connection.commit()
+
+    def query(self,printer=None):
+        """Function for getting the keys of the stored templates with their number of passes and the time they were last updated
+
+        :param printer: Only return the templates of this printer if not None
+        :return: A list with a tuple of the key, the number of passes and the time for each template
+        :rtype: list
+        """
+        statement = 'SELECT ' + ', '.join(template_key._fields) + ', count, timestamp FROM templates'
+        values = []
+        if printer is not None:
+            statement += ' WHERE printer = ?'
+            values.append(printer)
+        rows = self.connection.execute(statement + ' ORDER BY timestamp DESC',values).fetchall()
+        return [(template_key(*row[:-2]),row[-2],row[-1]) for row in rows]
+
+    def clear(self,printer=None):
+        """Function for removing all templates
+
+        :param printer: Only remove the templates of this printer if not None
+        :return: None
+        :rtype: None
+        """
+        if printer is None:
+            self.connection.execute('DELETE FROM templates')
+        else:
+            self.connection.execute('DELETE FROM templates WHERE printer = ?',(printer,))
+        self.connection.commit()
+
+    def close(self):
+        """Function for closing the template database
+
+        :return: None
+        :rtype: None
+        """
+        self.connection.close()
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Show or remove the templates learned by the inductive calibration GUI')
+    parser.add_argument('--database', default='templates.sqlite', help='The template database')
+    parser.add_argument('--printer', help='Only show or remove the templates of this printer')
+    parser.add_argument('--clear', action='store_true', help='Remove the templates, such that they are learned again')
+    args = parser.parse_args()
+
+    cache = template_cache(args.database)
+    if args.clear:
+        cache.clear(args.printer)
+    for learned_key, count, timestamp in cache.query(args.printer):
+        print('%s  %-12s tool %2d  %s %-4s z %.2f  coil %.2f, %.2f  %3d C  %s/%s  %d passes' % (time.strftime('%Y-%m-%d %H:%M',time.localtime(timestamp)),learned_key.printer,learned_key.tool,learned_key.axis,['up','down'][learned_key.direction],learned_key.z,learned_key.coil_x,learned_key.coil_y,learned_key.temperature,learned_key.conversion_profile,learned_key.sample_filter,count))
+    cache.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""
+.. module:: conftest
+    :synopsis: This module makes the modules of the GUI importable from the tests
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import os
+import sys
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,101 @@
+"""
+.. module:: test_acquisition
+    :synopsis: This module tests the ring buffer through which the acquisition process passes the samples and the filtering of the samples taken from it
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import numpy as np
+import pytest
+import dsp
+from acquisition import ring_buffer, process_ldc1101evm
+
+class small_ring_buffer(ring_buffer):
+    capacity = 8
+
+@pytest.fixture
+def ring():
+    ring = small_ring_buffer()
+    yield ring
+    ring.close()
+
+def test_read_in_order(ring):
+    ring.write(np.arange(3.0),10+np.arange(3.0))
+    times, values, written, skipped = ring.read(0)
+    np.testing.assert_array_equal(times,[0,1,2])
+    np.testing.assert_array_equal(values,[10,11,12])
+    assert (written, skipped) == (3, 0)
+    times, values, written, skipped = ring.read(written)
+    assert len(values) == 0 and written == 3
+
+def test_wrap_around(ring):
+    read = 0
+    received = []
+    for start in range(0,30,5):
+        ring.write(np.arange(start,start+5.0),np.arange(start,start+5.0))
+        _, values, read, skipped = ring.read(read)
+        assert skipped == 0
+        received.append(values)
+    np.testing.assert_array_equal(np.concatenate(received),np.arange(30.0))
+
+def test_overrun(ring):
+    ring.write(np.arange(5.0),np.arange(5.0))
+    ring.write(np.arange(5.0,11.0),np.arange(5.0,11.0))
+    times, values, written, skipped = ring.read(0)
+    assert (written, skipped) == (11, 3)
+    np.testing.assert_array_equal(values,np.arange(3.0,11.0))
+
+def test_write_larger_than_capacity(ring):
+    ring.write(np.arange(20.0),np.arange(20.0))
+    _, values, written, skipped = ring.read(0)
+    assert (written, skipped) == (20, 12)
+    np.testing.assert_array_equal(values,np.arange(12.0,20.0))
+
+def test_attach(ring):
+    other = ring_buffer(ring.name)
+    try:
+        ring.write(np.arange(2.0),np.arange(2.0))
+        ring.error = True
+        _, values, written, _ = other.read(0)
+        np.testing.assert_array_equal(values,[0,1])
+        assert other.error
+    finally:
+        other.close()
+
+class fake_acquisition:
+    alive = True
+
+    def command(self,*command,timeout=None):
+        return None
+
+def sensor(ring,filter):
+    """Make a process_ldc1101evm without starting an acquisition process"""
+    result = process_ldc1101evm.__new__(process_ldc1101evm)
+    result.acquisition = fake_acquisition()
+    result.ring = ring
+    result.key = 0
+    result.read_count = 0
+    result.skipped = 0
+    result.error = False
+    result.filter = filter
+    result.samples = np.zeros(0)
+    result.sample_times = np.zeros(0)
+    return result
+
+def test_blocks_filtered_like_whole_signal(ring):
+    y = np.random.default_rng(0).standard_normal(30)
+    reader = sensor(ring,dsp.create_filter('outlier rejection + low-pass',1000))
+    for start in range(0,30,6):
+        ring.write(np.arange(start,start+6.0),y[start:start+6])
+        reader.decode_frames()
+    np.testing.assert_allclose(reader.samples,dsp.create_filter('outlier rejection + low-pass',1000).process(y))
+    assert not reader.error
+
+def test_flush_keeps_filter_state(ring):
+    """Samples dropped by a flush still pass through the filter, such that the filter continues as if they had been read"""
+    y = np.arange(10.0)
+    reader = sensor(ring,dsp.moving_average(4))
+    ring.write(np.arange(6.0),y[:6])
+    reader.flush()
+    assert len(reader.samples) == 0
+    ring.write(np.arange(6.0,10.0),y[6:])
+    reader.decode_frames()
+    np.testing.assert_allclose(reader.samples,dsp.moving_average(4).process(y)[6:])
@@ -0,0 +1,166 @@
+"""
+.. module:: test_analysis
+    :synopsis: This module tests the functions for finding the location of a nozzle in the inductance measured during a pass over the coil
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import os
+import numpy as np
+import pytest
+import analysis
+
+def dip(x,o,width=1.0,depth=1e-8):
+    """The response of a nozzle, with the half width at half depth given. Like the dips in data.mat it has recovered to a tenth of its depth at about twice that width."""
+    return 1e-6 - depth*np.exp(-np.log(2)*((x-o)/width)**2)
+
+center = 14.0
+"""The position of the coil in the synthetic passes, which like in data.mat is not at zero"""
+
+def synthetic_pass(o=center+0.3,noise=1e-11,count=400,seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(center-4,center+4,count)
+    return x, dip(x,o) + noise*rng.standard_normal(count)
+
+def stored_passes():
+    from scipy.io import loadmat
+    archive = loadmat(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'data.mat'))
+    pos, time, data, loc = archive['pos'], archive['time'], archive['data'], archive['loc']
+    for tool in range(data.shape[1]):
+        for cycle in range(data.shape[2]):
+            for scan in range(data.shape[3]):
+                n = np.count_nonzero(time[:,tool,cycle,scan])
+                yield pos[:n,tool,cycle,scan], data[:n,tool,cycle,scan], loc[tool,cycle,scan], time[:n,tool,cycle,scan]
+
+@pytest.mark.parametrize('method',list(analysis.fit_methods))
+def test_methods_find_synthetic_dip(method):
+    x, y = synthetic_pass()
+    assert analysis.find_symmetry_axis(x,y,method) == pytest.approx(center+0.3,abs=0.02)
+
+def test_symmetry_error():
+    x, y = synthetic_pass(noise=0)
+    assert analysis.symmetry_error(x,y,center+0.3) < 1e-3
+    assert analysis.symmetry_error(x,y,center+1.3) > 0.1
+
+def test_check_fit_accepts_dip():
+    x, y = synthetic_pass()
+    analysis.check_fit(x,y,analysis.find_symmetry_axis(x,y))
+
+def test_check_fit_rejects_noise():
+    rng = np.random.default_rng(1)
+    x = np.linspace(center-4,center+4,400)
+    y = 1e-6 + 1e-11*rng.standard_normal(400)
+    with pytest.raises(RuntimeError):
+        analysis.check_fit(x,y,center)
+
+def test_check_fit_rejects_edge():
+    x, y = synthetic_pass()
+    with pytest.raises(RuntimeError,match='outside'):
+        analysis.check_fit(x,y,center+3.9)
+
+def test_check_fit_rejects_asymmetric_location():
+    x, y = synthetic_pass()
+    with pytest.raises(RuntimeError):
+        analysis.check_fit(x,y,center+1.5)
+
+def test_is_outlier():
+    others = [0.10,0.11,0.09,0.10]
+    assert analysis.is_outlier(0.30,others)
+    assert not analysis.is_outlier(0.105,others)
+    assert not analysis.is_outlier(5.0,others[:2])
+
+@pytest.mark.parametrize('o',[center,center-1,center+1.5])
+def test_remove_drift(o):
+    """The drift is removed also when the dip is not in the middle of the pass, after which the location is the same as without drift"""
+    x, y = synthetic_pass(o=o,noise=0,count=500)
+    t = np.linspace(0,10,500)
+    corrected = analysis.remove_drift(t,y+5e-11*t,x)
+    np.testing.assert_allclose(corrected-corrected[0],y-y[0],atol=1e-10)
+    assert analysis.find_symmetry_axis(x,corrected) == pytest.approx(analysis.find_symmetry_axis(x,y),abs=0.005)
+    assert analysis.find_symmetry_axis(x,corrected,'mirror') == pytest.approx(o,abs=0.005)
+
+@pytest.mark.parametrize('o,half_range',[(center,1.5),(center-2.5,4)])
+def test_remove_drift_short_range(o,half_range):
+    """Without samples beyond the dip at the same distance on both sides the drift can not be told apart from the dip"""
+    x, y = synthetic_pass(o=o,noise=0,count=500)
+    inside = np.abs(x-center) < half_range
+    with pytest.raises(RuntimeError):
+        analysis.remove_drift(np.linspace(0,10,inside.sum()),y[inside],x[inside])
+
+def test_remove_drift_stored_passes():
+    """The passes of data.mat were measured with a cooldown of 3 s, so compensating their drift hardly moves the locations. Passes of which the dip is too wide for the scanning range are refused instead of being fitted with a trend that includes the dip."""
+    compensated = 0
+    for x, y, loc, t in stored_passes():
+        n = len(x)
+        try:
+            y = analysis.remove_drift(t,y,x)
+        except RuntimeError:
+            continue
+        compensated = compensated + 1
+        assert analysis.find_symmetry_axis(x[int(n/10):int(9/10*n)],y[int(n/10):int(9/10*n)]) == pytest.approx(loc,abs=0.005)
+    assert compensated > 0
+
+def test_dip_half_width():
+    x, y = synthetic_pass(noise=0)
+    assert analysis.dip_half_width(x,y,center+0.3) == pytest.approx(1,abs=0.05)
+
+def test_stored_fit():
+    """The polynomial fit of the middle 80% of the samples, as done by the GUI, gives the locations stored in data.mat"""
+    for x, y, loc, _ in stored_passes():
+        n = len(x)
+        x = x[int(n/10):int(9/10*n)]
+        y = y[int(n/10):int(9/10*n)]
+        assert analysis.find_symmetry_axis(x,y) == pytest.approx(loc,abs=1e-4)
+
+def test_check_fit_stored_passes():
+    for x, y, loc, _ in stored_passes():
+        n = len(x)
+        analysis.check_fit(x[int(n/10):int(9/10*n)],y[int(n/10):int(9/10*n)],loc)
+
+def test_online_fit_matches_offline_fit():
+    x, y = synthetic_pass()
+    fit = analysis.online_symmetry_fit(center,0.8*4)
+    for position, value in zip(x,y):
+        fit.add(position,value)
+    o, error = fit.estimate()
+    inside = np.abs(x-center) <= 0.8*4
+    assert o == pytest.approx(analysis.fit_polynomial(x[inside],y[inside]),abs=0.01)
+    assert 0 < error < 0.01
+
+def test_online_fit_stored_passes():
+    """Stopping a pass of data.mat as soon as the online fit has converged gives the stored location, and the samples until then pass check_fit"""
+    early_stops = 0
+    for x, y, loc, _ in stored_passes():
+        fit = analysis.online_symmetry_fit((x[0]+x[-1])/2,0.8*abs(x[-1]-x[0])/2)
+        for position, value in zip(x,y):
+            fit.add(position,value)
+            if fit.converged(0.005):
+                early_stops = early_stops + 1
+                break
+        o, _ = fit.estimate()
+        assert o == pytest.approx(loc,abs=0.01)
+        analysis.check_fit(fit.positions,fit.values,o)
+    assert early_stops > 0
+
+def test_online_fit_does_not_converge_before_the_dip():
+    x, y = synthetic_pass(noise=0)
+    fit = analysis.online_symmetry_fit(center,0.8*4)
+    for position, value in zip(x,y):
+        if position > center+0.3:
+            break
+        fit.add(position,value)
+    assert not fit.converged(0.005)
+
+def test_register_template():
+    u = np.linspace(-4,4,161)
+    profile = analysis.response_profile(*synthetic_pass(o=center,noise=0),center,u)
+    assert profile[80] == pytest.approx(-1)
+    x = np.linspace(center-1.5,center+2.0,12)
+    y = dip(x,center+0.25,depth=2e-8) + 5e-10
+    assert analysis.register_template(x,y,u,profile,center,1) == pytest.approx(center+0.25,abs=0.01)
+
+def test_register_template_rejects_mismatch():
+    u = np.linspace(-4,4,161)
+    profile = analysis.response_profile(*synthetic_pass(o=center,noise=0),center,u)
+    x = np.linspace(center-1.5,center+2.0,12)
+    y = 1e-6 + 1e-8*np.cos(3*(x-center))
+    with pytest.raises(RuntimeError):
+        analysis.register_template(x,y,u,profile,center,1)
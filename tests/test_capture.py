@@ -0,0 +1,45 @@
+"""
+.. module:: test_capture
+    :synopsis: This module tests capturing the bytes received from the LDC1101EVM and replaying them through the decoder
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import numpy as np
+import capture
+from ldc1101evm import ldc1101evm
+from test_ldc1101evm import fake_reader, frame
+
+def test_round_trip(tmp_path):
+    filename = str(tmp_path/'capture.bin')
+    chunks = [bytes(range(10)),bytes(range(100,100+capture.chunk_size+7)),b'\xff']
+    writer = capture.capture_writer(filename,1e4)
+    for i, chunk in enumerate(chunks):
+        assert writer.write(chunk,1000.0+i)
+    writer.close()
+    data, times = capture.read_capture(filename)
+    assert data == b''.join(chunks)
+    np.testing.assert_array_equal(times,np.repeat([0.0,1.0,2.0],[len(chunk) for chunk in chunks]))
+
+def test_full(tmp_path):
+    writer = capture.capture_writer(str(tmp_path/'capture.bin'),2*capture.capture_dtype.itemsize)
+    assert writer.write(bytes(capture.chunk_size),0)
+    assert not writer.write(bytes(capture.chunk_size+1),1)
+    writer.close()
+
+def test_replay(tmp_path):
+    """Replaying a capture through the decoder gives the same samples as decoding the bytes when they were received"""
+    filename = str(tmp_path/'capture.bin')
+    data = b''.join(frame(0x100000+i) for i in range(100))
+    writer = capture.capture_writer(filename,1e5)
+    for start in range(0,len(data),37):
+        writer.write(data[start:start+37],start/1000)
+    writer.close()
+    port = capture.replay_port(filename,speed=None,timeout=0.01)
+    sensor = ldc1101evm(port,fake_reader())
+    while not port.finished:
+        sensor.receive(port.read(port.in_waiting),0)
+    sensor.decode_frames()
+    direct = ldc1101evm(capture.replay_port(filename,speed=None),fake_reader())
+    direct.receive(data,0)
+    direct.decode_frames()
+    assert len(sensor.samples) == 100
+    np.testing.assert_array_equal(sensor.samples,direct.samples)
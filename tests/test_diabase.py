@@ -0,0 +1,112 @@
+"""
+.. module:: test_diabase
+    :synopsis: This module tests the communication with the printer, using fake serial ports
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import re
+import pytest
+from diabase import diabase, temperature
+
+class fake_serial:
+    """Serial port from which a fixed reply can be read"""
+
+    def __init__(self,reply):
+        self.reply = reply
+
+    @property
+    def in_waiting(self):
+        return len(self.reply)
+
+    def read(self,size=1):
+        data, self.reply = self.reply[:size], self.reply[size:]
+        return data
+
+class fake_duet:
+    """Serial port that answers G10 commands like RepRapFirmware, which reports tool offsets with 3 decimals. Offsets set for the tools in stuck are ignored."""
+
+    def __init__(self,offsets,stuck=()):
+        self.offsets = offsets
+        self.stuck = stuck
+        self.reply = b''
+        self.writes = 0
+
+    def write(self,data):
+        self.writes = self.writes + 1
+        for line in data.decode().splitlines():
+            tool = int(re.match(r'G10 P(\d+)',line).group(1))
+            values = re.findall(r'([XYZ])(-?\d+\.?\d*)',line)
+            if not values:
+                offset = self.offsets[tool]
+                self.reply += ('Tool %d offsets: X%.3f Y%.3f Z%.3f\n' % (tool,offset['x'],offset['y'],offset['z'])).encode()
+            elif tool not in self.stuck:
+                for axis, value in values:
+                    self.offsets[tool][axis.lower()] = round(float(value),3)
+            self.reply += b'ok\n'
+        return len(data)
+
+    @property
+    def in_waiting(self):
+        return len(self.reply)
+
+    def read(self,size=1):
+        data, self.reply = self.reply[:size], self.reply[size:]
+        return data
+
+    def reset_input_buffer(self):
+        self.reply = b''
+
+def printer(port):
+    result = diabase.__new__(diabase)
+    result.ser = port
+    return result
+
+def test_parse_position():
+    lines = ['X:10.000 Y:-20.500 Z:5.000 E0:0.0 Count 800 1600 2000 Machine 10.000 20.000 5.000']
+    assert diabase.parse_position(lines) == {'x':10.0, 'y':-20.5, 'z':5.0}
+    with pytest.raises(RuntimeError):
+        diabase.parse_position(['Error: unknown command'])
+
+def test_parse_temperatures():
+    temperatures = diabase.parse_temperatures(['T0:175.2 /175.0 T1:20.1 /0.0 B:60.1 /60.0 C:30.0 /0.0'])
+    assert temperatures == {0:temperature(175.2,175.0), 1:temperature(20.1,0.0), 'bed':temperature(60.1,60.0), 'chamber':temperature(30.0,0.0)}
+    assert diabase.parse_temperatures(['T:210.0 /210.0']) == {0:temperature(210.0,210.0)}
+    with pytest.raises(RuntimeError):
+        diabase.parse_temperatures([''])
+
+def test_read_replies():
+    reply = b'T0:175.2 /175.0 B:60.1 /60.0\nok\nok T:20 /0\n'
+    assert printer(fake_serial(reply)).read_replies(2,1) == ['T0:175.2 /175.0 B:60.1 /60.0','T:20 /0']
+
+def test_read_replies_needs_bare_ok():
+    """A line that only ends in ok, like a message, is not the acknowledgement of a command"""
+    with pytest.raises(RuntimeError):
+        printer(fake_serial(b'message: all is ok\n')).read_replies(1,0.05)
+    assert printer(fake_serial(b'message: all is ok\nok\n')).read_replies(1,1) == ['message: all is ok']
+
+def test_read_replies_timeout():
+    with pytest.raises(RuntimeError,match='1 of 2'):
+        printer(fake_serial(b'ok\n')).read_replies(2,0.05)
+
+def test_parse_tool_offsets():
+    offsets = diabase.parse_tool_offsets(['Tool 6 offsets: X0.100 Y-0.200 Z0.000','Tool 7 offset: X1.25 Y0.5 Z0'])
+    assert offsets[6] == {'x':0.1, 'y':-0.2, 'z':0.0, 'resolution':0.001}
+    assert offsets[7] == {'x':1.25, 'y':0.5, 'z':0.0, 'resolution':diabase.max_offset_resolution}
+
+def test_offsets_without_decimals():
+    """An offset printed without decimals does not widen the resolution"""
+    offsets = diabase.parse_tool_offsets(['Tool 1 offsets: X0 Y0 Z0','Tool 2 offsets: X0 Y0.25 Z0'])
+    assert offsets[1]['resolution'] == diabase.offset_resolution
+    assert offsets[2]['resolution'] == 0.01
+
+def test_set_tool_offsets_differential():
+    port = fake_duet({1:{'x':0.5,'y':-0.25,'z':0.0}, 2:{'x':0.0,'y':0.0,'z':0.0}})
+    new_offsets = printer(port).set_tool_offsets_differential({1:{'x':0.0123,'y':-0.01}, 2:{'y':0.1}})
+    assert new_offsets == {1:{'x':pytest.approx(0.5123),'y':pytest.approx(-0.26)}, 2:{'y':pytest.approx(0.1)}}
+    assert port.offsets == {1:{'x':0.512,'y':-0.26,'z':0.0}, 2:{'x':0.0,'y':0.1,'z':0.0}}
+    #one read, one write and one read back for all tools together
+    assert port.writes == 3
+
+def test_set_tool_offsets_differential_verifies():
+    port = fake_duet({1:{'x':0.0,'y':0.0,'z':0.0}, 2:{'x':0.0,'y':0.0,'z':0.0}},stuck=[2])
+    with pytest.raises(RuntimeError,match='tool 2'):
+        printer(port).set_tool_offsets_differential({1:{'x':0.1}, 2:{'x':0.1}})
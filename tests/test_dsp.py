@@ -0,0 +1,55 @@
+"""
+.. module:: test_dsp
+    :synopsis: This module tests the streaming filters of the dsp module
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import numpy as np
+import pytest
+import dsp
+
+sample_rate = 1000
+
+spikes = [100,700,1500]
+
+def clean_signal():
+    rng = np.random.default_rng(0)
+    return 1e-6 + 1e-9*np.sin(np.arange(2000)/50) + 1e-11*rng.standard_normal(2000)
+
+def signal():
+    y = clean_signal()
+    y[spikes] += 1e-9
+    return y
+
+@pytest.mark.parametrize('name',[name for name in dsp.filter_names if name != 'none'])
+def test_blocks_equal_whole_signal(name):
+    y = signal()
+    whole = dsp.create_filter(name,sample_rate).process(y)
+    blocked = dsp.create_filter(name,sample_rate)
+    edges = [0,1,2,17,18,300,301,1000,1999,2000]
+    parts = [blocked.process(y[start:end]) for start, end in zip(edges[:-1],edges[1:])]
+    assert len(whole) == len(y)
+    np.testing.assert_allclose(np.concatenate(parts),whole,rtol=1e-12)
+
+def test_none_filter():
+    assert dsp.create_filter('none',sample_rate) is None
+
+def test_outlier_rejection_replaces_spikes():
+    y = signal()
+    stage = dsp.outlier_rejection(15,4)
+    filtered = stage.process(y)
+    assert stage.rejected >= 3
+    np.testing.assert_allclose(filtered[spikes],clean_signal()[spikes],atol=1e-10,rtol=0)
+
+def test_chain_counts_rejected():
+    chain = dsp.create_filter('outlier rejection + low-pass',sample_rate)
+    chain.process(signal())
+    assert chain.rejected == chain.filters[0].rejected > 0
+
+def test_reset_starts_a_new_signal():
+    y = signal()
+    for name in dsp.filter_names[1:]:
+        stage = dsp.create_filter(name,sample_rate)
+        first = stage.process(y[:500])
+        stage.process(y[500:])
+        stage.reset()
+        np.testing.assert_allclose(stage.process(y[:500]),first,rtol=1e-12)
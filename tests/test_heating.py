@@ -0,0 +1,88 @@
+"""
+.. module:: test_heating
+    :synopsis: This module tests heating up the printer by polling the temperatures, using a fake printer
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import pytest
+from diabase import temperature
+from heating import heat_up_manager
+
+class fake_printer:
+    """Printer of which the temperatures reported by M105 are set by the test. Tool 1 is heated by heater 3, the other tools by the heater with their own number."""
+
+    def __init__(self):
+        self.lines = []
+        self.temperatures = {}
+
+    def get_tool_heaters(self,tools):
+        return {tool:3 if tool == 1 else tool for tool in tools}
+
+    def write_line(self,string,attempts):
+        self.lines.append(string)
+
+    def get_temperatures(self):
+        return dict(self.temperatures)
+
+@pytest.fixture
+def printer():
+    return fake_printer()
+
+def test_start(printer):
+    heating = heat_up_manager(printer)
+    heating.start([0,1],175,60)
+    assert printer.lines == ['G10 P0 R175  S175','G10 P1 R175  S175','M140 S60']
+    assert not heating.tool_ready(0)
+    assert not heating.bed_ready()
+    assert heating.tool_ready(2)
+
+def test_ready(printer):
+    heating = heat_up_manager(printer)
+    heating.start([0,1],175,60)
+    printer.temperatures = {0:temperature(174.0,175.0), 1:temperature(20.0,175.0), 3:temperature(176.5,175.0), 'bed':temperature(50.0,60.0)}
+    heating.poll()
+    assert heating.tool_ready(0)
+    assert heating.tool_ready(1)
+    assert not heating.bed_ready()
+    assert heating.summary() == 'T0 174.0/175  T1 176.5/175  bed 50.0/60'
+
+def test_not_heated(printer):
+    heating = heat_up_manager(printer)
+    heating.start([0,1],0,0)
+    assert printer.lines == ['M140 S0']
+    assert heating.tool_ready(0)
+    assert heating.bed_ready()
+
+def test_wait(printer):
+    heating = heat_up_manager(printer)
+    heating.poll_interval = 0
+    heating.start([0],175,0)
+    polls = []
+
+    def idle():
+        polls.append(True)
+        if len(polls) == 3:
+            printer.temperatures = {0:temperature(175.0,175.0)}
+
+    assert heating.wait_for_tool(0,idle)
+    assert len(polls) == 3
+
+def test_wait_aborted(printer):
+    heating = heat_up_manager(printer)
+    heating.start([0],175,0)
+    assert not heating.wait_for_tool(0,lambda: False)
+
+def test_wait_timeout(printer):
+    heating = heat_up_manager(printer)
+    heating.timeout = 0
+    heating.start([0],175,0)
+    with pytest.raises(RuntimeError,match='tool 0'):
+        heating.wait_for_tool(0)
+
+def test_heater_off(printer):
+    heating = heat_up_manager(printer)
+    heating.start([0,1],175,0)
+    #the heater of a tool that has not been selected yet stays off, so it is not waited for
+    printer.temperatures = {0:temperature(21.0,0.0), 3:temperature(21.0,175.0)}
+    heating.poll()
+    assert heating.tool_ready(0)
+    assert not heating.tool_ready(1)
@@ -0,0 +1,38 @@
+"""
+.. module:: test_history
+    :synopsis: This module tests the history of the measured tool offsets
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import pytest
+from history import offset_history
+
+@pytest.fixture
+def history(tmp_path):
+    history = offset_history(str(tmp_path/'history.sqlite'))
+    yield history
+    history.close()
+
+def add(history,offsets,temperature=175):
+    for i, offset in enumerate(offsets):
+        history.add('printer',1,0,'x',temperature,offset,0.002,5,timestamp=1000+i)
+
+def test_stable(history):
+    add(history,[0.004,-0.003,0.002])
+    assert history.is_stable('printer',1,'x',175)
+    assert not history.is_stable('printer',1,'y',175)
+    assert not history.is_stable('printer',1,'x',175,count=4)
+
+def test_unapplied_correction_is_not_stable(history):
+    """A tool that keeps needing the same correction because it was never applied is not stable, even though the corrections agree"""
+    add(history,[0.30,0.30,0.30])
+    assert not history.is_stable('printer',1,'x',175)
+
+def test_stable_uses_most_recent(history):
+    add(history,[0.30,0.001,0.0,-0.002])
+    assert history.is_stable('printer',1,'x',175)
+    assert not history.is_stable('printer',1,'x',175,count=4)
+
+def test_stable_at_temperature(history):
+    add(history,[0.0,0.0,0.0],temperature=240)
+    assert not history.is_stable('printer',1,'x',175)
+    assert history.is_stable('printer',1,'x',238)
@@ -0,0 +1,159 @@
+"""
+.. module:: test_ldc1101evm
+    :synopsis: This module tests the communication with the LDC1101EVM, using a fake port and reader
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import numpy as np
+import pytest
+import dsp
+from ldc1101evm import ldc1101evm
+
+class fake_port:
+    """Port that answers register commands like the LDC1101EVM. Writes to the registers in stuck are ignored."""
+
+    def __init__(self,stuck=()):
+        self.registers = {}
+        self.stuck = stuck
+        self.sensor = None
+        self.conversion = False
+
+    def write(self,data):
+        count = len(data)
+        data = data.decode()
+        while data:
+            if data.startswith('0638'):
+                self.conversion = True
+                data = data[4:]
+            elif data.startswith('07'):
+                self.conversion = False
+                data = data[2:]
+            elif data.startswith('02'):
+                register, value = data[2:4], int(data[4:6],16)
+                if register not in self.stuck:
+                    self.registers[register] = value
+                self.reply(register)
+                data = data[8:]
+            elif data.startswith('03'):
+                self.reply(data[2:4])
+                data = data[6:]
+            else:
+                raise ValueError('unknown command ' + data)
+        return count
+
+    def reply(self,register):
+        self.sensor.receive(bytes(8) + bytes([self.registers.get(register,0)]),0)
+
+    def reset_input_buffer(self):
+        pass
+
+    def close(self):
+        pass
+
+class fake_reader:
+    def register(self,sensor):
+        pass
+
+    def unregister(self,sensor):
+        pass
+
+def connect(port):
+    sensor = ldc1101evm(port,fake_reader())
+    port.sensor = sensor
+    return sensor
+
+def frame(value):
+    return bytes([0,value >> 16 & 0xFF,value >> 8 & 0xFF,value & 0xFF,0x5A,0,0x5A,0x5A])
+
+def inductance(values,sensor):
+    fosc = sensor.Fclkin/2**24*(np.asarray(values)+1)
+    return 1/(sensor.Csensor*(2*np.pi*fosc)**2)
+
+@pytest.fixture
+def sensor():
+    return connect(fake_port())
+
+@pytest.mark.parametrize('profile',list(ldc1101evm.conversion_profiles))
+def test_LHR_init(profile):
+    port = fake_port()
+    connect(port).LHR_init(profile)
+    settings = ldc1101evm.conversion_profiles[profile]
+    assert port.registers['30'] == settings['rcount'] & 0xFF
+    assert port.registers['31'] == settings['rcount'] >> 8
+    assert port.registers['04'] == settings['settling']
+    assert port.registers['0B'] == 0
+    assert port.conversion
+
+def test_LHR_init_detects_failed_write():
+    port = fake_port(stuck=['04'])
+    with pytest.raises(RuntimeError,match='04'):
+        connect(port).LHR_init('balanced')
+    assert not port.conversion
+
+def test_decode(sensor):
+    values = [0x123456,0x123457,0x200000]
+    sensor.receive(b''.join(frame(value) for value in values),10.0)
+    sensor.decode_frames()
+    np.testing.assert_allclose(sensor.samples,inductance(values,sensor))
+    np.testing.assert_array_equal(sensor.sample_times,[10.0,10.0,10.0])
+
+def test_frames_split_over_chunks(sensor):
+    """Each sample gets the time of the chunk in which the last byte of its frame arrived and an incomplete frame waits for the next chunk"""
+    data = frame(1000) + frame(2000) + frame(3000)
+    sensor.receive(data[:5],1.0)
+    sensor.decode_frames()
+    assert len(sensor.samples) == 0
+    sensor.receive(data[5:12],2.0)
+    sensor.decode_frames()
+    assert len(sensor.samples) == 1
+    sensor.receive(data[12:20],3.0)
+    sensor.decode_frames()
+    sensor.receive(data[20:],4.0)
+    sensor.decode_frames()
+    np.testing.assert_allclose(sensor.samples,inductance([1000,2000,3000],sensor))
+    np.testing.assert_array_equal(sensor.sample_times,[2.0,3.0,4.0])
+    assert sensor.received_bytes == b''
+
+def test_get_window(sensor):
+    sensor.receive(b''.join(frame(1000*i) for i in range(1,5)),1.0)
+    sensor.receive(b''.join(frame(1000*i) for i in range(5,9)),2.0)
+    sensor.receive(frame(9000),3.0)
+    expected = inductance([1000*i for i in range(1,10)],sensor)
+    assert sensor.get_window(1.5,2.5) == pytest.approx(expected[4:8].mean())
+    assert sensor.get_window(2.6,2.7) == pytest.approx(expected[8])
+
+def test_resync(sensor):
+    """A garbage byte is skipped, after which the frames behind it are found again"""
+    values = [0x100000+i for i in range(6)]
+    data = frame(values[0]) + frame(values[1]) + b'\x17' + b''.join(frame(value) for value in values[2:])
+    sensor.receive(data,5.0)
+    sensor.decode_frames()
+    np.testing.assert_allclose(sensor.samples,inductance(values,sensor))
+
+def test_resync_matches_clean_stream(sensor):
+    values = list(range(0x100000,0x100000+50))
+    clean = connect(fake_port())
+    clean.receive(b''.join(frame(value) for value in values),1.0)
+    clean.decode_frames()
+    for i, value in enumerate(values):
+        sensor.receive((b'\x5A\x00' if i % 7 == 3 else b'') + frame(value),1.0)
+        if i % 5 == 0:
+            sensor.decode_frames()
+    sensor.decode_frames()
+    np.testing.assert_allclose(sensor.samples,clean.samples)
+
+def test_filter_applied(sensor):
+    sensor.filter = dsp.moving_average(2)
+    sensor.receive(frame(1000)+frame(3000),1.0)
+    sensor.decode_frames()
+    expected = inductance([1000,3000],sensor)
+    np.testing.assert_allclose(sensor.samples,[expected[0],expected.mean()])
+
+def test_flush_filters_pending_frames(sensor):
+    """Frames received before a flush still pass through the filter, like when they had been decoded before the flush"""
+    sensor.filter = dsp.moving_average(2)
+    sensor.receive(frame(1000),1.0)
+    sensor.flush()
+    assert len(sensor.samples) == 0
+    sensor.receive(frame(3000),2.0)
+    sensor.decode_frames()
+    assert sensor.samples[0] == pytest.approx(inductance([1000,3000],sensor).mean())
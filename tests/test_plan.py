@@ -0,0 +1,84 @@
+"""
+.. module:: test_plan
+    :synopsis: This module tests the compilation, execution and simulation of calibration plans
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import pytest
+import plan
+
+passes = [('x',0),('x',1),('y',0),('y',1)]
+
+def compiled(rounds=2,homing_every_round=False):
+    return plan.compile_plan([0,1,2],rounds,passes,{'x':100,'y':50},{'x':96,'y':46},{'x':104,'y':54},2,5,60,homing_every_round,True)
+
+def test_move():
+    assert plan.move(3600,z=2,y=20,x=8.5) == 'G1 Z2 Y20 X8.5 F3600'
+    assert plan.move(600,x=0.12345) == 'G1 X0.1235 F600'
+
+def test_compile_plan():
+    steps = compiled()
+    scans = [item for item in steps if item.kind == 'scan']
+    assert [(item.cycle,item.tool,item.scan) for item in scans] == [(cycle,tool,scan) for cycle in range(2) for tool in range(3) for scan in range(4)]
+    gcode = [line for item in steps if item.kind == 'gcode' for line in item.gcode]
+    assert gcode.count('G28') == 2
+    assert gcode.count('G30') == 1
+    assert 'G1 Z2 Y50 X96 F3600' in gcode
+    assert 'G1 Z2 Y54 X100 F3600' in gcode
+    assert steps[-1] == plan.step('gcode',None,None,None,('G28',),plan.homing_timeout)
+    assert compiled(homing_every_round=True).count(plan.step('gcode',1,None,None,('G30',),plan.homing_timeout)) == 1
+
+def test_describe_plan():
+    description = plan.describe_plan(compiled(rounds=1))
+    assert '; sync scan cycle 0 tool 2 scan 3\n' in description
+    assert description.startswith('M106 P3 S255\n; sync heat\nG54\n')
+
+def test_repeat_and_skip():
+    steps = compiled()
+    first_scan = next(i for i, item in enumerate(steps) if item.kind == 'scan')
+    assert steps[plan.repeat_from(steps,first_scan)].kind == 'pass'
+    tool = steps[plan.skip_to(steps,first_scan,'tool')]
+    assert (tool.kind, tool.cycle, tool.tool) == ('tool',0,1)
+    next_round = steps[plan.skip_to(steps,first_scan,'round')]
+    assert (next_round.kind, next_round.cycle) == ('round',1)
+    assert steps[plan.skip_to(steps,first_scan,'finish')].kind == 'finish'
+    with pytest.raises(ValueError):
+        plan.repeat_from(steps,0)
+
+def test_executor():
+    steps = compiled()
+    scanned = []
+    repeated = []
+
+    def scan(item):
+        scanned.append((item.cycle,item.tool,item.scan))
+        if (item.cycle,item.tool,item.scan) == (0,0,1) and not repeated:
+            repeated.append(True)
+            return 'repeat'
+        if item.tool == 1 and item.scan == 0:
+            return 'tool'
+
+    printer = plan.simulated_printer()
+    assert plan.plan_executor(printer,{'scan':scan}).run(steps)
+    assert scanned.count((0,0,1)) == 2
+    assert (0,1,1) not in scanned and (0,2,0) in scanned
+    #skipping the rest of tool 1 skips the move up after its first pass and both moves of its other 3 passes in each round, repeating a pass moves to its start again
+    assert printer.writes == sum(item.kind == 'gcode' for item in steps) - 2*(1+3*2) + 1
+
+def test_executor_stop():
+    stops = iter([True,True,False])
+    assert not plan.plan_executor(plan.simulated_printer(),{},lambda: next(stops)).run(compiled())
+
+def test_simulate():
+    steps = compiled()
+    durations = plan.simulate(steps,4,2,0.5,3,heating_time=100)
+    assert durations['scan'] == pytest.approx(2*3*4*(0.5+2*4/2))
+    assert durations['cooldown'] == pytest.approx(2*3*4*3)
+    assert durations['total'] >= 100 + durations['scan'] + durations['cooldown']
+    assert durations['writes'] == sum(item.kind == 'gcode' for item in steps)
+
+def test_wait_after_tool_select():
+    steps = compiled()
+    waits = [i for i, item in enumerate(steps) if item.kind == 'wait_tool']
+    assert len(waits) == 2*3
+    for i in waits:
+        assert steps[i-1].gcode[0] == 'T' + str([0,1,2][steps[i].tool])
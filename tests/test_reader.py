@@ -0,0 +1,33 @@
+"""
+.. module:: test_reader
+    :synopsis: This module tests reading several LDC1101EVMs with a single reader, using replayed captures
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+from time import sleep, time
+import numpy as np
+import capture
+from ldc1101evm import ldc1101evm
+from reader import serial_reader
+from test_ldc1101evm import frame, inductance
+
+def test_shared_reader(tmp_path):
+    reader = serial_reader()
+    sensors = []
+    try:
+        for i in range(2):
+            filename = str(tmp_path/('capture%d.bin' % i))
+            writer = capture.capture_writer(filename,1e5)
+            writer.write(b''.join(frame(0x100000*(i+1)+value) for value in range(200)),0)
+            writer.close()
+            sensors.append(ldc1101evm(capture.replay_port(filename,speed=None,timeout=0.01),reader))
+        deadline = time() + 5
+        while not all(sensor.ser.finished for sensor in sensors) and time() < deadline:
+            sleep(0.01)
+        for i, sensor in enumerate(sensors):
+            sensor.decode_frames()
+            np.testing.assert_allclose(sensor.samples,inductance([0x100000*(i+1)+value for value in range(200)],sensor))
+        assert sensors[0].sample_times[0] > 0
+    finally:
+        for sensor in sensors:
+            reader.unregister(sensor)
+        reader.close()
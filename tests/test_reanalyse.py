@@ -0,0 +1,35 @@
+"""
+.. module:: test_reanalyse
+    :synopsis: This module tests processing a stored calibration again, using data.mat
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import os
+import numpy as np
+import pytest
+import reanalyse
+
+archive = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'data.mat')
+
+def test_analyse_archive():
+    rows = reanalyse.analyse_archive(archive,['polynomial','mirror'])
+    stored = reanalyse.load_archive(archive)
+    tool_list = [int(tool) for tool in np.ravel(stored['tool_list'])]
+    assert len(rows) == 2*stored['loc'].size
+    for row in rows:
+        if row['method'] != 'polynomial':
+            continue
+        tool = tool_list.index(row['tool'])
+        scan = ['up','down'].index(row['direction'])
+        assert row['location'] == pytest.approx(stored['loc'][tool,row['round'],scan],abs=1e-4)
+        assert row['quality'] < 0.1
+
+def test_cache(tmp_path):
+    """Loading an archive from the cache gives the same result as loading the .mat file"""
+    first = reanalyse.analyse_archive(archive,['polynomial'],cache=str(tmp_path))
+    second = reanalyse.analyse_archive(archive,['polynomial'],cache=str(tmp_path))
+    assert any(name.endswith('.npy') for name in os.listdir(tmp_path))
+    assert [row['location'] for row in first] == [row['location'] for row in second]
+
+def test_missing_file(tmp_path):
+    rows = reanalyse.analyse_archive(str(tmp_path/'missing.mat'),['polynomial'])
+    assert rows[0]['kind'] == 'error'
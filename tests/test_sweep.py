@@ -0,0 +1,46 @@
+"""
+.. module:: test_sweep
+    :synopsis: This module tests choosing the fastest calibration settings from the runs of a sweep
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import numpy as np
+import pytest
+import yaml
+import sweep
+
+def run(speed,repeatability,round_time,failed=0,error=''):
+    return {'file':'run.mat', 'speed':speed, 'scan_range':4, 'z_pos':9.4, 'rounds':5, 'failed':failed, 'repeatability':repeatability, 'round_time':round_time, 'error':error}
+
+def test_parse_values():
+    assert sweep.parse_values('1, 2 4,8') == [1,2,4,8]
+    with pytest.raises(ValueError):
+        sweep.parse_values(' , ')
+
+def test_sweep_grid():
+    grid = sweep.sweep_grid([1,2],[4,8],[9.4])
+    assert len(grid) == 4
+    assert grid[0] == {'speed':2, 'scan_range':4, 'z_pos':9.4}
+    assert grid[-1] == {'speed':1, 'scan_range':8, 'z_pos':9.4}
+
+def test_sweep_filename():
+    assert sweep.sweep_filename('calibration.mat',{'speed':2, 'scan_range':4, 'z_pos':9.4}) == 'calibration_sweep_v2_r4_z9.4.mat'
+
+def test_required_rounds():
+    assert sweep.required_rounds(run(2,0.01,30),0.005) == 4
+    assert sweep.required_rounds(run(2,0.001,30),0.005) == 1
+    assert sweep.required_rounds(run(2,np.nan,30),0.005) == np.inf
+
+def test_recommend():
+    slow_but_precise = run(1,0.004,100)
+    fast_but_noisy = run(4,0.01,20)
+    failing = run(8,0.001,5,failed=1)
+    result, rounds, duration = sweep.recommend([slow_but_precise,fast_but_noisy,failing,run(8,0.001,5,error='no run settings')],0.005)
+    assert result is fast_but_noisy
+    assert (rounds, duration) == (4, 80)
+    assert sweep.recommend([fast_but_noisy],0.005,max_rounds=3) is None
+
+def test_write_settings(tmp_path):
+    filename = tmp_path/'settings.yaml'
+    filename.write_text('speed: 1\nrange: 8\nz_cor: 9\nx_rounds: 10\ny_rounds: 10\nprinter: lab\n')
+    sweep.write_settings(str(filename),run(4,0.01,20),4)
+    assert yaml.safe_load(filename.read_text()) == {'speed':4, 'range':4, 'z_cor':9.4, 'x_rounds':4, 'y_rounds':4, 'printer':'lab'}
@@ -0,0 +1,48 @@
+"""
+.. module:: test_telemetry
+    :synopsis: This module tests the frames of the telemetry and publishing them to a client
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import socket
+from time import sleep, time
+import pytest
+import telemetry
+
+def test_encode_decode():
+    for kind, values in [(telemetry.SAMPLE,(6,2,12.5,4.7e-6)),(telemetry.PHASE,('tool 6 x up',)),(telemetry.RESULT,(6,'x',1,-77.46)),(telemetry.OFFSET,(6,'y',0.012,0.003)),(telemetry.HEALTH,(1000,1,2,0,False))]:
+        frame = telemetry.encode(kind,*values)
+        start, decoded_kind, length = telemetry.header.unpack_from(frame)
+        assert (start, decoded_kind, length) == (telemetry.magic, kind, len(frame)-telemetry.header.size)
+        decoded = telemetry.decode(kind,frame[telemetry.header.size:])
+        assert decoded[0] == pytest.approx(time(),abs=10)
+        assert decoded[1:] == values
+
+def test_read_frames():
+    """Frames split over several packets and frames of unknown types are handled"""
+    sender, receiver = socket.socketpair()
+    data = telemetry.encode(telemetry.PHASE,'heating') + telemetry.header.pack(telemetry.magic,99,3) + b'abc' + telemetry.encode(telemetry.RESULT,6,'x',0,1.5)
+    with sender, receiver:
+        for i in range(0,len(data),5):
+            sender.sendall(data[i:i+5])
+        sender.shutdown(socket.SHUT_WR)
+        frames = list(telemetry.read_frames(receiver))
+    assert [(kind, values[1:]) for kind, values in frames] == [(telemetry.PHASE,('heating',)),(telemetry.RESULT,(6,'x',0,1.5))]
+
+def test_server():
+    server = telemetry.telemetry_server(0)
+    server.publish(telemetry.PHASE,'nobody listens')
+    server.start()
+    try:
+        connection = socket.create_connection(server.listener.getsockname())
+        deadline = time() + 5
+        while not server.clients and time() < deadline:
+            sleep(0.01)
+        for i in range(3):
+            server.publish(telemetry.SAMPLE,6,0,float(i),4.7e-6)
+        server.stop()
+        with connection:
+            frames = list(telemetry.read_frames(connection))
+    finally:
+        server.stop()
+    assert [values[3] for kind, values in frames] == [0.0,1.0,2.0]
+    assert server.dropped == 0
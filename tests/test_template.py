@@ -0,0 +1,42 @@
+"""
+.. module:: test_template
+    :synopsis: This module tests learning, storing and invalidating the templates of the response
+.. moduleauthor:: Martijn Schouten <github.com/martijnschouten>
+"""
+import numpy as np
+import pytest
+import template
+
+def dip(x,o):
+    return 1e-6 - 1e-8/(1+(x-o)**2)
+
+@pytest.fixture
+def templates(tmp_path):
+    templates = template.template_cache(str(tmp_path/'templates.sqlite'))
+    yield templates
+    templates.close()
+
+def test_learn_template(templates):
+    key = template.key('printer',1,'x',0,2.004,100,50,175.4,'balanced','none')
+    assert key == template.key('printer',1,'x',0,2.0,100.0,50.0,175,'balanced','none')
+    assert templates.get(key) is None
+    x = np.linspace(96,104,400)
+    for o in [100.2,99.9,100.1]:
+        learned = templates.learn(key,x,dip(x,o),o)
+    assert learned.count == 3
+    assert template.width(learned) == pytest.approx(1,abs=0.1)
+    stored = templates.get(key)
+    np.testing.assert_allclose(stored.profile,learned.profile)
+    positions = template.sample_positions(stored,100,12,96,104)
+    assert len(positions) == 12 and positions[0] >= 96 and positions[-1] <= 104
+    assert [row[0] for row in templates.query('printer')] == [key]
+    templates.invalidate(key)
+    assert templates.get(key) is None
+
+def test_template_expires(tmp_path):
+    templates = template.template_cache(str(tmp_path/'templates.sqlite'),max_age=-1)
+    key = template.key('printer',1,'x',0,2,100,50,175,'balanced','none')
+    x = np.linspace(96,104,400)
+    templates.learn(key,x,dip(x,100),100)
+    assert templates.get(key) is None
+    templates.close()